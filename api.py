@@ -0,0 +1,210 @@
+# api.py
+# API JSON de solo lectura para terminales de caja e integraciones (/api/v1/...):
+# las mismas consultas que las páginas HTML (consultas.py), sin renderizar plantillas.
+#   GET /api/v1/productos?q=lap&per_page=50&fields=id_producto,nombre,precio
+#   GET /api/v1/productos?after=<siguiente>      # página siguiente (paginación por clave)
+#   GET /api/v1/productos?ids=3,8,15             # varios por id en una consulta
+#   GET /api/v1/productos/8
+# Igual para /clientes y /ventas (filtros desde, hasta, id_cliente, estado).
+# Requiere sesión iniciada (sin ella responde 401 en JSON, no redirige al login).
+# Cada respuesta lleva ETag: con If-None-Match igual se responde 304 sin cuerpo.
+import hashlib
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from functools import wraps
+
+from flask import Blueprint, current_app, g, jsonify, request
+from flask_login import current_user
+
+from conexion.conexion import conexion, cerrar_conexion
+from consultas import (CLIENTE_COLUMNAS, ESTADOS_VENTA, PRODUCTO_COLUMNAS, clientes_por_ids,
+                       pagina_clientes, pagina_productos, pagina_ventas, productos_por_ids,
+                       ventas_por_ids)
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+MAX_POR_PAGINA = 100
+MAX_IDS = 100
+
+CAMPOS = {
+    'productos': tuple(c.strip() for c in PRODUCTO_COLUMNAS.split(',')),
+    'clientes': tuple(c.strip() for c in CLIENTE_COLUMNAS.split(',')),
+    'ventas': ('id_venta', 'fecha', 'total', 'estado', 'id_cliente', 'cliente', 'lineas', 'unidades'),
+}
+CLAVES = {'productos': 'id_producto', 'clientes': 'id_cliente', 'ventas': 'id_venta'}
+
+
+class ErrorAPI(Exception):
+    def __init__(self, mensaje, estado=400):
+        super().__init__(mensaje)
+        self.mensaje = mensaje
+        self.estado = estado
+
+
+@api.errorhandler(ErrorAPI)
+def _error(e):
+    return jsonify(error=e.mensaje), e.estado
+
+
+def _requiere_sesion(vista):
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        if not current_user.is_authenticated:
+            return jsonify(error='Inicia sesión para usar la API.'), 401
+        return vista(*args, **kwargs)
+    return envoltura
+
+
+# ---------------- Parámetros ----------------
+
+def _campos(entidad):
+    """?fields=a,b -> tupla de campos pedidos (todos si no se indica)."""
+    texto = request.args.get('fields', '').strip()
+    if not texto:
+        return CAMPOS[entidad]
+    pedidos = tuple(dict.fromkeys(c.strip() for c in texto.split(',') if c.strip()))
+    desconocidos = [c for c in pedidos if c not in CAMPOS[entidad]]
+    if desconocidos:
+        raise ErrorAPI(f"Campos desconocidos: {', '.join(desconocidos)}. "
+                       f"Disponibles: {', '.join(CAMPOS[entidad])}.")
+    return pedidos
+
+
+def _ids():
+    """?ids=1,2,3 -> lista de enteros sin repetir, o None si no se pidió."""
+    texto = request.args.get('ids')
+    if texto is None:
+        return None
+    try:
+        ids = list(dict.fromkeys(int(i) for i in texto.split(',') if i.strip()))
+    except ValueError:
+        raise ErrorAPI("ids debe ser una lista de enteros separados por comas.")
+    if not ids or len(ids) > MAX_IDS:
+        raise ErrorAPI(f"Indica entre 1 y {MAX_IDS} ids.")
+    return ids
+
+
+def _por_pagina():
+    return min(max(request.args.get('per_page', 20, type=int), 1), MAX_POR_PAGINA)
+
+
+def _fecha(nombre):
+    texto = request.args.get(nombre)
+    if not texto:
+        return None
+    try:
+        return datetime.strptime(texto, '%Y-%m-%d')
+    except ValueError:
+        raise ErrorAPI(f"{nombre} debe tener el formato AAAA-MM-DD.")
+
+
+# ---------------- Respuesta ----------------
+
+def _valor(v):
+    # Decimal como texto para no perder centavos; fechas en ISO 8601
+    if isinstance(v, Decimal):
+        return str(v)
+    if isinstance(v, (datetime, date)):
+        return v.isoformat()
+    return v
+
+
+def _filas(filas, campos):
+    return [{c: _valor(f.get(c)) for c in campos} for f in filas]
+
+
+def _responder(datos):
+    """JSON compacto con ETag del contenido; 304 si el cliente ya lo tiene."""
+    cuerpo = json.dumps(datos, ensure_ascii=False, separators=(',', ':'))
+    etag = hashlib.md5(cuerpo.encode('utf-8')).hexdigest()
+    g.cache_revalidar = True
+    # comparación débil: compresion.py entrega el mismo ETag como W/"..."
+    if request.if_none_match.contains_weak(etag):
+        resp = current_app.response_class(status=304)
+    else:
+        resp = current_app.response_class(cuerpo, mimetype='application/json')
+    resp.set_etag(etag)
+    return resp
+
+
+def _listar(entidad, pagina, por_ids):
+    campos = _campos(entidad)
+    ids = _ids()
+    conn = conexion()
+    try:
+        cur = conn.cursor(dictionary=True)
+        if ids is not None:
+            clave = CLAVES[entidad]
+            por_id = {f[clave]: f for f in por_ids(cur, ids)}
+            encontrados = [por_id[i] for i in ids if i in por_id]
+            return _responder({'datos': _filas(encontrados, campos),
+                               'faltantes': [i for i in ids if i not in por_id]})
+        filas, anterior, siguiente = pagina(
+            cur, per_page=_por_pagina(),
+            despues=request.args.get('after'), antes=request.args.get('before')
+        )
+    finally:
+        cerrar_conexion(conn)
+    return _responder({'datos': _filas(filas, campos), 'anterior': anterior, 'siguiente': siguiente})
+
+
+def _uno(entidad, por_ids, id_fila):
+    campos = _campos(entidad)
+    conn = conexion()
+    try:
+        filas = por_ids(conn.cursor(dictionary=True), [id_fila])
+    finally:
+        cerrar_conexion(conn)
+    if not filas:
+        raise ErrorAPI(f"No existe {entidad[:-1]} {id_fila}.", 404)
+    return _responder(_filas(filas, campos)[0])
+
+
+# ---------------- Rutas ----------------
+
+@api.route('/productos')
+@_requiere_sesion
+def productos():
+    q = request.args.get('q', '').strip()
+    return _listar('productos', lambda cur, **kw: pagina_productos(cur, q, **kw), productos_por_ids)
+
+
+@api.route('/productos/<int:id_producto>')
+@_requiere_sesion
+def producto(id_producto):
+    return _uno('productos', productos_por_ids, id_producto)
+
+
+@api.route('/clientes')
+@_requiere_sesion
+def clientes():
+    q = request.args.get('q', '').strip()
+    return _listar('clientes', lambda cur, **kw: pagina_clientes(cur, q, **kw), clientes_por_ids)
+
+
+@api.route('/clientes/<int:id_cliente>')
+@_requiere_sesion
+def cliente(id_cliente):
+    return _uno('clientes', clientes_por_ids, id_cliente)
+
+
+@api.route('/ventas')
+@_requiere_sesion
+def ventas():
+    estado = request.args.get('estado', '').strip().upper() or None
+    if estado and estado not in ESTADOS_VENTA:
+        raise ErrorAPI(f"estado debe ser uno de: {', '.join(ESTADOS_VENTA)}.")
+    filtros = dict(desde=_fecha('desde'), hasta=_fecha('hasta'),
+                   id_cliente=request.args.get('id_cliente', type=int), estado=estado)
+    return _listar('ventas', lambda cur, **kw: pagina_ventas(cur, **kw, **filtros), ventas_por_ids)
+
+
+@api.route('/ventas/<int:id_venta>')
+@_requiere_sesion
+def venta(id_venta):
+    return _uno('ventas', ventas_por_ids, id_venta)
+
+
+def init_app(app):
+    app.register_blueprint(api)
@@ -1,13 +1,29 @@
-from flask import Flask, render_template, redirect, url_for, flash, request, session, make_response
+from flask import Flask, render_template, redirect, url_for, flash, request, session, make_response, abort, Response
 from flask_login import (
     LoginManager, login_user, logout_user, login_required,
     current_user, fresh_login_required
 )
-from conexion.conexion import conexion, cerrar_conexion
+from conexion.conexion import conexion, cerrar_conexion, init_app as init_conexion
+from conexion.medicion import init_app as init_medicion
+from mysql.connector import IntegrityError
 from datetime import datetime, timedelta
-from decimal import Decimal
 from models.model_login import Usuario
+from seguridad import HashOcupado, init_app as init_seguridad
+from cache_http import pagina_publica, init_app as init_cache_http
+from assets import init_app as init_assets
+from compresion import init_app as init_compresion
+from importacion import ENTIDADES, importar_csv, iterar_csv, texto_subido, init_app as init_importacion
+from resumenes import reporte, rango_por_defecto, init_app as init_resumenes
+from migraciones import init_app as init_migraciones
+from busqueda import revisar_indice_fulltext
+from api import init_app as init_api
+from plantillas import Diferido, invalidar as invalidar_fragmentos, init_app as init_plantillas
 from math import ceil
+from consultas import (
+    contar_productos, pagina_productos, pagina_productos_offset, invalidar_productos,
+    contar_clientes, pagina_clientes, invalidar_clientes,
+    pagina_ventas, registrar_venta, ESTADOS_VENTA, catalogo_categorias
+)
 
 # ---------------- Configuración de la aplicación Flask ----------------
 app = Flask(__name__)
@@ -22,14 +38,47 @@ app.config.update(
     REMEMBER_COOKIE_DURATION=timedelta(0),  # sin "recordarme"
 )
 
+# Pool de conexiones MySQL: una conexión prestada por petición
+# (tamaño/espera con DB_POOL_SIZE y DB_POOL_TIMEOUT en app.config o variables de entorno)
+init_conexion(app)
+
+# Consultas, tiempo de BD y espera del pool por petición (cabecera Server-Timing solo en
+# debug o con DB_SERVER_TIMING=1);
+# consultas lentas al log (DB_CONSULTA_LENTA_MS) con EXPLAIN muestreado (DB_EXPLAIN_MUESTRA)
+init_medicion(app)
+
+# Hash de contraseñas en un pool de procesos acotado
+# (HASH_PROCESOS, HASH_MAX_PENDIENTES y HASH_TIMEOUT en app.config o variables de entorno)
+init_seguridad(app)
+
+
+# Cache HTTP por ruta: no-store por defecto (especialmente tras logout),
+# 304 para páginas públicas y estáticos con huella de larga duración
+init_cache_http(app)
+
+# Estáticos compilados (python assets.py): imágenes responsive, CSS con hash y precomprimido
+init_assets(app)
+
+# gzip/brotli para HTML y demás respuestas de texto (COMPRESION_ACTIVA=0 lo desactiva)
+init_compresion(app)
+
+# Carga/descarga masiva en CSV (también por consola: flask --app app importar|exportar ...)
+init_importacion(app)
 
-# Evitar que el navegador cachee páginas (especialmente tras logout)
-@app.after_request
-def add_no_cache_headers(resp):
-    resp.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
-    resp.headers["Pragma"] = "no-cache"
-    resp.headers["Expires"] = "0"
-    return resp
+# Resúmenes diarios de ventas para el panel (flask --app app reconstruir-resumenes)
+init_resumenes(app)
+
+# Esquema e índices versionados (flask --app app migrar | revisar-consultas)
+init_migraciones(app)
+
+# Solo avisa si falta el índice FULLTEXT de la búsqueda (lo crea la migración 3)
+revisar_indice_fulltext()
+
+# API JSON de solo lectura para cajas e integraciones (/api/v1/...)
+init_api(app)
+
+# Bytecode de Jinja en disco y {% cache %} de fragmentos (flask --app app compilar-plantillas)
+init_plantillas(app)
 
 # ---------------- Inicializa Flask-Login ----------------
 login_manager = LoginManager()
@@ -42,10 +91,16 @@ login_manager.needs_refresh_message_category = "info"
 def inject_now():
     return {'now': datetime.utcnow()}
 
+@app.errorhandler(HashOcupado)
+def hash_ocupado(e):
+    # Ráfaga de logins/registros: se pide reintentar en vez de bloquear el worker
+    flash('El servidor está ocupado, intenta de nuevo en unos segundos.', 'warning')
+    return redirect(url_for(request.endpoint))
+
 @login_manager.user_loader
 def load_user(user_id):
-    # Busca usuario en la BD por id
-    return Usuario.obtener_por_id(user_id)
+    # Busca usuario por id (cache LRU+TTL; solo va a la BD al vencer)
+    return Usuario.obtener_cacheado(user_id)
 
 # ---------------- Rutas de autenticación ----------------
 @app.route('/login', methods=['GET', 'POST'])
@@ -105,14 +160,30 @@ def logout():
 @app.route('/dashboard')
 @login_required
 def dashboard():
-    return render_template("dashboard.html", titulo="Panel de usuario", user=current_user)
+    # Rango del reporte (por defecto los últimos 30 días); solo se leen los resúmenes diarios
+    desde, hasta = rango_por_defecto()
+    desde_arg = request.args.get('desde', type=_leer_fecha)
+    hasta_arg = request.args.get('hasta', type=_leer_fecha)
+    desde = desde_arg.date() if desde_arg else desde
+    hasta = hasta_arg.date() if hasta_arg else hasta
+    if desde > hasta:
+        desde, hasta = hasta, desde
+
+    conn = conexion()
+    cur = conn.cursor(dictionary=True)
+    datos = reporte(cur, desde, hasta)
+    cerrar_conexion(conn)
+    return render_template("dashboard.html", titulo="Panel de usuario", user=current_user,
+                           desde=desde, hasta=hasta, **datos)
 
 # ---------------- Rutas públicas ----------------
 @app.route('/')
+@pagina_publica('index.html', 'base.html')
 def index():
     return render_template("index.html", titulo="Megacompu - Inicio")
 
 @app.route('/about')
+@pagina_publica('about.html', 'base.html')
 def about():
     return render_template("about.html", titulo="Acerca de Megacompu")
 
@@ -121,54 +192,31 @@ def about():
 @login_required
 def listar_productos():
     # Lee parámetros
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 3, type=int)
+    page = request.args.get('page', type=int)          # solo enlaces antiguos por número de página
+    per_page = min(max(request.args.get('per_page', 3, type=int), 1), 100)
     q = request.args.get('q', '').strip()
+    despues = request.args.get('after')
+    antes = request.args.get('before')
 
     # Conexión
     conn = conexion()
     cursor = conn.cursor(dictionary=True)
 
-    # 1) TOTAL para calcular páginas
-    if q:
-        cursor.execute("SELECT COUNT(*) AS c FROM productos WHERE nombre LIKE %s", (f'%{q}%',))
-    else:
-        cursor.execute("SELECT COUNT(*) AS c FROM productos")
-    total = cursor.fetchone()['c']
-
-    # Calcula last_page y corrige page fuera de rango
+    # 1) TOTAL cacheado (se invalida al crear/editar/eliminar)
+    total = contar_productos(cursor, q)
     last_page = max(1, ceil(total / per_page)) if total else 1
-    if page < 1:
-        page = 1
-    if page > last_page:
-        page = last_page
-
-    offset = (page - 1) * per_page
 
     # 2) Consulta paginada
-    if q:
-        cursor.execute(
-            """
-            SELECT id_producto, nombre, cantidad, precio, descripcion
-            FROM productos
-            WHERE nombre LIKE %s
-            ORDER BY nombre
-            LIMIT %s OFFSET %s
-            """,
-            (f'%{q}%', per_page, offset)
+    prev_token = next_token = None
+    if page is None:
+        # Paginación por clave (nombre, id_producto): la página N cuesta lo mismo que la 1
+        productos, prev_token, next_token = pagina_productos(
+            cursor, q, per_page, despues=despues, antes=antes
         )
     else:
-        cursor.execute(
-            """
-            SELECT id_producto, nombre, cantidad, precio, descripcion
-            FROM productos
-            ORDER BY nombre
-            LIMIT %s OFFSET %s
-            """,
-            (per_page, offset)
-        )
+        page = min(max(page, 1), last_page)
+        productos = pagina_productos_offset(cursor, q, per_page, (page - 1) * per_page)
 
-    productos = cursor.fetchall()
     cerrar_conexion(conn)
 
     # 3) Envía TODO lo que la plantilla usa
@@ -180,7 +228,9 @@ def listar_productos():
         page=page,
         per_page=per_page,
         total=total,
-        last_page=last_page
+        last_page=last_page,
+        prev_token=prev_token,
+        next_token=next_token
     )
 
 @app.route('/productos/nuevo', methods=['GET', 'POST'])
@@ -200,8 +250,7 @@ def crear_producto():
         # A) Si viene id_categoria, úsalo
         if request.form.get('id_categoria'):
             id_categoria = int(request.form['id_categoria'])
-            cur.execute("SELECT 1 FROM categorias WHERE id_categoria=%s", (id_categoria,))
-            if cur.fetchone() is None:
+            if not catalogo_categorias.existe(cur, id_categoria):
                 cerrar_conexion(conn)
                 flash('La categoría seleccionada no existe.', 'danger')
                 return redirect(url_for('crear_producto'))
@@ -215,21 +264,19 @@ def crear_producto():
                 flash('Selecciona una categoría y una marca.', 'warning')
                 return redirect(url_for('crear_producto'))
  
-            cur.execute(
-                "SELECT id_categoria FROM categorias "
-                "WHERE LOWER(nombre)=%s AND LOWER(marca)=%s LIMIT 1",
-                (categoria_nombre, marca.lower())
-            )
-            row = cur.fetchone()
-            if row:
-                id_categoria = row['id_categoria']
-            else:
+            id_categoria = catalogo_categorias.id_para(cur, categoria_nombre, marca)
+            if id_categoria is None:
                 cur2 = conn.cursor()
-                cur2.execute(
-                    "INSERT INTO categorias (nombre, marca) VALUES (%s, %s)",
-                    (categoria_nombre, marca)
-                )
-                id_categoria = cur2.lastrowid
+                try:
+                    cur2.execute(
+                        "INSERT INTO categorias (nombre, marca) VALUES (%s, %s)",
+                        (categoria_nombre, marca)
+                    )
+                    id_categoria = cur2.lastrowid
+                except IntegrityError:
+                    # Otro worker la creó al mismo tiempo (índice único nombre, marca)
+                    id_categoria = catalogo_categorias.id_para(cur, categoria_nombre, marca)
+                catalogo_categorias.invalidar()
  
         # Insertar producto con la FK resuelta
         cur2 = conn.cursor()
@@ -239,26 +286,13 @@ def crear_producto():
             (nombre, cantidad, precio, descripcion, id_categoria)
         )
         conn.commit()
+        invalidar_productos()
         cerrar_conexion(conn)
         flash('Producto creado exitosamente.', 'success')
         return redirect(url_for('listar_productos'))
  
-    # ---------- GET: opciones para los selects ----------
-    # Listas "fijas" que quieres ofrecer siempre:
-    CATS_FIJAS = ['escritorio', 'laptop', 'accesorio']
-    MARCAS_FIJAS = ['HP', 'Dell', 'Lenovo', 'Acer', 'Asus', 'Apple', 'MSI', 'Genérica']
- 
-    # Categorías presentes en BD
-    cur.execute("SELECT DISTINCT LOWER(nombre) AS nombre FROM categorias")
-    db_cats = [r['nombre'] for r in (cur.fetchall() or []) if r['nombre']]
- 
-    # Marcas presentes en BD
-    cur.execute("SELECT DISTINCT marca FROM categorias")
-    db_marcas = [r['marca'] for r in (cur.fetchall() or []) if r['marca']]
- 
-    # Unión (sin duplicados) y ordenadas
-    categorias_ui = sorted({*(c.strip().lower() for c in CATS_FIJAS), *db_cats})
-    marcas_ui = sorted({*(m.strip() for m in MARCAS_FIJAS), *db_marcas}, key=lambda s: s.lower())
+    # ---------- GET: opciones para los selects (catálogo cacheado) ----------
+    categorias_ui, marcas_ui = catalogo_categorias.opciones(cur)
  
     cerrar_conexion(conn)
     return render_template(
@@ -289,12 +323,7 @@ def editar_producto(id_producto):
         marca = request.form['marca']
 
         # Buscar ID de la categoría según nombre y marca
-        cursor.execute(
-            "SELECT id_categoria FROM categorias WHERE nombre = %s AND marca = %s",
-            (categoria_nombre, marca)
-        )
-        categoria = cursor.fetchone()
-        id_categoria = categoria['id_categoria'] if categoria else None
+        id_categoria = catalogo_categorias.id_para(cursor, categoria_nombre, marca)
 
         # Actualizar producto
         cursor.execute("""
@@ -303,6 +332,7 @@ def editar_producto(id_producto):
             WHERE id_producto=%s
         """, (nombre, cantidad, precio, descripcion, id_categoria, id_producto))
         conn.commit()
+        invalidar_productos()
 
         cerrar_conexion(conn)
         flash('Producto actualizado exitosamente.', 'success')
@@ -326,11 +356,8 @@ def editar_producto(id_producto):
             flash('Producto no encontrado.', 'warning')
             return redirect(url_for('listar_productos'))
 
-        # Cargar todas las combinaciones de categoría y marca
-        cursor.execute("SELECT nombre, marca FROM categorias")
-        filas = cursor.fetchall()
-        categorias_ui = list({f['nombre'] for f in filas})
-        marcas_ui = list({f['marca'] for f in filas})
+        # Opciones de categoría y marca (catálogo cacheado)
+        categorias_ui, marcas_ui = catalogo_categorias.opciones(cursor)
 
         cerrar_conexion(conn)
 
@@ -353,6 +380,7 @@ def eliminar_producto(id_producto):
         (id_producto,)
     )
     conn.commit()
+    invalidar_productos()
     cerrar_conexion(conn)
     flash('Producto eliminado exitosamente.')
     return redirect(url_for('listar_productos'))
@@ -362,23 +390,19 @@ def eliminar_producto(id_producto):
 @login_required
 def listar_clientes():
     q = request.args.get('q', '').strip()
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
     conn = conexion()
     cur = conn.cursor(dictionary=True)
-    if q:
-        cur.execute(
-            "SELECT id_cliente, nombre, cedula, telefono, email, direccion "
-            "FROM clientes WHERE nombre LIKE %s OR cedula LIKE %s OR email LIKE %s "
-            "ORDER BY nombre",
-            (f"%{q}%", f"%{q}%", f"%{q}%")
-        )
-    else:
-        cur.execute(
-            "SELECT id_cliente, nombre, cedula, telefono, email, direccion "
-            "FROM clientes ORDER BY nombre"
-        )
-    clientes = cur.fetchall()
+    # Cédula/email/nombre se convierten en búsqueda exacta o por prefijo sobre columnas indexadas
+    total = contar_clientes(cur, q)
+    clientes, prev_token, next_token = pagina_clientes(
+        cur, q, per_page,
+        despues=request.args.get('after'), antes=request.args.get('before')
+    )
     cerrar_conexion(conn)
-    return render_template('clients/list.html', title='Clientes', clientes=clientes, q=q)
+    return render_template('clientes/list.html', title='Clientes', clientes=clientes, q=q,
+                           per_page=per_page, total=total,
+                           prev_token=prev_token, next_token=next_token)
 
 @app.route('/clientes/nuevo', methods=['GET', 'POST'])
 @fresh_login_required
@@ -392,7 +416,7 @@ def crear_cliente():
 
         if not nombre:
             flash('El nombre es obligatorio', 'warning')
-            return render_template('clients/form.html', title='Nuevo Cliente')
+            return render_template('clientes/form.html', title='Nuevo Cliente')
 
         conn = conexion()
         cur = conn.cursor()
@@ -403,6 +427,7 @@ def crear_cliente():
                 (nombre, cedula, telefono, email, direccion)
             )
             conn.commit()
+            invalidar_clientes()
             flash('Cliente creado correctamente', 'success')
             return redirect(url_for('listar_clientes'))
         except Exception:
@@ -411,22 +436,38 @@ def crear_cliente():
         finally:
             cerrar_conexion(conn)
 
-    return render_template('clients/form.html', title='Nuevo Cliente')
+    return render_template('clientes/form.html', title='Nuevo Cliente')
 
 # ---------------- Rutas protegidas (Ventas) ----------------
+def _leer_fecha(texto):
+    # Para request.args.get(type=...): un ValueError deja el filtro en None
+    return datetime.strptime(texto, '%Y-%m-%d')
+
 @app.route('/ventas')
 @login_required
 def listar_ventas():
+    filtros = dict(
+        desde=request.args.get('desde', type=_leer_fecha),
+        hasta=request.args.get('hasta', type=_leer_fecha),
+        id_cliente=request.args.get('id_cliente', type=int),
+        estado=request.args.get('estado', '').strip().upper() or None,
+    )
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+
     conn = conexion()
     cur = conn.cursor(dictionary=True)
-    cur.execute(
-        "SELECT v.id_venta, v.fecha, v.total, v.estado, c.nombre AS cliente "
-        "FROM ventas v JOIN clientes c ON c.id_cliente = v.id_cliente "
-        "ORDER BY v.id_venta DESC"
+    ventas, prev_token, next_token = pagina_ventas(
+        cur, per_page,
+        despues=request.args.get('after'), antes=request.args.get('before'),
+        **filtros
     )
-    ventas = cur.fetchall()
     cerrar_conexion(conn)
-    return render_template('sales/list.html', title='Ventas', ventas=ventas)
+
+    # Filtros tal como vinieron, para repetirlos en los enlaces de paginación
+    args = {k: request.args[k] for k in ('desde', 'hasta', 'id_cliente', 'estado') if request.args.get(k)}
+    return render_template('ventas/list.html', title='Ventas', ventas=ventas,
+                           filtros=args, estados=ESTADOS_VENTA, per_page=per_page,
+                           prev_token=prev_token, next_token=next_token)
 
 @app.route('/ventas/nueva', methods=['GET', 'POST'])
 @fresh_login_required
@@ -435,14 +476,18 @@ def crear_venta():
     cur = conn.cursor(dictionary=True)
 
     if request.method == 'GET':
-        # Cargar clientes y productos para el formulario
-        cur.execute("SELECT id_cliente, nombre FROM clientes ORDER BY nombre")
-        clientes = cur.fetchall()
-        cur.execute("SELECT id_producto, nombre, precio, cantidad FROM productos ORDER BY nombre")
-        productos = cur.fetchall()
-        cerrar_conexion(conn)
-        return render_template('sales/form.html', title='Nueva Venta',
+        # Clientes y productos del formulario: se consultan al renderizar,
+        # y solo si su fragmento no está en cache
+        def consultar(sql):
+            cur.execute(sql)
+            return cur.fetchall()
+
+        clientes = Diferido(consultar, "SELECT id_cliente, nombre FROM clientes ORDER BY nombre")
+        productos = Diferido(consultar, "SELECT id_producto, nombre, precio, cantidad FROM productos ORDER BY nombre")
+        html = render_template('ventas/form.html', title='Nueva Venta',
                                clientes=clientes, productos=productos)
+        cerrar_conexion(conn)
+        return html
 
     # POST: procesar venta
     try:
@@ -454,13 +499,13 @@ def crear_venta():
 
     prod_ids = request.form.getlist('producto_id[]')   # ['1','2',...]
     cantidades = request.form.getlist('cantidad[]')    # ['0','3',...]
-    lineas = []
+    lineas = {}                                        # id_producto -> cantidad (líneas repetidas se suman)
     for pid, qty in zip(prod_ids, cantidades):
         try:
             pid_i = int(pid)
             qty_i = int(qty)
             if qty_i > 0:
-                lineas.append((pid_i, qty_i))
+                lineas[pid_i] = lineas.get(pid_i, 0) + qty_i
         except:
             continue
 
@@ -472,56 +517,10 @@ def crear_venta():
     try:
         conn.start_transaction()
 
-        # 1) Crear cabecera
-        cur.execute(
-            "INSERT INTO ventas (id_cliente, fecha, total, estado) "
-            "VALUES (%s, NOW(), 0, 'PENDIENTE')",
-            (id_cliente,)
-        )
-        id_venta = cur.lastrowid
-
-        total = Decimal('0.00')
-
-        # 2) Recorrer líneas, validar stock, descontar, insertar detalle
-        for pid_i, qty_i in lineas:
-            cur.execute(
-                "SELECT nombre, cantidad, precio FROM productos WHERE id_producto=%s FOR UPDATE",
-                (pid_i,)
-            )
-            row = cur.fetchone()
-            if not row:
-                raise ValueError(f"Producto {pid_i} no existe")
-
-            nombre_p = row['nombre']
-            stock = int(row['cantidad'])
-            precio = Decimal(str(row['precio']))
-
-            if qty_i > stock:
-                raise ValueError(f"Stock insuficiente para {nombre_p}")
-
-            # Descontar stock
-            cur.execute(
-                "UPDATE productos SET cantidad = cantidad - %s WHERE id_producto=%s",
-                (qty_i, pid_i)
-            )
-
-            # Insertar detalle
-            subtotal = (precio * Decimal(qty_i)).quantize(Decimal('0.01'))
-            cur.execute(
-                "INSERT INTO detalle_venta (id_venta, id_producto, cantidad, precio_unit, subtotal) "
-                "VALUES (%s, %s, %s, %s, %s)",
-                (id_venta, pid_i, qty_i, str(precio), str(subtotal))
-            )
-            total += subtotal
-
-        # 3) Cerrar cabecera COMPLETADA con total
-        total = total.quantize(Decimal('0.01'))
-        cur.execute(
-            "UPDATE ventas SET total=%s, estado='COMPLETADA' WHERE id_venta=%s",
-            (str(total), id_venta)
-        )
+        id_venta, total = registrar_venta(cur, id_cliente, lineas)
 
         conn.commit()
+        invalidar_fragmentos('productos')   # el stock mostrado cambió
         flash(f'Venta #{id_venta} creada (total ${total})', 'success')
         return redirect(url_for('listar_ventas'))
 
@@ -532,5 +531,38 @@ def crear_venta():
     finally:
         cerrar_conexion(conn)
 
+# ---------------- Carga y descarga masiva (CSV) ----------------
+@app.route('/importar/<entidad>', methods=['GET', 'POST'])
+@fresh_login_required
+def importar(entidad):
+    if entidad not in ENTIDADES:
+        abort(404)
+    resultado = None
+    if request.method == 'POST':
+        archivo = request.files.get('archivo')
+        if not archivo or not archivo.filename:
+            flash('Selecciona un archivo CSV.', 'warning')
+            return redirect(url_for('importar', entidad=entidad))
+
+        conn = conexion()
+        try:
+            resultado = importar_csv(conn, entidad, texto_subido(archivo))
+        finally:
+            cerrar_conexion(conn)
+        categoria = 'success' if not resultado['errores'] else 'warning'
+        flash(f"{resultado['insertadas']} de {resultado['leidas']} filas importadas.", categoria)
+
+    return render_template('importar.html', title=f'Importar {entidad}', entidad=entidad,
+                           resultado=resultado)
+
+@app.route('/exportar/<entidad>.csv')
+@login_required
+def exportar(entidad):
+    if entidad not in ENTIDADES:
+        abort(404)
+    # Se genera mientras se envía: nunca está todo el catálogo en memoria
+    return Response(iterar_csv(entidad), mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename={entidad}.csv'})
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
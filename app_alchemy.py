@@ -1,146 +1,219 @@
-from flask import Flask, render_template, redirect, url_for, flash, request 
+from flask import Flask, render_template, redirect, url_for, flash, request, current_app
 from datetime import datetime
-from models import db
+import os
+import click
+from flask.cli import with_appcontext
+from models.model_productos import db
 from forms import ProductoForm
-from inventory import Inventario
-from conexion.conexion import conexion, cerrar_conexion
+from inventory import CargaDiferida, Inventario
+from conexion.conexion import conexion, cerrar_conexion, init_app as init_conexion
+from conexion.medicion import init_app as init_medicion
+from plantillas import init_app as init_plantillas
+from assets import init_app as init_assets
+from consultas import (
+    contar_productos, pagina_productos, pagina_productos_offset, invalidar_productos
+)
 from flask import render_template, request, url_for, redirect, make_response
-app = Flask(__name__)
 
-# Configuración
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///inventario.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SECRET_KEY'] = 'dev-secret-key'
-db.init_app(app)
+# Arranque en tiempo constante: crear la app no toca la BD ni datos/.
+#   flask --app app_alchemy crear-tablas      # esquema (antes db.create_all() al importar)
+#   flask --app app_alchemy volcar-archivos   # copia completa de datos/ (JSON, CSV, TXT)
+# El inventario se carga en el primer uso o, con INVENTARIO_PRECARGA=fondo, en un hilo
+# apenas arranca el worker.
+CONFIG_POR_DEFECTO = {
+    'SQLALCHEMY_DATABASE_URI': 'sqlite:///inventario.db',
+    'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+    'SECRET_KEY': 'dev-secret-key',
+    'INVENTARIO_PRECARGA': os.environ.get('INVENTARIO_PRECARGA', 'uso'),   # uso | fondo
+    # Cambios hechos por otros workers: se aplican fila a fila antes de usar la cache
+    # segundos entre revisiones de productos_cambios (0: en cada petición)
+    'INVENTARIO_COHERENCIA_INTERVALO': float(os.environ.get('INVENTARIO_COHERENCIA_INTERVALO', 1.0)),
+}
 
-@app.context_processor
-def inject_now():
-    return {'now': datetime.utcnow}
 
-with app.app_context():
+def crear_app(config=None):
+    app = Flask(__name__)
+    app.config.update(CONFIG_POR_DEFECTO)
+    app.config.update(config or {})
+
+    db.init_app(app)
+    init_conexion(app)
+    init_medicion(app)   # Server-Timing y consultas lentas de las rutas que usan conexion()
+    init_plantillas(app)  # las plantillas compartidas usan {% cache %}
+    init_assets(app)      # ... y asset_url()/imagen()
+
+    carga = app.extensions['inventario'] = CargaDiferida(app)
+    if app.config['INVENTARIO_PRECARGA'] == 'fondo':
+        carga.precargar_en_fondo()
+
+    @app.context_processor
+    def inject_now():
+        return {'now': datetime.utcnow}
+
+    @app.before_request
+    def sincronizar_inventario():
+        # Sin cargar no hay nada que ponerse al día: la carga ya lee lo último
+        cargado = carga.cargado
+        if cargado is not None:
+            cargado.sincronizar_cambios(app.config['INVENTARIO_COHERENCIA_INTERVALO'])
+
+    app.cli.add_command(crear_tablas_cmd)
+    app.cli.add_command(volcar_archivos_cmd)
+    app.cli.add_command(purgar_cambios_cmd)
+    _registrar_rutas(app)
+    return app
+
+
+def inventario():
+    """Inventario en memoria de la app actual (lo carga si aún no está)."""
+    return current_app.extensions['inventario'].obtener()
+
+
+@click.command('crear-tablas')
+@with_appcontext
+def crear_tablas_cmd():
+    """Crea las tablas de SQLAlchemy que falten (productos, productos_cambios)."""
     db.create_all()
-    inventario = Inventario.cargar_desde_bd()
-
-# --- Rutas ---
-@app.route('/')
-def index():
-    return render_template("index.html", titulo="Megacompu - Inicio")
-
-@app.route('/about')
-def about():
-    return render_template("about.html", titulo="Acerca de Megacompu")
-
-@app.route('/productos')
-def listar_productos():
-    q = request.args.get('q', '').strip()
- 
-    # página actual (>=1)
-    try:
-        page = int(request.args.get('page', 1))
-    except (TypeError, ValueError):
-        page = 1
-    if page < 1:
-        page = 1
- 
-    PER_PAGE = 3
- 
-    conn = None
-    total = 0
-    productos = []
- 
-    try:
-        conn = conexion()
-        cursor = conn.cursor(dictionary=True)
- 
-        # 1) total con mismo filtro de búsqueda
-        if q:
-            cursor.execute("SELECT COUNT(*) AS total FROM productos WHERE nombre LIKE %s", (f"%{q}%",))
-        else:
-            cursor.execute("SELECT COUNT(*) AS total FROM productos")
-        row = cursor.fetchone() or {}
-        total = int(row.get("total", 0))
- 
-        # 2) páginas y corrección si se pasa
-        last_page = max(1, (total + PER_PAGE - 1) // PER_PAGE)
-        if page > last_page:
-            return redirect(url_for('listar_productos', page=last_page, q=q))
- 
-        offset = (page - 1) * PER_PAGE
- 
-        # 3) lista paginada (orden estable)
-        base_sql = (
-            "SELECT id_producto, nombre, cantidad, precio, descripcion "
-            "FROM productos "
-        )
-        where = "WHERE nombre LIKE %s " if q else ""
-        order = "ORDER BY id_producto ASC "
-        limit = f"LIMIT {int(PER_PAGE)} OFFSET {int(offset)}"
-        sql = base_sql + where + order + limit
- 
-        if q:
-            cursor.execute(sql, (f"%{q}%",))
-        else:
-            cursor.execute(sql)
- 
-        productos = cursor.fetchall() or []
- 
-    finally:
-        try:
-            cerrar_conexion(conn)
-        except Exception:
-            pass
- 
-    # LOG de depuración: verifica en consola que "enviados" sea 3
-    print(f"[/productos] q='{q}' page={page}/{last_page} total={total} enviados={len(productos)}")
- 
-    # Desactivar caché del navegador para esta página
-    resp = make_response(render_template(
-        "products/list.html",
-        title="Productos",
-        productos=productos,
-        q=q,
-        page=page,
-        last_page=last_page,
-        per_page=PER_PAGE,
-        total=total,
-    ))
-    resp.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
-    resp.headers['Pragma'] = 'no-cache'
-    return resp
-@app.route('/productos/nuevo', methods=['GET', 'POST'])
-def crear_producto():
-    form = ProductoForm()
-    if form.validate_on_submit():
+    click.echo("Tablas creadas.")
+
+
+@click.command('volcar-archivos')
+@with_appcontext
+def volcar_archivos_cmd():
+    """Escribe ahora la copia completa del inventario en datos/."""
+    inv = inventario()
+    inv.sync.pedir_snapshot()
+    inv.sync.vaciar()
+    click.echo(f"{len(inv.productos)} productos escritos en datos/.")
+
+
+@click.command('purgar-cambios')
+@click.option('--mantener', type=int, default=None,
+              help='Filas de productos_cambios que se conservan.')
+@with_appcontext
+def purgar_cambios_cmd(mantener):
+    """Recorta la bitácora productos_cambios (también se hace sola al crecer)."""
+    borrados = Inventario.purgar_cambios(mantener)
+    click.echo(f"{borrados} cambios purgados.")
+
+
+def _registrar_rutas(app):
+    @app.route('/')
+    def index():
+        return render_template("index.html", titulo="Megacompu - Inicio")
+
+    @app.route('/about')
+    def about():
+        return render_template("about.html", titulo="Acerca de Megacompu")
+
+    @app.route('/productos')
+    def listar_productos():
+        q = request.args.get('q', '').strip()
+        despues = request.args.get('after')
+        antes = request.args.get('before')
+
+        # página actual (solo si llega por número de página; si no, paginación por clave)
         try:
-            inventario.agregar(form.nombre.data, form.cantidad.data, form.precio.data)
-            flash('Producto agregado correctamente.', 'success')
-            return redirect(url_for('listar_productos'))
-        except ValueError as e:
-            form.nombre.errors.append(str(e))
-    return render_template('products/form.html', title='Nuevo producto', form=form, modo='crear')
-
-@app.route('/productos/<int:pid>/editar', methods=['GET', 'POST'])
-def editar_producto(pid):
-    prod = inventario.productos.get(pid)  # usamos cache de inventario
-    if not prod:
-        flash("Producto no encontrado", "warning")
-        return redirect(url_for("listar_productos"))
-
-    form = ProductoForm(obj=prod)
-    if form.validate_on_submit():
+            page = int(request.args['page']) if 'page' in request.args else None
+        except (TypeError, ValueError):
+            page = 1
+        if page is not None and page < 1:
+            page = 1
+
+        PER_PAGE = 3
+
+        conn = None
+        total = 0
+        productos = []
+        prev_token = next_token = None
+
         try:
-            inventario.actualizar(pid, form.nombre.data, form.cantidad.data, form.precio.data)
-            flash('Producto actualizado.', 'success')
-            return redirect(url_for('listar_productos'))
-        except ValueError as e:
-            form.nombre.errors.append(str(e))
-    return render_template('products/form.html', title='Editar producto', form=form, modo='editar')
-
-@app.route('/productos/<int:pid>/eliminar', methods=['POST'])
-def eliminar_producto(pid):
-    ok = inventario.eliminar(pid)
-    flash('Producto eliminado.' if ok else 'Producto no encontrado.', 'info' if ok else 'warning')
-    return redirect(url_for('listar_productos'))
+            conn = conexion()
+            cursor = conn.cursor(dictionary=True)
+
+            # 1) total cacheado con mismo filtro de búsqueda
+            total = contar_productos(cursor, q)
+
+            # 2) páginas y corrección si se pasa
+            last_page = max(1, (total + PER_PAGE - 1) // PER_PAGE)
+            if page is not None and page > last_page:
+                return redirect(url_for('listar_productos', page=last_page, q=q))
+
+            # 3) lista paginada (orden estable por nombre, id_producto)
+            if page is None:
+                productos, prev_token, next_token = pagina_productos(
+                    cursor, q, PER_PAGE, despues=despues, antes=antes
+                )
+            else:
+                productos = pagina_productos_offset(cursor, q, PER_PAGE, (page - 1) * PER_PAGE)
+
+        finally:
+            try:
+                cerrar_conexion(conn)
+            except Exception:
+                pass
+
+        # Depuración (nivel DEBUG): verifica que "enviados" sea 3; los tiempos van en Server-Timing
+        app.logger.debug("[/productos] q='%s' page=%s/%s total=%s enviados=%s",
+                         q, page, last_page, total, len(productos))
+
+        # Desactivar caché del navegador para esta página
+        resp = make_response(render_template(
+            "products/list.html",
+            title="Productos",
+            productos=productos,
+            q=q,
+            page=page,
+            last_page=last_page,
+            per_page=PER_PAGE,
+            total=total,
+            prev_token=prev_token,
+            next_token=next_token,
+        ))
+        resp.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
+        resp.headers['Pragma'] = 'no-cache'
+        return resp
+    @app.route('/productos/nuevo', methods=['GET', 'POST'])
+    def crear_producto():
+        form = ProductoForm()
+        if form.validate_on_submit():
+            try:
+                inventario().agregar(form.nombre.data, form.cantidad.data, form.precio.data)
+                invalidar_productos()
+                flash('Producto agregado correctamente.', 'success')
+                return redirect(url_for('listar_productos'))
+            except ValueError as e:
+                form.nombre.errors.append(str(e))
+        return render_template('products/form.html', title='Nuevo producto', form=form, modo='crear')
+
+    @app.route('/productos/<int:pid>/editar', methods=['GET', 'POST'])
+    def editar_producto(pid):
+        prod = inventario().productos.get(pid)  # usamos cache de inventario
+        if not prod:
+            flash("Producto no encontrado", "warning")
+            return redirect(url_for("listar_productos"))
+
+        form = ProductoForm(obj=prod)
+        if form.validate_on_submit():
+            try:
+                inventario().actualizar(pid, form.nombre.data, form.cantidad.data, form.precio.data)
+                invalidar_productos()
+                flash('Producto actualizado.', 'success')
+                return redirect(url_for('listar_productos'))
+            except ValueError as e:
+                form.nombre.errors.append(str(e))
+        return render_template('products/form.html', title='Editar producto', form=form, modo='editar')
+
+    @app.route('/productos/<int:pid>/eliminar', methods=['POST'])
+    def eliminar_producto(pid):
+        ok = inventario().eliminar(pid)
+        if ok:
+            invalidar_productos()
+        flash('Producto eliminado.' if ok else 'Producto no encontrado.', 'info' if ok else 'warning')
+        return redirect(url_for('listar_productos'))
+
+
+app = crear_app()
 
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
@@ -0,0 +1,209 @@
+# assets.py
+# Compilación de estáticos (paso offline, antes de desplegar):
+#   python assets.py
+# - Imágenes de static/img: variantes por ancho en el formato original y en WebP.
+# - CSS: copia con hash en el nombre y versiones .gz / .br precomprimidas.
+# - static/build/manifest.json: ruta original -> archivos generados.
+# En la app, asset_url() e imagen() leen el manifiesto; sin él sirven el original.
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import shutil
+
+from flask import current_app, request, send_from_directory, url_for
+from markupsafe import Markup, escape
+
+try:
+    from PIL import Image
+except ImportError:   # opcional: sin Pillow solo se procesa el CSS
+    Image = None
+
+try:
+    import brotli
+except ImportError:   # opcional: sin brotli solo se genera .gz
+    brotli = None
+
+BASE_DIR = os.path.dirname(__file__)
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+BUILD_DIR = os.path.join(STATIC_DIR, 'build')
+MANIFEST_PATH = os.path.join(BUILD_DIR, 'manifest.json')
+
+ANCHOS = (320, 640, 960, 1280)
+CALIDAD = 80
+EXT_IMAGEN = ('.jpg', '.jpeg', '.png')
+EXT_COMPRIMIR = ('.css', '.js', '.svg')
+
+
+# ---------------- Compilación ----------------
+
+def _hash_corto(datos: bytes) -> str:
+    return hashlib.md5(datos).hexdigest()[:10]
+
+
+def _escribir_con_hash(rel_destino, datos: bytes) -> str:
+    """Guarda build/<dir>/<nombre>.<hash><ext> y devuelve su ruta relativa a static/."""
+    base, ext = os.path.splitext(rel_destino)
+    rel = f"build/{base}.{_hash_corto(datos)}{ext}"
+    ruta = os.path.join(STATIC_DIR, rel)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(ruta, 'wb') as f:
+        f.write(datos)
+    return rel
+
+
+def _codificar(img, formato):
+    buf = io.BytesIO()
+    if formato == 'JPEG':
+        img.convert('RGB').save(buf, 'JPEG', quality=CALIDAD, optimize=True, progressive=True)
+    elif formato == 'PNG':
+        img.save(buf, 'PNG', optimize=True)
+    else:
+        img.save(buf, formato, quality=CALIDAD, method=6)
+    return buf.getvalue()
+
+
+def compilar_imagen(rel):
+    with Image.open(os.path.join(STATIC_DIR, rel)) as original:
+        original.load()
+    formato = 'PNG' if rel.lower().endswith('.png') else 'JPEG'
+    base, ext = os.path.splitext(rel)
+
+    variantes = []
+    anchos = [a for a in ANCHOS if a < original.width] + [original.width]
+    for ancho in anchos:
+        alto = round(original.height * ancho / original.width)
+        img = original if ancho == original.width else original.resize((ancho, alto), Image.LANCZOS)
+        variantes.append({
+            'ancho': ancho,
+            'alto': alto,
+            'original': _escribir_con_hash(f"{base}-{ancho}{ext}", _codificar(img, formato)),
+            'webp': _escribir_con_hash(f"{base}-{ancho}.webp", _codificar(img, 'WEBP')),
+        })
+    return {'src': variantes[-1]['original'], 'ancho': original.width,
+            'alto': original.height, 'variantes': variantes}
+
+
+def compilar_texto(rel):
+    with open(os.path.join(STATIC_DIR, rel), 'rb') as f:
+        datos = f.read()
+    destino = _escribir_con_hash(rel, datos)
+    ruta = os.path.join(STATIC_DIR, destino)
+    entrada = {'src': destino}
+    with open(ruta + '.gz', 'wb') as f:
+        f.write(gzip.compress(datos, compresslevel=9, mtime=0))
+    entrada['gzip'] = destino + '.gz'
+    if brotli is not None:
+        with open(ruta + '.br', 'wb') as f:
+            f.write(brotli.compress(datos, quality=11))
+        entrada['br'] = destino + '.br'
+    return entrada
+
+
+def compilar():
+    if os.path.isdir(BUILD_DIR):
+        shutil.rmtree(BUILD_DIR)
+    manifiesto = {}
+    for raiz, _, archivos in os.walk(STATIC_DIR):
+        for nombre in sorted(archivos):
+            rel = os.path.relpath(os.path.join(raiz, nombre), STATIC_DIR).replace(os.sep, '/')
+            ext = os.path.splitext(nombre)[1].lower()
+            if ext in EXT_IMAGEN:
+                if Image is None:
+                    print(f"(sin Pillow) se omite {rel}")
+                    continue
+                manifiesto[rel] = compilar_imagen(rel)
+            elif ext in EXT_COMPRIMIR:
+                manifiesto[rel] = compilar_texto(rel)
+            else:
+                continue
+            print(f"{rel} -> {manifiesto[rel]['src']}")
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=2, sort_keys=True)
+    return manifiesto
+
+
+# ---------------- Uso desde la app ----------------
+
+_manifiesto = None
+_precomprimidos = {}   # ruta en build/ -> {'br': ..., 'gzip': ...}
+
+
+def cargar_manifiesto():
+    global _manifiesto, _precomprimidos
+    try:
+        with open(MANIFEST_PATH, encoding='utf-8') as f:
+            _manifiesto = json.load(f)
+    except FileNotFoundError:
+        _manifiesto = {}
+    _precomprimidos = {
+        e['src']: {k: e[k] for k in ('br', 'gzip') if k in e}
+        for e in _manifiesto.values() if 'gzip' in e or 'br' in e
+    }
+    return _manifiesto
+
+
+def init_app(app):
+    cargar_manifiesto()
+    app.add_template_global(asset_url)
+    app.add_template_global(imagen)
+    app.view_functions['static'] = _servir_precomprimido(app.view_functions['static'])
+
+
+def asset_url(filename):
+    """URL del archivo compilado (nombre con hash) o, si no hay build, del original."""
+    entrada = _manifiesto.get(filename) if _manifiesto else None
+    return url_for('static', filename=entrada['src'] if entrada else filename)
+
+
+def imagen(filename, alt, sizes='100vw', clase=None, **attrs):
+    """
+    <picture> con srcset WebP + formato original a partir del manifiesto.
+    Sin build devuelve un <img> normal. Atributos extra (width, height, loading...) se copian.
+    """
+    entrada = _manifiesto.get(filename) if _manifiesto else None
+    attrs.setdefault('loading', 'lazy')
+    extra = ''.join(f' {escape(k)}="{escape(v)}"' for k, v in attrs.items())
+    if clase:
+        extra = f' class="{escape(clase)}"' + extra
+    if not entrada or 'variantes' not in entrada:
+        return Markup(f'<img src="{escape(url_for("static", filename=filename))}" alt="{escape(alt)}"{extra}>')
+
+    def srcset(clave):
+        return ', '.join(f"{url_for('static', filename=v[clave])} {v['ancho']}w" for v in entrada['variantes'])
+
+    return Markup(
+        '<picture>'
+        f'<source type="image/webp" srcset="{escape(srcset("webp"))}" sizes="{escape(sizes)}">'
+        f'<img src="{escape(url_for("static", filename=entrada["src"]))}" '
+        f'srcset="{escape(srcset("original"))}" sizes="{escape(sizes)}" '
+        f'alt="{escape(alt)}"{extra}>'
+        '</picture>'
+    )
+
+
+def _servir_precomprimido(vista):
+    """Envuelve la vista 'static': entrega .br/.gz ya generados si el cliente los acepta."""
+    def static(filename):
+        opciones = _precomprimidos.get(filename)
+        if opciones:
+            for codificacion in ('br', 'gzip'):
+                if codificacion in opciones and request.accept_encodings[codificacion]:
+                    tipo = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+                    resp = send_from_directory(current_app.static_folder, opciones[codificacion],
+                                               mimetype=tipo)
+                    resp.headers['Content-Encoding'] = codificacion
+                    resp.vary.add('Accept-Encoding')
+                    return resp
+        resp = vista(filename=filename)
+        if opciones:
+            resp.vary.add('Accept-Encoding')
+        return resp
+    return static
+
+
+if __name__ == '__main__':
+    compilar()
@@ -0,0 +1,9 @@
+# benchmark
+# Mediciones reproducibles de la app. Desde la raíz del proyecto:
+#   python -m benchmark todo                      # datos + micro + carga sobre una BD SQLite temporal
+#   python -m benchmark datos --bd bench.db --escala 2
+#   python -m benchmark micro --productos 50000
+#   python -m benchmark carga --bd bench.db --hilos 8 --duracion 20
+#   python -m benchmark carga --url http://127.0.0.1:8000 --escenarios productos,productos_q
+#   python -m benchmark comparar benchmark/resultados/a.json benchmark/resultados/b.json
+# Cada corrida deja un JSON en benchmark/resultados/ con el commit y la máquina.
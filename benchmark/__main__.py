@@ -0,0 +1,120 @@
+# benchmark/__main__.py
+# python -m benchmark {datos|micro|carga|todo|comparar} ... (ver benchmark/__init__.py)
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from . import bd_local, carga, datos, micro, resultados
+
+
+def _conexion(args):
+    """Conexión para generar datos: SQLite local (--bd) o la MySQL de conexion()."""
+    if args.bd:
+        return bd_local.crear(args.bd)
+    from conexion.conexion import obtener_pool
+    return obtener_pool().obtener()
+
+
+def cmd_datos(args):
+    conn = _conexion(args)
+    filas = datos.generar(conn, escala=args.escala, semilla=args.semilla, dias=args.dias)
+    print(json.dumps(filas, indent=2))
+    return {'datos': filas}
+
+
+def cmd_micro(args):
+    return {'micro': micro.ejecutar(args.productos, args.repeticiones, args.semilla)}
+
+
+def _app(bd, hilos):
+    if bd:
+        bd_local.usar_en_app(bd, tamano=hilos + 2)
+    from app import app
+    app.config['TESTING'] = True
+    return app
+
+
+def cmd_carga(args):
+    escenarios = [e.strip() for e in args.escenarios.split(',') if e.strip()]
+    app = None if args.url else _app(args.bd, args.hilos)
+    return {'carga': carga.ejecutar(escenarios, url=args.url, app=app, hilos=args.hilos,
+                                    duracion=args.duracion, escala=args.escala, semilla=args.semilla)}
+
+
+def cmd_todo(args):
+    with tempfile.TemporaryDirectory() as directorio:
+        args.bd = os.path.join(directorio, 'bench.db')
+        resultado = cmd_datos(args)
+        resultado.update(cmd_micro(args))
+        resultado.update(cmd_carga(args))
+    return resultado
+
+
+def cmd_comparar(args):
+    for linea in resultados.comparar(args.a, args.b, args.umbral):
+        print(linea)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmark')
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    def comunes(p, bd=True):
+        p.add_argument('--escala', type=float, default=1.0, help='multiplica las filas generadas')
+        p.add_argument('--semilla', type=int, default=42)
+        p.add_argument('--salida', help='archivo JSON (por defecto benchmark/resultados/...)')
+        if bd:
+            p.add_argument('--bd', help='archivo SQLite local en lugar de MySQL')
+
+    p = sub.add_parser('datos', help='genera datos sintéticos (sobre una base vacía)')
+    comunes(p)
+    p.add_argument('--dias', type=int, default=365, help='días de historial de ventas')
+    p.set_defaults(funcion=cmd_datos)
+
+    p = sub.add_parser('micro', help='micro-benchmarks en memoria y de archivos')
+    comunes(p, bd=False)
+    p.add_argument('--productos', type=int, default=10000)
+    p.add_argument('--repeticiones', type=int, default=2000)
+    p.set_defaults(funcion=cmd_micro)
+
+    def opciones_carga(p):
+        p.add_argument('--url', help='servidor a medir (p. ej. gunicorn local); sin esto, en proceso')
+        p.add_argument('--escenarios', default=','.join(carga.ESCENARIOS))
+        p.add_argument('--hilos', type=int, default=4)
+        p.add_argument('--duracion', type=float, default=10.0, help='segundos por escenario')
+
+    p = sub.add_parser('carga', help='carga HTTP con varios hilos')
+    comunes(p)
+    opciones_carga(p)
+    p.set_defaults(funcion=cmd_carga)
+
+    p = sub.add_parser('todo', help='datos + micro + carga sobre una BD SQLite temporal')
+    comunes(p, bd=False)
+    opciones_carga(p)
+    p.add_argument('--dias', type=int, default=365)
+    p.add_argument('--productos', type=int, default=10000)
+    p.add_argument('--repeticiones', type=int, default=2000)
+    p.set_defaults(funcion=cmd_todo, url=None)
+
+    p = sub.add_parser('comparar', help='compara dos resultados JSON')
+    p.add_argument('a')
+    p.add_argument('b')
+    p.add_argument('--umbral', type=float, default=0.10, help='empeoramiento que se marca (0.10 = 10 %%)')
+    p.set_defaults(funcion=cmd_comparar)
+
+    args = parser.parse_args(argv)
+    resultado = args.funcion(args)
+    if resultado is None:
+        return 0
+
+    resultado['meta'] = resultados.metadatos(comando=args.comando, escala=args.escala,
+                                             semilla=args.semilla, argumentos=sys.argv[1:])
+    print(json.dumps({k: v for k, v in resultado.items() if k != 'meta'}, indent=2, ensure_ascii=False))
+    print(f"Resultados en {resultados.guardar(resultado, args.salida)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,17 @@
+# benchmark/bd_local.py
+# Base de datos local para medir sin servidor MySQL: el motor SQLite de la app
+# (conexion/sqlite.py, DB_MOTOR=sqlite) sobre un archivo temporal o el de --bd.
+from conexion import conexion as modulo
+from conexion import sqlite
+
+
+def crear(ruta):
+    """Crea (o completa) el esquema en `ruta` y devuelve una conexión."""
+    return sqlite.abrir(ruta)
+
+
+def usar_en_app(ruta, tamano=8):
+    """Hace que conexion() de la app preste conexiones a `ruta` en lugar de MySQL."""
+    modulo.POOL_CONFIG.update(DB_MOTOR='sqlite', DB_SQLITE_RUTA=ruta,
+                              DB_POOL_SIZE=tamano, DB_POOL_TIMEOUT=30)
+    modulo.cerrar_pool()
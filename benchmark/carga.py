@@ -0,0 +1,156 @@
+# benchmark/carga.py
+# Generador de carga HTTP con varios hilos, contra el cliente de pruebas de Flask
+# (en proceso) o contra un servidor real (gunicorn local) por URL.
+import http.cookiejar
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from .datos import POR_ESCALA, PASSWORD, email_usuario, palabras_busqueda
+
+ESCENARIOS = ('productos', 'productos_q', 'venta', 'login')
+
+
+class ClienteFlask:
+    """Un cliente de pruebas por hilo (guarda su propia cookie de sesión)."""
+
+    def __init__(self, app):
+        self._c = app.test_client()
+
+    def get(self, ruta):
+        r = self._c.get(ruta)
+        return r.status_code, r.headers.get('Location', '')
+
+    def post(self, ruta, datos):
+        r = self._c.post(ruta, data=datos)
+        return r.status_code, r.headers.get('Location', '')
+
+
+class _SinRedirecciones(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class ClienteHTTP:
+    def __init__(self, base):
+        self._base = base.rstrip('/')
+        self._opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _SinRedirecciones)
+
+    def _pedir(self, peticion):
+        try:
+            with self._opener.open(peticion, timeout=30) as r:
+                r.read()
+                return r.status, r.headers.get('Location', '')
+        except urllib.error.HTTPError as e:   # 3xx sin seguir y 4xx/5xx
+            return e.code, e.headers.get('Location', '')
+
+    def get(self, ruta):
+        return self._pedir(self._base + ruta)
+
+    def post(self, ruta, datos):
+        cuerpo = urllib.parse.urlencode(datos, doseq=True).encode()
+        return self._pedir(urllib.request.Request(self._base + ruta, data=cuerpo))
+
+
+def _iniciar_sesion(cliente, i):
+    status, destino = cliente.post('/login', {'email': email_usuario(i), 'password': PASSWORD})
+    return status == 302 and '/login' not in destino
+
+
+def _peticion(escenario, cliente, rnd, hilo, terminos, escala):
+    """Hace una petición del escenario y dice si salió bien."""
+    if escenario == 'productos':
+        status, _ = cliente.get('/productos')
+        return status == 200
+    if escenario == 'productos_q':
+        status, _ = cliente.get('/productos?' + urllib.parse.urlencode({'q': rnd.choice(terminos)}))
+        return status == 200
+    if escenario == 'venta':
+        n_productos = int(POR_ESCALA['productos'] * escala)
+        ids = rnd.sample(range(1, n_productos + 1), k=min(n_productos, rnd.randint(1, 3)))
+        status, destino = cliente.post('/ventas/nueva', {
+            'id_cliente': rnd.randint(1, int(POR_ESCALA['clientes'] * escala)),
+            'producto_id[]': ids,
+            'cantidad[]': [1] * len(ids),
+        })
+        # Éxito: vuelve al listado; error: vuelve al formulario
+        return status == 302 and not destino.endswith('/ventas/nueva')
+    if escenario == 'login':
+        return _iniciar_sesion(cliente, hilo)
+    raise ValueError(f"escenario desconocido: {escenario}")
+
+
+def _percentil(valores, p):
+    if not valores:
+        return None
+    return round(valores[min(len(valores) - 1, int(len(valores) * p))] * 1000, 3)
+
+
+def ejecutar_escenario(escenario, crear_cliente, hilos=4, duracion=10.0, escala=1.0, semilla=42):
+    """
+    `hilos` hilos repiten el escenario durante `duracion` segundos.
+    Cada hilo inicia sesión antes de empezar a medir (excepto en 'login').
+    """
+    terminos = palabras_busqueda(semilla)
+    n_usuarios = max(1, int(POR_ESCALA['usuarios'] * escala))
+    tiempos, errores = [], [0]
+    lock = threading.Lock()
+    fin = [0.0]
+    # Cuando todos iniciaron sesión se fija el final y arrancan a la vez
+    listos = threading.Barrier(hilos + 1, action=lambda: fin.__setitem__(0, time.perf_counter() + duracion))
+
+    def trabajador(hilo):
+        cliente = crear_cliente()
+        rnd = random.Random(semilla + hilo)
+        if escenario != 'login':
+            _iniciar_sesion(cliente, hilo % n_usuarios)
+        listos.wait()
+        propios, fallos = [], 0
+        while time.perf_counter() < fin[0]:
+            t0 = time.perf_counter()
+            try:
+                ok = _peticion(escenario, cliente, rnd, hilo % n_usuarios, terminos, escala)
+            except Exception:
+                ok = False
+            propios.append(time.perf_counter() - t0)
+            fallos += not ok
+        with lock:
+            tiempos.extend(propios)
+            errores[0] += fallos
+
+    threads = [threading.Thread(target=trabajador, args=(h,), daemon=True) for h in range(hilos)]
+    for t in threads:
+        t.start()
+    listos.wait()
+    inicio = fin[0] - duracion
+    for t in threads:
+        t.join()
+    transcurrido = time.perf_counter() - inicio
+
+    tiempos.sort()
+    return {
+        'hilos': hilos,
+        'duracion_s': round(transcurrido, 3),
+        'peticiones': len(tiempos),
+        'errores': errores[0],
+        'rps': round(len(tiempos) / transcurrido, 2) if transcurrido else 0.0,
+        'p50_ms': _percentil(tiempos, 0.50),
+        'p95_ms': _percentil(tiempos, 0.95),
+        'p99_ms': _percentil(tiempos, 0.99),
+        'max_ms': round(tiempos[-1] * 1000, 3) if tiempos else None,
+    }
+
+
+def ejecutar(escenarios=ESCENARIOS, url=None, app=None, **opciones):
+    """Corre cada escenario contra `url` (servidor real) o `app` (cliente de pruebas)."""
+    if url:
+        def crear_cliente():
+            return ClienteHTTP(url)
+    else:
+        def crear_cliente():
+            return ClienteFlask(app)
+    return {e: ejecutar_escenario(e, crear_cliente, **opciones) for e in escenarios}
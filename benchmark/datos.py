@@ -0,0 +1,118 @@
+# benchmark/datos.py
+# Datos sintéticos reproducibles (misma semilla -> mismos datos) a escala configurable.
+# Funciona con cualquier conexión estilo mysql.connector: la de conexion() o bd_local.
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from werkzeug.security import generate_password_hash
+
+from consultas import CATS_FIJAS, MARCAS_FIJAS
+from resumenes import reconstruir
+from seguridad import METODO_HASH, SALT_LENGTH
+
+# Filas por unidad de escala
+POR_ESCALA = {'productos': 1000, 'clientes': 500, 'ventas': 2000, 'usuarios': 10}
+
+PASSWORD = 'bench-123'   # contraseña de todos los usuarios generados
+LOTE = 1000
+
+_ADJETIVOS = ['Pro', 'Air', 'Max', 'Mini', 'Ultra', 'Plus', 'Slim', 'Gamer', 'Office', 'Lite']
+_TIPOS = {
+    'escritorio': ['Torre', 'All-in-One', 'Mini PC', 'Workstation'],
+    'laptop': ['Notebook', 'Ultrabook', 'Portátil', 'Convertible'],
+    'accesorio': ['Mouse', 'Teclado', 'Monitor', 'Audífonos', 'Cámara', 'Parlante'],
+}
+_NOMBRES = ['Ana', 'Carlos', 'María', 'José', 'Lucía', 'Andrés', 'Sofía', 'Diego', 'Valeria', 'Jorge']
+_APELLIDOS = ['López', 'Pérez', 'Torres', 'Gómez', 'Ramírez', 'Castro', 'Vega', 'Mora', 'Ruiz', 'Silva']
+
+
+def _en_lotes(cursor, sql, filas):
+    for i in range(0, len(filas), LOTE):
+        cursor.executemany(sql, filas[i:i + LOTE])
+
+
+def _ids(cursor, tabla, columna):
+    cursor.execute(f"SELECT {columna} FROM {tabla} ORDER BY {columna}")
+    return [f[0] for f in cursor.fetchall()]
+
+
+def generar(conn, escala=1.0, semilla=42, dias=365, hash_password=None):
+    """
+    Inserta categorías, productos, clientes, usuarios y ventas (con detalle y resúmenes).
+    Devuelve {tabla: filas insertadas}. `hash_password` permite reutilizar un hash ya
+    calculado (PBKDF2 es lento a propósito).
+    """
+    rnd = random.Random(semilla)
+    n = {k: max(1, int(v * escala)) for k, v in POR_ESCALA.items()}
+    cur = conn.cursor()
+
+    # Categorías: todas las combinaciones de los formularios
+    pares = [(c, m) for c in CATS_FIJAS for m in MARCAS_FIJAS]
+    _en_lotes(cur, "INSERT INTO categorias (nombre, marca) VALUES (%s, %s)", pares)
+    cur.execute("SELECT id_categoria, nombre FROM categorias")
+    categorias = cur.fetchall()
+
+    productos = []
+    for i in range(n['productos']):
+        id_categoria, categoria = rnd.choice(categorias)
+        nombre = f"{rnd.choice(_TIPOS.get(categoria, ['Equipo']))} {rnd.choice(_ADJETIVOS)} {i:06d}"
+        productos.append((nombre, rnd.randint(50, 5000), str(Decimal(rnd.randint(500, 250000)) / 100),
+                          f"Producto de prueba {i}", id_categoria))
+    _en_lotes(cur, "INSERT INTO productos (nombre, cantidad, precio, descripcion, id_categoria) "
+                   "VALUES (%s, %s, %s, %s, %s)", productos)
+
+    clientes = []
+    for i in range(n['clientes']):
+        nombre = f"{rnd.choice(_NOMBRES)} {rnd.choice(_APELLIDOS)} {i}"
+        clientes.append((nombre, f"{1700000000 + i:010d}", f"09{rnd.randint(10000000, 99999999)}",
+                         f"cliente{i}@ejemplo.com", f"Calle {rnd.randint(1, 999)}"))
+    _en_lotes(cur, "INSERT INTO clientes (nombre, cedula, telefono, email, direccion) "
+                   "VALUES (%s, %s, %s, %s, %s)", clientes)
+
+    hash_password = hash_password or generate_password_hash(
+        PASSWORD, method=METODO_HASH, salt_length=SALT_LENGTH)
+    usuarios = [(f"Usuario {i}", email_usuario(i), hash_password) for i in range(n['usuarios'])]
+    _en_lotes(cur, "INSERT INTO usuarios (nombre, email, password) VALUES (%s, %s, %s)", usuarios)
+
+    ids_producto = _ids(cur, 'productos', 'id_producto')
+    ids_cliente = _ids(cur, 'clientes', 'id_cliente')
+    cur.execute("SELECT id_producto, precio FROM productos")
+    precios = {pid: Decimal(str(p)) for pid, p in cur.fetchall()}
+
+    # Ventas históricas repartidas en los últimos `dias` días (sin tocar el stock)
+    inicio = datetime.now().replace(microsecond=0) - timedelta(days=dias)
+    cur.execute("SELECT COALESCE(MAX(id_venta), 0) FROM ventas")
+    siguiente = cur.fetchone()[0] + 1
+    cabeceras, detalle = [], []
+    for id_venta in range(siguiente, siguiente + n['ventas']):
+        lineas = rnd.sample(ids_producto, k=min(len(ids_producto), rnd.randint(1, 4)))
+        total = Decimal('0.00')
+        for pid in lineas:
+            qty = rnd.randint(1, 3)
+            subtotal = precios[pid] * qty
+            total += subtotal
+            detalle.append((id_venta, pid, qty, str(precios[pid]), str(subtotal)))
+        fecha = inicio + timedelta(seconds=rnd.randint(0, dias * 86400))
+        cabeceras.append((id_venta, rnd.choice(ids_cliente), fecha, str(total), 'COMPLETADA'))
+    _en_lotes(cur, "INSERT INTO ventas (id_venta, id_cliente, fecha, total, estado) "
+                   "VALUES (%s, %s, %s, %s, %s)", cabeceras)
+    _en_lotes(cur, "INSERT INTO detalle_venta (id_venta, id_producto, cantidad, precio_unit, subtotal) "
+                   "VALUES (%s, %s, %s, %s, %s)", detalle)
+
+    reconstruir(cur)
+    conn.commit()
+    return {'categorias': len(pares), 'productos': len(productos), 'clientes': len(clientes),
+            'usuarios': len(usuarios), 'ventas': len(cabeceras), 'detalle_venta': len(detalle)}
+
+
+def email_usuario(i):
+    return f"bench{i}@ejemplo.com"
+
+
+def palabras_busqueda(semilla=42, n=50):
+    """Términos para /productos?q= con la misma distribución que los nombres generados."""
+    rnd = random.Random(semilla)
+    tipos = [t for lista in _TIPOS.values() for t in lista]
+    return [rnd.choice([rnd.choice(tipos), rnd.choice(_ADJETIVOS), rnd.choice(tipos)[:3]])
+            for _ in range(n)]
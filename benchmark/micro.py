@@ -0,0 +1,133 @@
+# benchmark/micro.py
+# Micro-benchmarks en proceso, sin BD: estructuras de Inventario, búsqueda en memoria
+# y escritura de los archivos de datos/.
+import random
+import statistics
+import tempfile
+import time
+
+from busqueda import IndiceNombres
+from utils import SnapshotBinario, guardar_productos_multi
+
+from .datos import palabras_busqueda
+
+
+def medir(funcion, repeticiones, calentamiento=None):
+    """Llama `funcion(i)` `repeticiones` veces y devuelve tiempos por llamada en µs."""
+    for i in range(calentamiento if calentamiento is not None else min(repeticiones, 100)):
+        funcion(i)
+    tiempos = []
+    reloj = time.perf_counter
+    for i in range(repeticiones):
+        t0 = reloj()
+        funcion(i)
+        tiempos.append(reloj() - t0)
+    tiempos.sort()
+    total = sum(tiempos)
+    return {
+        'n': repeticiones,
+        'total_s': round(total, 6),
+        'media_us': round(total / repeticiones * 1e6, 3),
+        'p50_us': round(tiempos[len(tiempos) // 2] * 1e6, 3),
+        'p95_us': round(tiempos[int(len(tiempos) * 0.95) - 1] * 1e6, 3),
+        'desv_us': round(statistics.pstdev(tiempos) * 1e6, 3) if len(tiempos) > 1 else 0.0,
+    }
+
+
+def productos_sinteticos(n, semilla=42):
+    rnd = random.Random(semilla)
+    tipos = ['Laptop', 'Mouse', 'Teclado', 'Monitor', 'Torre', 'Cámara', 'Impresora']
+    return [{'id': i + 1, 'nombre': f"{rnd.choice(tipos)} {rnd.choice('ABCDEFGH')}{i:06d}",
+             'cantidad': rnd.randint(0, 500), 'precio': round(rnd.uniform(5, 2500), 2)}
+            for i in range(n)]
+
+
+class _SincronizadorNulo:
+    """Inventario sin escritura a disco: se mide solo la parte en memoria."""
+
+    def registrar(self, *args, **kwargs):
+        pass
+
+    def pedir_snapshot(self):
+        pass
+
+
+def bench_inventario(productos, repeticiones, semilla=42):
+    from inventory import Inventario, ProductoRegistro
+
+    class _Fila:
+        __slots__ = ('id', 'nombre', 'cantidad', 'precio')
+
+        def __init__(self, p):
+            self.id, self.nombre, self.cantidad, self.precio = p['id'], p['nombre'], p['cantidad'], p['precio']
+
+    filas = {p['id']: _Fila(p) for p in productos}
+    resultados = {}
+
+    t0 = time.perf_counter()
+    inv = Inventario(filas, sincronizador=_SincronizadorNulo())
+    resultados['construir'] = {'n': len(productos), 'total_s': round(time.perf_counter() - t0, 6)}
+
+    rnd = random.Random(semilla)
+    terminos = palabras_busqueda(semilla)
+    ids = [rnd.choice(productos)['id'] for _ in range(repeticiones)]
+    total = len(productos)
+
+    resultados['buscar_por_nombre'] = medir(
+        lambda i: inv.buscar_por_nombre(terminos[i % len(terminos)], 20), repeticiones)
+    resultados['listar_pagina'] = medir(
+        lambda i: inv.listar_pagina((i * 37) % max(total - 20, 1), 20), repeticiones)
+
+    def listar_desde(i):
+        r = inv.productos[ids[i]]
+        inv.listar_desde(r.nombre, r.id, 20)
+    resultados['listar_desde'] = medir(listar_desde, repeticiones)
+
+    # Lo que hace actualizar() tras el commit: reemplazar el registro en las estructuras
+    def reemplazar(i):
+        # pares: renombra y deja el nombre como estaba, así el inventario no cambia
+        r = inv.productos[ids[i // 2]]
+        nuevo = ProductoRegistro(r.id, r.nombre + ' X' if i % 2 == 0 else r.nombre[:-2],
+                                 r.cantidad, r.precio)
+        inv._quitar(r)
+        inv._poner(nuevo)
+    resultados['actualizar_en_memoria'] = medir(reemplazar, repeticiones - repeticiones % 2, 0)
+    return resultados
+
+
+def bench_busqueda(productos, repeticiones, semilla=42):
+    indice = IndiceNombres()
+    t0 = time.perf_counter()
+    indice.cargar((p['id'], p['nombre']) for p in productos)
+    construir = {'n': len(productos), 'total_s': round(time.perf_counter() - t0, 6)}
+    terminos = palabras_busqueda(semilla)
+    return {
+        'construir_indice': construir,
+        'buscar': medir(lambda i: indice.buscar(terminos[i % len(terminos)], 20), repeticiones),
+    }
+
+
+def bench_archivos(productos, repeticiones=5):
+    with tempfile.TemporaryDirectory() as directorio:
+        resultados = {
+            'guardar_productos_multi': medir(
+                lambda i: guardar_productos_multi(productos, directorio=directorio), repeticiones, 1),
+            'guardar_productos_multi_binario': medir(
+                lambda i: guardar_productos_multi(productos, binario=True, directorio=directorio),
+                repeticiones, 1),
+        }
+        with SnapshotBinario(f"{directorio}/datos.bin") as snap:
+            rnd = random.Random(0)
+            ids = [rnd.randint(1, len(productos)) for _ in range(1000)]
+            resultados['snapshot_binario_buscar'] = medir(lambda i: snap.buscar(ids[i]), len(ids))
+    return resultados
+
+
+def ejecutar(n_productos=10000, repeticiones=2000, semilla=42):
+    productos = productos_sinteticos(n_productos, semilla)
+    return {
+        'n_productos': n_productos,
+        'inventario': bench_inventario(productos, repeticiones, semilla),
+        'busqueda': bench_busqueda(productos, repeticiones, semilla),
+        'archivos': bench_archivos(productos),
+    }
@@ -0,0 +1,80 @@
+# benchmark/resultados.py
+# Guardar corridas en JSON y comparar dos de ellas (p. ej. antes y después de un commit).
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+DIRECTORIO = os.path.join(os.path.dirname(__file__), 'resultados')
+
+# Métrica principal de cada tipo de medición y si "más es mejor"
+_METRICAS = (('media_us', False), ('p95_ms', False), ('rps', True), ('total_s', False))
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=os.path.dirname(__file__), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadatos(**extra):
+    return {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit(),
+        'python': sys.version.split()[0],
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        **extra,
+    }
+
+
+def guardar(resultado, ruta=None):
+    if ruta is None:
+        os.makedirs(DIRECTORIO, exist_ok=True)
+        nombre = datetime.now().strftime('%Y%m%d-%H%M%S')
+        if resultado.get('meta', {}).get('commit'):
+            nombre += '-' + resultado['meta']['commit']
+        ruta = os.path.join(DIRECTORIO, nombre + '.json')
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    return ruta
+
+
+def _hojas(datos, prefijo=''):
+    """{'a': {'b': {'media_us': 1}}} -> {'a.b': {'media_us': 1}}"""
+    if not isinstance(datos, dict):
+        return {}
+    if any(m in datos for m, _ in _METRICAS):
+        return {prefijo: datos}
+    hojas = {}
+    for clave, valor in datos.items():
+        hojas.update(_hojas(valor, f"{prefijo}.{clave}" if prefijo else clave))
+    return hojas
+
+
+def comparar(ruta_a, ruta_b, umbral=0.10):
+    """
+    Líneas de texto con el cambio de cada medición de A a B.
+    Marca con '!!' las que empeoran más que `umbral` (10 % por defecto).
+    """
+    with open(ruta_a, encoding='utf-8') as f:
+        a = _hojas({k: v for k, v in json.load(f).items() if k != 'meta'})
+    with open(ruta_b, encoding='utf-8') as f:
+        b = _hojas({k: v for k, v in json.load(f).items() if k != 'meta'})
+
+    lineas = []
+    for nombre in sorted(a.keys() & b.keys()):
+        for metrica, mas_es_mejor in _METRICAS:
+            va, vb = a[nombre].get(metrica), b[nombre].get(metrica)
+            if not va or vb is None:
+                continue
+            cambio = (vb - va) / va
+            empeora = -cambio if mas_es_mejor else cambio
+            marca = '!!' if empeora > umbral else '  '
+            lineas.append(f"{marca} {nombre:45} {metrica:9} {va:>12.3f} -> {vb:>12.3f} ({cambio:+.1%})")
+            break
+    return lineas
@@ -0,0 +1,230 @@
+# busqueda.py
+# Búsqueda de productos por nombre, sin distinguir mayúsculas ni tildes:
+# - En MySQL: índice FULLTEXT con parser ngram (MATCH ... AGAINST).
+# - En memoria: índice de trigramas + prefijos que Inventario mantiene al vuelo.
+import bisect
+import heapq
+import logging
+import re
+import unicodedata
+
+log = logging.getLogger('busqueda')
+
+# Índices que usa filtro_sql() (productos y clientes); los crean las migraciones 3 y 6
+INDICE_FULLTEXT_SQL = (
+    "ALTER TABLE productos ADD FULLTEXT INDEX ft_productos_nombre (nombre) WITH PARSER ngram"
+)
+INDICE_FULLTEXT_CLIENTES_SQL = (
+    "ALTER TABLE clientes ADD FULLTEXT INDEX ft_clientes_nombre (nombre) WITH PARSER ngram"
+)
+_INDICES_FULLTEXT = (('productos', 'ft_productos_nombre', 3), ('clientes', 'ft_clientes_nombre', 6))
+NGRAM_TOKEN_SIZE = 2   # valor por defecto de ngram_token_size en MySQL
+
+_NO_PALABRA = re.compile(r'[^\w]+', re.UNICODE)
+
+
+def normalizar(texto: str) -> str:
+    """'Cámara  Ñandú' -> 'camara nandu' (minúsculas, sin tildes, espacios simples)."""
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    sin_tildes = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return ' '.join(sin_tildes.lower().split())
+
+
+def _palabras(texto: str):
+    return [p for p in _NO_PALABRA.split(texto) if p]
+
+
+def _trigramas(texto: str):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+# --- MySQL ---
+def filtro_sql(q: str):
+    """
+    Devuelve (condición WHERE, params) para filtrar por `nombre` (productos o clientes)
+    usando índices. La coincidencia depende del largo de `q` (sin contar signos):
+    - NGRAM_TOKEN_SIZE (2) caracteres o más: subcadena, con FULLTEXT ngram ('mar' encuentra
+      'Cámara'); cada palabra de `q` debe aparecer.
+    - Menos (un solo carácter): prefijo del nombre completo (LIKE 'q%'), que usa el índice
+      normal de `nombre`; 'c' encuentra 'Cámara' pero no 'Laptop Celeron'.
+    IndiceNombres (en memoria) corta en otro punto: subcadena desde 3 caracteres y prefijo de
+    cualquier palabra por debajo; con 1 o 2 caracteres los resultados pueden diferir.
+    La insensibilidad a tildes depende de la collation (*_ai_ci).
+    """
+    palabras = _palabras(q.strip())
+    if not palabras:
+        return "", []
+    if len(''.join(palabras)) < NGRAM_TOKEN_SIZE:
+        return "nombre LIKE %s ESCAPE '\\\\'", [palabras[0].replace('_', r'\_') + '%']
+    return "MATCH(nombre) AGAINST (%s IN BOOLEAN MODE)", [_expresion_booleana(palabras)]
+
+
+def _expresion_booleana(palabras):
+    # Cada palabra como frase obligatoria: con ngram equivale a buscar la subcadena
+    return ' '.join(f'+"{p}"' for p in palabras)
+
+
+def buscar_en_bd(cursor, q: str, limite=20):
+    """Productos que coinciden con `q`, ordenados por relevancia (MySQL FULLTEXT)."""
+    palabras = _palabras(q.strip())
+    if not palabras:
+        return []
+    if len(''.join(palabras)) < NGRAM_TOKEN_SIZE:
+        where, params = filtro_sql(q)
+        cursor.execute(
+            "SELECT id_producto, nombre, cantidad, precio, descripcion FROM productos "
+            f"WHERE {where} ORDER BY nombre, id_producto LIMIT %s",
+            params + [limite]
+        )
+        return cursor.fetchall() or []
+
+    expr = _expresion_booleana(palabras)
+    cursor.execute(
+        "SELECT id_producto, nombre, cantidad, precio, descripcion, "
+        "MATCH(nombre) AGAINST (%s IN BOOLEAN MODE) AS relevancia "
+        "FROM productos WHERE MATCH(nombre) AGAINST (%s IN BOOLEAN MODE) "
+        "ORDER BY relevancia DESC, nombre, id_producto LIMIT %s",
+        (expr, expr, limite)
+    )
+    return cursor.fetchall() or []
+
+
+def revisar_indice_fulltext():
+    """
+    Avisa en el log si falta algún índice FULLTEXT de filtro_sql(); se llama al arrancar la app.
+    Solo lee information_schema: los crean las migraciones 3 y 6 (flask --app app migrar).
+    Con DB_MOTOR=sqlite no hace nada (MATCH se resuelve con una función de Python).
+    """
+    # Import diferido: conexion/sqlite.py importa este módulo
+    from mysql.connector import Error
+    from conexion.conexion import POOL_CONFIG, conexion, cerrar_conexion
+
+    if POOL_CONFIG['DB_MOTOR'] != 'mysql':
+        return True
+    try:
+        conn = conexion()
+    except Error as e:
+        log.warning("No se pudo revisar el índice de búsqueda: %s", e)
+        return False
+    cur = conn.cursor()
+    try:
+        completos = True
+        for tabla, indice, migracion in _INDICES_FULLTEXT:
+            cur.execute(
+                "SELECT 1 FROM information_schema.statistics WHERE table_schema = DATABASE()"
+                " AND table_name = %s AND index_name = %s LIMIT 1", (tabla, indice)
+            )
+            if not cur.fetchone():
+                completos = False
+                log.warning("Falta el índice FULLTEXT %s (migración %d): las búsquedas de %s "
+                            "fallarán hasta correr flask --app app migrar", indice, migracion, tabla)
+        return completos
+    except Error as e:
+        log.warning("No se pudo revisar el índice de búsqueda: %s", e)
+        return False
+    finally:
+        try: cur.close()
+        finally: cerrar_conexion(conn)
+
+
+# --- En memoria ---
+class IndiceNombres:
+    """
+    Índice incremental de nombres de producto:
+    - trigramas -> ids, para subcadenas de 3+ caracteres;
+    - lista ordenada de (palabra, id), para prefijos cortos.
+    Los resultados se ordenan: nombre exacto, empieza por q, palabra empieza por q, contiene q.
+    Con menos de 3 caracteres busca palabras que empiezan por q (ver filtro_sql para la BD).
+    """
+
+    def __init__(self):
+        self._nombres = {}      # id -> nombre normalizado
+        self._trigramas = {}    # trigrama -> set(ids)
+        self._palabras = []     # [(palabra, id)] ordenada
+
+    def __len__(self):
+        return len(self._nombres)
+
+    def cargar(self, pares):
+        """
+        Carga masiva de (id, nombre): ordena las palabras una sola vez en lugar de un
+        insort por nombre. Para altas sueltas, agregar().
+        """
+        nuevas = []
+        trigramas = self._trigramas
+        for id, nombre in pares:
+            if id in self._nombres:
+                self.quitar(id)
+            norm = normalizar(nombre)
+            self._nombres[id] = norm
+            for t in _trigramas(norm):
+                ids = trigramas.get(t)
+                if ids is None:
+                    trigramas[t] = {id}
+                else:
+                    ids.add(id)
+            nuevas.extend((p, id) for p in set(_palabras(norm)))
+        self._palabras.extend(nuevas)
+        self._palabras.sort()
+
+    def agregar(self, id, nombre: str):
+        if id in self._nombres:
+            self.quitar(id)
+        norm = normalizar(nombre)
+        self._nombres[id] = norm
+        for t in _trigramas(norm):
+            self._trigramas.setdefault(t, set()).add(id)
+        for p in set(_palabras(norm)):
+            bisect.insort(self._palabras, (p, id))
+
+    def quitar(self, id):
+        norm = self._nombres.pop(id, None)
+        if norm is None:
+            return
+        for t in _trigramas(norm):
+            ids = self._trigramas.get(t)
+            if ids is not None:
+                ids.discard(id)
+                if not ids:
+                    del self._trigramas[t]
+        for p in set(_palabras(norm)):
+            i = bisect.bisect_left(self._palabras, (p, id))
+            if i < len(self._palabras) and self._palabras[i] == (p, id):
+                del self._palabras[i]
+
+    def actualizar(self, id, nombre: str):
+        self.agregar(id, nombre)
+
+    def buscar(self, q: str, limite=None):
+        """Ids cuyo nombre contiene `q` (sin tildes ni mayúsculas), por relevancia."""
+        nq = normalizar(q)
+        if not nq:
+            return []
+
+        if len(nq) >= 3:
+            conjuntos = sorted((self._trigramas.get(t, set()) for t in _trigramas(nq)), key=len)
+            candidatos = set(conjuntos[0]).intersection(*conjuntos[1:]) if conjuntos else set()
+            ids = [i for i in candidatos if nq in self._nombres[i]]
+        else:
+            # Muy corto para trigramas: palabras que empiezan por q
+            ids = set()
+            i = bisect.bisect_left(self._palabras, (nq,))
+            while i < len(self._palabras) and self._palabras[i][0].startswith(nq):
+                ids.add(self._palabras[i][1])
+                i += 1
+
+        def clave(i):
+            nombre = self._nombres[i]
+            if nombre == nq:
+                rango = 0
+            elif nombre.startswith(nq):
+                rango = 1
+            elif (' ' + nq) in nombre:
+                rango = 2
+            else:
+                rango = 3
+            return (rango, nombre, i)
+
+        if limite is None:
+            return sorted(ids, key=clave)
+        return heapq.nsmallest(limite, ids, key=clave)
@@ -0,0 +1,133 @@
+# cache_http.py
+# Política de cache HTTP por ruta:
+# - Páginas públicas (@pagina_publica): ETag/Last-Modified y 304 sin renderizar.
+# - Estáticos con huella (?v=hash, lo añade url_for): cache de un año, inmutables.
+# - API JSON (api.py): private, no-cache; el cliente guarda la respuesta y revalida con ETag.
+# - Todo lo demás (sesión iniciada, formularios, datos): no-store, como antes.
+import hashlib
+import os
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, g, request, session
+from flask_login import current_user
+
+NO_STORE = "no-store, no-cache, must-revalidate, max-age=0"
+ESTATICO_INMUTABLE = "public, max-age=31536000, immutable"
+PRIVADA_REVALIDAR = "private, no-cache"
+
+_huellas = {}      # ruta -> (mtime, hash)
+_versiones = {}    # plantillas -> (mtimes, etag, última modificación)
+_mtime_estaticos = None
+
+
+def init_app(app):
+    app.config.setdefault('PAGINA_PUBLICA_MAX_AGE', 60)
+    app.url_defaults(_huella_estaticos)
+    app.after_request(_aplicar_politica)
+
+
+# --- Estáticos con huella ---
+def huella_estatico(filename):
+    """Hash corto del contenido de static/<filename>; cambia cuando cambia el archivo."""
+    ruta = os.path.join(current_app.static_folder, filename)
+    try:
+        mtime = os.stat(ruta).st_mtime_ns
+    except OSError:
+        return None
+    item = _huellas.get(ruta)
+    if item is None or item[0] != mtime:
+        with open(ruta, 'rb') as f:
+            item = (mtime, hashlib.md5(f.read()).hexdigest()[:10])
+        _huellas[ruta] = item
+    return item[1]
+
+
+def _huella_estaticos(endpoint, values):
+    if endpoint == 'static' and 'filename' in values and 'v' not in values:
+        v = huella_estatico(values['filename'])
+        if v:
+            values['v'] = v
+
+
+# --- Páginas públicas ---
+def _version_estaticos():
+    # Las páginas enlazan estáticos con huella: si cambia uno, cambia el HTML.
+    # Se calcula una vez por proceso (un despliegue reinicia los workers).
+    global _mtime_estaticos
+    if _mtime_estaticos is None:
+        _mtime_estaticos = max(
+            (os.stat(os.path.join(raiz, f)).st_mtime
+             for raiz, _, archivos in os.walk(current_app.static_folder) for f in archivos),
+            default=0.0,
+        )
+    return _mtime_estaticos
+
+
+def _version_plantillas(plantillas):
+    """ETag y fecha a partir de las plantillas de la página: no hace falta renderizar."""
+    rutas = [os.path.join(current_app.root_path, current_app.template_folder, p) for p in plantillas]
+    mtimes = tuple(os.stat(r).st_mtime for r in rutas) + (_version_estaticos(),)
+    item = _versiones.get(plantillas)
+    if item is None or item[0] != mtimes:
+        etag = hashlib.md5(repr((plantillas, mtimes)).encode()).hexdigest()
+        modificado = datetime.fromtimestamp(max(mtimes), tz=timezone.utc).replace(microsecond=0)
+        item = (mtimes, etag, modificado)
+        _versiones[plantillas] = item
+    return item[1], item[2]
+
+
+def pagina_publica(*plantillas):
+    """
+    Para páginas iguales para todo visitante anónimo (index, about).
+    `plantillas` son los archivos que la componen (incluida base.html).
+    Con sesión iniciada o mensajes flash pendientes se sirve como cualquier otra página.
+    """
+    plantillas = tuple(plantillas)
+
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            if current_user.is_authenticated or '_flashes' in session:
+                return vista(*args, **kwargs)
+
+            etag, modificado = _version_plantillas(plantillas)
+            # comparación débil: compresion.py entrega el mismo ETag como W/"..."
+            if request.if_none_match.contains_weak(etag) or (
+                not request.if_none_match and request.if_modified_since
+                and request.if_modified_since >= modificado
+            ):
+                resp = current_app.response_class(status=304)
+            else:
+                resp = current_app.make_response(vista(*args, **kwargs))
+            resp.set_etag(etag)
+            resp.last_modified = modificado
+            g.cache_publica = True
+            return resp
+        return envoltura
+    return decorador
+
+
+# --- after_request ---
+def _aplicar_politica(resp):
+    if request.endpoint == 'static':
+        if request.args.get('v'):
+            resp.headers["Cache-Control"] = ESTATICO_INMUTABLE
+        # sin huella: Flask ya responde con ETag/Last-Modified y revalidación
+        return resp
+
+    if g.get('cache_publica') and not session.modified:
+        resp.headers["Cache-Control"] = f"public, max-age={current_app.config['PAGINA_PUBLICA_MAX_AGE']}"
+        resp.vary.add('Cookie')
+        return resp
+
+    if g.get('cache_revalidar'):
+        resp.headers["Cache-Control"] = PRIVADA_REVALIDAR
+        resp.vary.add('Cookie')
+        return resp
+
+    # Evitar que el navegador cachee páginas (especialmente tras logout)
+    resp.headers["Cache-Control"] = NO_STORE
+    resp.headers["Pragma"] = "no-cache"
+    resp.headers["Expires"] = "0"
+    return resp
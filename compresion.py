@@ -0,0 +1,101 @@
+# compresion.py
+# Compresión de respuestas dinámicas (HTML, JSON, CSV) según Accept-Encoding.
+# - brotli si está instalado y el cliente lo prefiere; si no, gzip.
+# - Solo tipos de texto y por encima de COMPRESION_MIN_BYTES.
+# - Respuestas en streaming: se comprime trozo a trozo sin juntarlas en memoria.
+# Los estáticos no pasan por aquí: los sirve assets.py ya precomprimidos.
+import os
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:   # opcional: sin brotli solo gzip
+    brotli = None
+
+COMPRESION_CONFIG = {
+    'COMPRESION_ACTIVA': os.environ.get('COMPRESION_ACTIVA', '1') == '1',
+    'COMPRESION_MIN_BYTES': int(os.environ.get('COMPRESION_MIN_BYTES', 500)),
+    'COMPRESION_NIVEL_GZIP': int(os.environ.get('COMPRESION_NIVEL_GZIP', 6)),
+    'COMPRESION_NIVEL_BR': int(os.environ.get('COMPRESION_NIVEL_BR', 4)),   # 11 es demasiado lento en línea
+}
+
+TIPOS_COMPRIMIBLES = {
+    'text/html', 'text/plain', 'text/css', 'text/csv', 'text/xml',
+    'application/json', 'application/javascript', 'application/xml', 'image/svg+xml',
+}
+
+VACIAR_CADA = 16 * 1024
+
+
+def init_app(app):
+    for clave, valor in COMPRESION_CONFIG.items():
+        COMPRESION_CONFIG[clave] = app.config.setdefault(clave, valor)
+    if COMPRESION_CONFIG['COMPRESION_ACTIVA']:
+        app.after_request(_comprimir)
+
+
+def _compresor(codificacion):
+    """Devuelve (comprimir, terminar, vaciar) para la codificación elegida."""
+    if codificacion == 'br':
+        c = brotli.Compressor(quality=COMPRESION_CONFIG['COMPRESION_NIVEL_BR'])
+        return c.process, c.finish, c.flush
+    c = zlib.compressobj(COMPRESION_CONFIG['COMPRESION_NIVEL_GZIP'], zlib.DEFLATED, 31)   # 31 = formato gzip
+    return c.compress, c.flush, lambda: c.flush(zlib.Z_SYNC_FLUSH)
+
+
+def _en_streaming(cuerpo, codificacion):
+    comprimir, terminar, vaciar = _compresor(codificacion)
+    sin_vaciar = 0
+    try:
+        for trozo in cuerpo:
+            if isinstance(trozo, str):
+                trozo = trozo.encode('utf-8')
+            datos = comprimir(trozo)
+            sin_vaciar += len(trozo)
+            # vaciar cada VACIAR_CADA bytes: el cliente recibe el HTML a medida que se genera
+            # sin pagar un bloque deflate por cada trozo pequeño
+            if sin_vaciar >= VACIAR_CADA:
+                datos += vaciar()
+                sin_vaciar = 0
+            if datos:
+                yield datos
+        yield terminar()
+    finally:
+        if hasattr(cuerpo, 'close'):
+            cuerpo.close()
+
+
+def _comprimir(resp):
+    if (resp.status_code < 200 or resp.status_code in (204, 304)
+            or resp.direct_passthrough          # send_file: estáticos y descargas
+            or 'Content-Encoding' in resp.headers
+            or resp.mimetype not in TIPOS_COMPRIMIBLES
+            or request.method == 'HEAD'):
+        return resp
+
+    # La respuesta depende de Accept-Encoding aunque este cliente no comprima
+    resp.vary.add('Accept-Encoding')
+
+    opciones = ['br', 'gzip'] if brotli is not None else ['gzip']
+    codificacion = request.accept_encodings.best_match(opciones)
+    if codificacion is None:
+        return resp
+
+    if resp.is_streamed:
+        resp.response = _en_streaming(resp.response, codificacion)
+        resp.headers.pop('Content-Length', None)
+    else:
+        datos = resp.get_data()
+        if len(datos) < COMPRESION_CONFIG['COMPRESION_MIN_BYTES']:
+            return resp
+        comprimir, terminar, _ = _compresor(codificacion)
+        resp.set_data(comprimir(datos) + terminar())
+
+    resp.headers['Content-Encoding'] = codificacion
+    # Otra codificación es otra representación: el ETag fuerte pasa a débil
+    etag, debil = resp.get_etag()
+    if etag and not debil:
+        resp.set_etag(etag, weak=True)
+    return resp
@@ -1,27 +1,260 @@
-# clase de conexion a BD 
+# clase de conexion a BD
+import collections
+import logging
+import os
+import threading
+import time
+
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector.errors import PoolError
+from flask import current_app, g, has_app_context
 
-# conexion a la base de datos
+from . import sqlite as motor_sqlite
+from .medicion import ConexionMedida, explicar_pendientes
 
-def conexion():
-    return mysql.connector.connect(
-        host='localhost',
-        port=3307,
-        database='megacompu',
-        user='root',  # luego en producción usa variable de entorno
-        password='123456' # luego en producción usa variable de entorno
-    )
+log = logging.getLogger(__name__)
 
-# cerrar conexion a la base de datos
+# Configuración (se puede sobrescribir con variables de entorno o app.config)
+CONFIG = {
+    'host': os.environ.get('MYSQL_HOST', 'localhost'),
+    'port': int(os.environ.get('MYSQL_PORT', 3307)),
+    'database': os.environ.get('MYSQL_DATABASE', 'megacompu'),
+    'user': os.environ.get('MYSQL_USER', 'root'),          # luego en producción usa variable de entorno
+    'password': os.environ.get('MYSQL_PASSWORD', '123456'),  # luego en producción usa variable de entorno
+}
 
-def cerrar_conexion(conn):
-    if conn.is_connected():
-        conn.close()
-        print("Conexion a la base de datos cerrada.")
+POOL_CONFIG = {
+    # mysql (por defecto) | sqlite: archivo local en modo WAL, para tiendas de un solo servidor
+    'DB_MOTOR': os.environ.get('DB_MOTOR', 'mysql'),
+    'DB_SQLITE_RUTA': os.environ.get(
+        'DB_SQLITE_RUTA', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'instance', 'megacompu.db')),
+    'DB_POOL_SIZE': int(os.environ.get('DB_POOL_SIZE', 5)),            # conexiones máximas por proceso
+    'DB_POOL_TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 10)),   # segundos esperando una libre
+    'DB_POOL_PING': float(os.environ.get('DB_POOL_PING', 30)),         # ping si estuvo ociosa más de esto
+}
+
+
+# ---------------- Pool de conexiones ----------------
+
+def _abrir_mysql():
+    return mysql.connector.connect(**CONFIG)
+
+
+def _abrir_sqlite():
+    return motor_sqlite.abrir(POOL_CONFIG['DB_SQLITE_RUTA'])
+
+
+_MOTORES = {'mysql': _abrir_mysql, 'sqlite': _abrir_sqlite}
+
+
+def _ping_mysql(conn):
+    try:
+        conn.ping(reconnect=False)
+        return True
+    except Error:
+        return False
+
+
+def _limpiar_mysql(conn):
+    # Deja la conexión como nueva: descarta resultados sin leer y la transacción abierta
+    if conn.unread_result:
+        conn.consume_results()
+    conn.rollback()
+
+
+class PoolConexiones:
+    """
+    Pool acotado de conexiones:
+    - Como máximo `tamano` conexiones prestadas a la vez; si no hay, espera `timeout` segundos.
+    - Reutiliza la conexión usada más recientemente (LIFO) y le hace ping si estuvo ociosa.
+    - Tras un fork (workers de gunicorn) el hijo empieza con un pool vacío.
+    """
+
+    def __init__(self, fabrica, tamano=5, timeout=10.0, ping_cada=30.0,
+                 verificar=_ping_mysql, limpiar=_limpiar_mysql):
+        self._fabrica = fabrica
+        self._verificar = verificar
+        self._limpiar = limpiar
+        self.tamano = tamano
+        self.timeout = timeout
+        self.ping_cada = ping_cada
+        self.reiniciar()
+
+    def reiniciar(self):
+        # No se cierran las conexiones heredadas: el socket es del proceso padre
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._libres = collections.deque()   # (conn, último uso)
+        self._prestadas = set()
+        self._cupos = threading.BoundedSemaphore(self.tamano)
+
+    def obtener(self):
+        if self._pid != os.getpid():
+            self.reiniciar()
+
+        if not self._cupos.acquire(timeout=self.timeout):
+            raise PoolError(f"No hay conexiones libres tras {self.timeout}s (pool de {self.tamano})")
+
+        try:
+            conn = None
+            while conn is None:
+                with self._lock:
+                    item = self._libres.pop() if self._libres else None
+                if item is None:
+                    conn = self._fabrica()
+                    break
+                candidata, ultimo_uso = item
+                if time.monotonic() - ultimo_uso < self.ping_cada or self._verificar(candidata):
+                    conn = candidata
+                else:
+                    self._descartar(candidata)
+        except Exception:
+            self._cupos.release()
+            raise
+
+        with self._lock:
+            self._prestadas.add(id(conn))
+        return conn
+
+    def devolver(self, conn):
+        with self._lock:
+            if id(conn) not in self._prestadas:
+                return  # no es de este pool (o es de antes del fork)
+            self._prestadas.discard(id(conn))
+
+        try:
+            self._limpiar(conn)
+        except Exception:
+            self._descartar(conn)
+        else:
+            with self._lock:
+                self._libres.append((conn, time.monotonic()))
+        finally:
+            self._cupos.release()
 
+    def cerrar_todas(self):
+        with self._lock:
+            libres, self._libres = self._libres, collections.deque()
+        for conn, _ in libres:
+            self._descartar(conn)
 
+    @staticmethod
+    def _descartar(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
 
-        
 
-# probar conexion a la base de datos
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def obtener_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                motor = POOL_CONFIG['DB_MOTOR']
+                if motor not in _MOTORES:
+                    raise ValueError(f"DB_MOTOR desconocido: {motor!r} (mysql | sqlite)")
+                _pool = PoolConexiones(
+                    _MOTORES[motor],
+                    tamano=POOL_CONFIG['DB_POOL_SIZE'],
+                    timeout=POOL_CONFIG['DB_POOL_TIMEOUT'],
+                    ping_cada=POOL_CONFIG['DB_POOL_PING'],
+                )
+    return _pool
+
+
+def cerrar_pool():
+    """Cierra las conexiones libres y descarta el pool (p. ej. tras cambiar DB_MOTOR)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.cerrar_todas()
+        _pool = None
+
+
+def _reiniciar_tras_fork():
+    global _pool_lock
+    _pool_lock = threading.Lock()
+    if _pool is not None:
+        _pool.reiniciar()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reiniciar_tras_fork)
+
+
+# ---------------- Integración con Flask ----------------
+
+def init_app(app):
+    """Una conexión por petición: se presta en el primer conexion() y se devuelve al terminar."""
+    for clave, valor in POOL_CONFIG.items():
+        POOL_CONFIG[clave] = app.config.setdefault(clave, valor)
+    app.extensions['conexion'] = obtener_pool
+    app.teardown_appcontext(_devolver_conexion_peticion)
+
+
+def soltar_conexion():
+    """
+    Devuelve ya al pool la conexión de la petición, si tiene una (p. ej. antes de un cálculo
+    largo sin BD); el siguiente conexion() de la misma petición presta otra.
+    """
+    if _en_peticion():
+        _devolver_conexion_peticion()
+
+
+def _en_peticion():
+    return has_app_context() and 'conexion' in current_app.extensions
+
+
+def _devolver_conexion_peticion(exc=None):
+    conn = g.pop('_db_conn', None)
+    g.pop('_db_medida', None)
+    if conn is None:
+        return
+    stats = g.get('_db_medicion')
+    if stats is not None and stats.por_explicar:
+        # EXPLAIN muestreado de las consultas lentas, ya fuera de la respuesta
+        try:
+            _limpiar_mysql(conn)
+            explicar_pendientes(conn, stats)
+        except Error as e:
+            log.warning("No se pudo explicar las consultas lentas: %s", e)
+    obtener_pool().devolver(conn)
+
+
+# conexion a la base de datos
+
+def conexion():
+    if _en_peticion():
+        conn = g.get('_db_conn')
+        if conn is None:
+            stats = g.get('_db_medicion')
+            t0 = time.perf_counter()
+            conn = g._db_conn = obtener_pool().obtener()
+            if stats is not None:
+                # Con medición (conexion/medicion.py) la ruta recibe la conexión envuelta
+                stats.tiempo_espera += time.perf_counter() - t0
+                g._db_medida = ConexionMedida(conn, stats)
+        return g.get('_db_medida') or conn
+    return obtener_pool().obtener()
+
+# cerrar conexion a la base de datos
+
+def cerrar_conexion(conn):
+    if conn is None:
+        return
+    if isinstance(conn, ConexionMedida):
+        conn = conn._conn
+    if _en_peticion() and g.get('_db_conn') is conn:
+        # Sigue prestada hasta el teardown; solo se cierra la transacción en curso
+        try:
+            _limpiar_mysql(conn)
+        except Error as e:
+            log.warning("No se pudo limpiar la conexión de la petición: %s", e)
+        return
+    obtener_pool().devolver(conn)
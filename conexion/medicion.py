@@ -0,0 +1,168 @@
+# conexion/medicion.py
+# Medición de SQL por petición, sin profiler:
+# - cuántas consultas, cuánto tiempo en la BD y cuánto esperando una conexión del pool;
+# - se envía en la cabecera Server-Timing (visible en las DevTools del navegador) en modo
+#   debug o con DB_SERVER_TIMING=1;
+# - las consultas lentas se registran con su SQL y parámetros y, opcionalmente,
+#   se muestrea su EXPLAIN al devolver la conexión (nunca dentro de la petición).
+import logging
+import os
+import random
+import time
+
+from flask import current_app, g, request
+
+log = logging.getLogger('conexion.sql')
+
+MEDICION_CONFIG = {
+    'DB_MEDIR': os.environ.get('DB_MEDIR', '1') == '1',
+    # Server-Timing lo ve cualquier cliente: por defecto solo con app.debug (o DB_SERVER_TIMING=1)
+    'DB_SERVER_TIMING': os.environ.get('DB_SERVER_TIMING', '0') == '1',
+    'DB_CONSULTA_LENTA_MS': float(os.environ.get('DB_CONSULTA_LENTA_MS', 200)),
+    'DB_EXPLAIN_MUESTRA': float(os.environ.get('DB_EXPLAIN_MUESTRA', 0.0)),   # 0..1 de las lentas
+    'DB_AVISO_CONSULTAS': int(os.environ.get('DB_AVISO_CONSULTAS', 50)),      # posibles N+1
+}
+
+_MAX_PARAMS_LOG = 500   # caracteres de parámetros en el log
+
+
+class EstadisticasSQL:
+    """Acumulado de una petición."""
+
+    __slots__ = ('consultas', 'tiempo_db', 'tiempo_espera', 'por_explicar')
+
+    def __init__(self):
+        self.consultas = 0
+        self.tiempo_db = 0.0
+        self.tiempo_espera = 0.0
+        self.por_explicar = []   # (sql, params) lentas elegidas para EXPLAIN
+
+    def registrar(self, sql, params, duracion):
+        self.consultas += 1
+        self.tiempo_db += duracion
+        ms = duracion * 1000
+        if ms < MEDICION_CONFIG['DB_CONSULTA_LENTA_MS']:
+            return
+        log.warning("Consulta lenta (%.1f ms): %s | params=%s",
+                    ms, ' '.join(sql.split()), repr(params)[:_MAX_PARAMS_LOG])
+        muestra = MEDICION_CONFIG['DB_EXPLAIN_MUESTRA']
+        if muestra and sql.lstrip()[:6].upper() == 'SELECT' and random.random() < muestra:
+            self.por_explicar.append((sql, params))
+
+
+class CursorMedido:
+    """Envuelve un cursor de mysql.connector; el resto de atributos pasa directo."""
+
+    def __init__(self, cursor, stats):
+        self._cursor = cursor
+        self._stats = stats
+
+    def execute(self, sql, params=None, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return self._cursor.execute(sql, params, *args, **kwargs)
+        finally:
+            self._stats.registrar(sql, params, time.perf_counter() - t0)
+
+    def executemany(self, sql, filas, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return self._cursor.executemany(sql, filas, *args, **kwargs)
+        finally:
+            n = len(filas) if hasattr(filas, '__len__') else '?'
+            self._stats.registrar(sql, f"<{n} filas>", time.perf_counter() - t0)
+
+    # Con cursores sin buffer las filas llegan al leerlas: también es tiempo de BD
+    def _leer(self, metodo, *args):
+        t0 = time.perf_counter()
+        try:
+            return metodo(*args)
+        finally:
+            self._stats.tiempo_db += time.perf_counter() - t0
+
+    def fetchone(self):
+        return self._leer(self._cursor.fetchone)
+
+    def fetchall(self):
+        return self._leer(self._cursor.fetchall)
+
+    def fetchmany(self, *args):
+        return self._leer(self._cursor.fetchmany, *args)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+
+class ConexionMedida:
+    """La conexión de la petición tal como la ve la ruta: sus cursores se miden."""
+
+    def __init__(self, conn, stats):
+        self._conn = conn
+        self._stats = stats
+
+    def cursor(self, *args, **kwargs):
+        return CursorMedido(self._conn.cursor(*args, **kwargs), self._stats)
+
+    def commit(self):
+        t0 = time.perf_counter()
+        try:
+            return self._conn.commit()
+        finally:
+            self._stats.tiempo_db += time.perf_counter() - t0
+
+    def __getattr__(self, nombre):
+        return getattr(self._conn, nombre)
+
+
+# ---------------- Integración con Flask ----------------
+
+def init_app(app):
+    for clave, valor in MEDICION_CONFIG.items():
+        MEDICION_CONFIG[clave] = app.config.setdefault(clave, valor)
+    if MEDICION_CONFIG['DB_MEDIR']:
+        app.before_request(_empezar)
+        app.after_request(_cabecera)
+
+
+def estadisticas():
+    """EstadisticasSQL de la petición en curso, o None si no se mide."""
+    return g.get('_db_medicion')
+
+
+def _empezar():
+    g._db_medicion = EstadisticasSQL()
+
+
+def _cabecera(resp):
+    stats = g.get('_db_medicion')
+    if stats is None or (not stats.consultas and not stats.tiempo_espera):
+        return resp
+    if stats.consultas >= MEDICION_CONFIG['DB_AVISO_CONSULTAS']:
+        log.warning("%s %s hizo %d consultas (%.1f ms)", request.method, request.path,
+                    stats.consultas, stats.tiempo_db * 1000)
+    if MEDICION_CONFIG['DB_SERVER_TIMING'] or current_app.debug:
+        resp.headers.add(
+            'Server-Timing',
+            f'db;desc="SQL x{stats.consultas}";dur={stats.tiempo_db * 1000:.2f}, '
+            f'db-conn;desc="Espera del pool";dur={stats.tiempo_espera * 1000:.2f}'
+        )
+    return resp
+
+
+def explicar_pendientes(conn, stats):
+    """EXPLAIN de las consultas lentas muestreadas; se llama con la conexión ya limpia."""
+    for sql, params in stats.por_explicar:
+        try:
+            cur = conn.cursor(dictionary=True, buffered=True)
+            cur.execute("EXPLAIN " + sql, params)
+            plan = cur.fetchall()
+            cur.close()
+        except Exception as e:
+            log.warning("No se pudo obtener EXPLAIN: %s", e)
+            continue
+        log.warning("EXPLAIN de consulta lenta: %s\n%s", ' '.join(sql.split()),
+                    '\n'.join(repr(fila) for fila in plan))
+    stats.por_explicar.clear()
@@ -0,0 +1,271 @@
+# conexion/sqlite.py
+# Motor SQLite para tiendas de un solo servidor (DB_MOTOR=sqlite): sin proceso MySQL
+# ni viaje por red, las consultas de las rutas tardan fracciones de milisegundo.
+# La conexión imita lo que la app usa de mysql.connector (cursor(dictionary=True), %s,
+# lastrowid, start_transaction, errores de mysql.connector) y traduce el dialecto:
+# NOW(), FOR UPDATE, ON DUPLICATE KEY UPDATE, MATCH ... AGAINST y EXPLAIN.
+# Modo WAL: los lectores no bloquean al escritor ni el escritor a los lectores.
+import functools
+import os
+import re
+import sqlite3
+import threading
+
+from mysql.connector import errors
+
+from busqueda import normalizar
+
+# PRAGMAs por conexión (journal_mode=WAL queda guardado en el archivo)
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",     # con WAL no se pierde integridad, solo la última transacción ante un corte
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA busy_timeout = 5000",      # ms esperando el bloqueo de escritura antes de fallar
+    "PRAGMA cache_size = -20000",      # ~20 MB de páginas en memoria por conexión
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA mmap_size = 268435456",    # lecturas por mmap hasta 256 MB
+)
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS categorias (
+    id_categoria INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre TEXT NOT NULL COLLATE NOCASE,   -- como la collation *_ci de MySQL
+    marca TEXT NOT NULL COLLATE NOCASE,
+    UNIQUE (nombre, marca)
+);
+CREATE TABLE IF NOT EXISTS productos (
+    id_producto INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre TEXT NOT NULL,
+    cantidad INTEGER NOT NULL DEFAULT 0,
+    precio DECIMAL(10,2) NOT NULL DEFAULT 0,
+    descripcion TEXT,
+    id_categoria INTEGER REFERENCES categorias (id_categoria)
+);
+CREATE INDEX IF NOT EXISTS idx_productos_nombre ON productos (nombre, id_producto);
+CREATE TABLE IF NOT EXISTS clientes (
+    id_cliente INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre TEXT NOT NULL,
+    cedula TEXT,
+    telefono TEXT,
+    email TEXT,
+    direccion TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_clientes_nombre ON clientes (nombre, id_cliente);
+CREATE INDEX IF NOT EXISTS idx_clientes_cedula ON clientes (cedula);
+CREATE INDEX IF NOT EXISTS idx_clientes_email ON clientes (email);
+CREATE TABLE IF NOT EXISTS usuarios (
+    id_usuario INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre TEXT NOT NULL,
+    email TEXT NOT NULL UNIQUE,
+    password TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS ventas (
+    id_venta INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_cliente INTEGER NOT NULL REFERENCES clientes (id_cliente),
+    fecha TIMESTAMP NOT NULL,
+    total DECIMAL(12,2) NOT NULL DEFAULT 0,
+    estado TEXT NOT NULL DEFAULT 'PENDIENTE'
+);
+CREATE INDEX IF NOT EXISTS idx_ventas_cliente ON ventas (id_cliente, id_venta);
+CREATE INDEX IF NOT EXISTS idx_ventas_fecha ON ventas (fecha);
+CREATE TABLE IF NOT EXISTS detalle_venta (
+    id_detalle INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_venta INTEGER NOT NULL REFERENCES ventas (id_venta),
+    id_producto INTEGER NOT NULL REFERENCES productos (id_producto),
+    cantidad INTEGER NOT NULL,
+    precio_unit DECIMAL(10,2) NOT NULL,
+    subtotal DECIMAL(12,2) NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_detalle_venta ON detalle_venta (id_venta);
+CREATE TABLE IF NOT EXISTS resumen_ventas_producto (
+    fecha DATE NOT NULL,
+    id_producto INTEGER NOT NULL,
+    ventas INTEGER NOT NULL DEFAULT 0,
+    unidades INTEGER NOT NULL DEFAULT 0,
+    ingresos DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, id_producto)
+);
+CREATE TABLE IF NOT EXISTS resumen_ventas_cliente (
+    fecha DATE NOT NULL,
+    id_cliente INTEGER NOT NULL,
+    ventas INTEGER NOT NULL DEFAULT 0,
+    unidades INTEGER NOT NULL DEFAULT 0,
+    total DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, id_cliente)
+);
+"""
+
+_MATCH = re.compile(r"MATCH\((\w+)\)\s*AGAINST\s*\(%s IN BOOLEAN MODE\)", re.IGNORECASE)
+_FRASE = re.compile(r'\+?"([^"]*)"|\+?(\S+)')   # +"frase" o +palabra, como las arma filtro_sql
+
+_esquemas_listos = set()
+_esquema_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=512)
+def traducir(sql):
+    """SQL de la app (MySQL) -> SQLite. Se cachea: las consultas son siempre las mismas."""
+    sql = _MATCH.sub(r"coincide(\1, %s)", sql)
+    sql = sql.replace("NOW()", "datetime('now', 'localtime')")
+    sql = sql.replace(" FOR UPDATE", "")
+    sql = sql.replace("ESCAPE '\\\\'", "ESCAPE '\\'")   # '\\' de MySQL es una sola barra
+    if sql.lstrip().upper().startswith("EXPLAIN ") and "QUERY PLAN" not in sql.upper():
+        sql = "EXPLAIN QUERY PLAN " + sql.lstrip()[len("EXPLAIN "):]
+    if "ON DUPLICATE KEY UPDATE" in sql:
+        sql = sql.replace("ON DUPLICATE KEY UPDATE", "ON CONFLICT DO UPDATE SET")
+        sql = re.sub(r"VALUES\((\w+)\)", r"excluded.\1", sql)
+    return sql.replace("%s", "?")
+
+
+def _coincide(nombre, expresion):
+    """
+    Equivalente a MATCH ... AGAINST ('+"a" +"b"' IN BOOLEAN MODE) con ngram: subcadenas,
+    sin distinguir mayúsculas ni tildes.
+
+    >>> _coincide('Laptop HP Cámara', '+"camara"')
+    1.0
+    >>> _coincide('Laptop HP Cámara', '+"hp" +"cámara"')
+    1.0
+    >>> _coincide('Laptop HP Cámara', '+"dell"')
+    0.0
+    """
+    texto = normalizar(nombre)
+    palabras = [normalizar((f or p).strip('"')) for f, p in _FRASE.findall(expresion)]
+    return 1.0 if all(p in texto for p in palabras if p) else 0.0
+
+
+def _valor(v):
+    # Decimal, fechas y demás tipos que sqlite3 no adapta solo
+    if v is None or isinstance(v, (int, float, str, bytes)):
+        return v
+    if hasattr(v, 'isoformat'):
+        return v.isoformat(' ') if hasattr(v, 'hour') else v.isoformat()
+    return str(v)
+
+
+def _error_mysql(e):
+    """sqlite3.Error -> la excepción de mysql.connector que ya capturan las rutas y modelos."""
+    if isinstance(e, sqlite3.IntegrityError):
+        return errors.IntegrityError(msg=str(e))
+    if isinstance(e, sqlite3.OperationalError):
+        return errors.OperationalError(msg=str(e))
+    if isinstance(e, sqlite3.ProgrammingError):
+        return errors.ProgrammingError(msg=str(e))
+    return errors.DatabaseError(msg=str(e))
+
+
+class Cursor:
+    def __init__(self, conn, dictionary=False):
+        self._conn = conn
+        self._cur = conn._sqlite.cursor()
+        self._dict = dictionary
+        self.lastrowid = None
+        self.rowcount = -1
+
+    @property
+    def description(self):
+        return self._cur.description
+
+    def _fila(self, fila):
+        if fila is None or not self._dict:
+            return fila
+        return {d[0]: v for d, v in zip(self._cur.description, fila)}
+
+    def execute(self, sql, params=()):
+        try:
+            self._conn._antes_de(sql)
+            self._cur.execute(traducir(sql), [_valor(v) for v in params or ()])
+        except sqlite3.Error as e:
+            raise _error_mysql(e) from e
+        self.lastrowid = self._cur.lastrowid
+        self.rowcount = self._cur.rowcount
+
+    def executemany(self, sql, filas):
+        try:
+            self._conn._antes_de(sql)
+            self._cur.executemany(traducir(sql), ([_valor(v) for v in f] for f in filas))
+        except sqlite3.Error as e:
+            raise _error_mysql(e) from e
+        self.rowcount = self._cur.rowcount
+
+    def fetchone(self):
+        return self._fila(self._cur.fetchone())
+
+    def fetchall(self):
+        return [self._fila(f) for f in self._cur.fetchall()]
+
+    def fetchmany(self, n=1):
+        return [self._fila(f) for f in self._cur.fetchmany(n)]
+
+    def __iter__(self):
+        return (self._fila(f) for f in self._cur)
+
+    def close(self):
+        self._cur.close()
+
+
+class Conexion:
+    """Lo que usan las rutas de MySQLConnection, sobre un archivo SQLite."""
+
+    unread_result = False
+
+    def __init__(self, ruta):
+        try:
+            self._sqlite = sqlite3.connect(ruta, timeout=5, check_same_thread=False,
+                                           detect_types=sqlite3.PARSE_DECLTYPES)
+        except sqlite3.Error as e:
+            raise _error_mysql(e) from e
+        self._sqlite.create_function('coincide', 2, _coincide, deterministic=True)
+        for pragma in PRAGMAS:
+            self._sqlite.execute(pragma)
+
+    def _antes_de(self, sql):
+        # FOR UPDATE no existe en SQLite: se toma el bloqueo de escritura al empezar
+        if " FOR UPDATE" in sql and not self._sqlite.in_transaction:
+            self._sqlite.execute("BEGIN IMMEDIATE")
+
+    @property
+    def in_transaction(self):
+        return self._sqlite.in_transaction
+
+    def cursor(self, dictionary=False, buffered=None):
+        return Cursor(self, dictionary)
+
+    def start_transaction(self):
+        if not self._sqlite.in_transaction:
+            self._sqlite.execute("BEGIN IMMEDIATE")
+
+    def commit(self):
+        self._sqlite.commit()
+
+    def rollback(self):
+        self._sqlite.rollback()
+
+    def consume_results(self):
+        pass
+
+    def ping(self, reconnect=False):
+        try:
+            self._sqlite.execute("SELECT 1")
+        except sqlite3.Error as e:
+            raise _error_mysql(e) from e
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        self._sqlite.close()
+
+
+def abrir(ruta):
+    """Nueva conexión a `ruta`; la primera del proceso crea las tablas que falten."""
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    os.makedirs(directorio, exist_ok=True)
+    conn = Conexion(ruta)
+    if ruta not in _esquemas_listos:
+        with _esquema_lock:
+            if ruta not in _esquemas_listos:
+                conn._sqlite.executescript(ESQUEMA)
+                _esquemas_listos.add(ruta)
+    return conn
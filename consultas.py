@@ -0,0 +1,441 @@
+# consultas.py
+# Consultas compartidas por las rutas (app.py y app_alchemy.py)
+import re
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from busqueda import filtro_sql, normalizar
+from paginacion import CacheConteos, codificar_cursor, decodificar_cursor
+from plantillas import invalidar as invalidar_fragmentos
+from resumenes import acumular_ventas
+
+PRODUCTO_COLUMNAS = "id_producto, nombre, cantidad, precio, descripcion"
+
+conteo_productos = CacheConteos(ttl=60)
+
+
+def invalidar_productos():
+    """Llamar después de crear, editar o eliminar productos."""
+    conteo_productos.invalidar()
+    invalidar_fragmentos('productos')
+
+
+# --- Productos ---
+def _filtro_nombre(q):
+    # FULLTEXT (ngram) en vez de LIKE '%q%', que nunca puede usar un índice
+    return filtro_sql(q)
+
+
+def contar_productos(cursor, q=''):
+    def calcular():
+        where, params = _filtro_nombre(q)
+        sql = "SELECT COUNT(*) AS c FROM productos" + (f" WHERE {where}" if where else "")
+        cursor.execute(sql, params)
+        return int(cursor.fetchone()['c'])
+
+    return conteo_productos.obtener(normalizar(q), calcular)
+
+
+def _mayor_que(columnas, op):
+    """(a, b) > (x, y) expandido como a > x OR (a = x AND b > y), que MySQL sí indexa."""
+    partes, params_n = [], []
+    for i, col in enumerate(columnas):
+        iguales = [f"{c} = %s" for c in columnas[:i]]
+        partes.append("(" + " AND ".join(iguales + [f"{col} {op} %s"]) + ")")
+        params_n.append(i + 1)
+    return "(" + " OR ".join(partes) + ")", params_n
+
+
+def _pagina_por_clave(cursor, select_sql, condiciones, params, claves, per_page,
+                      despues=None, antes=None, descendente=False):
+    """
+    Paginación por clave (keyset) genérica.
+    `claves` son las columnas del ORDER BY (p. ej. ('nombre', 'id_producto') o ('v.id_venta',));
+    en la fila se leen sin el prefijo de tabla. La última debe ser única.
+    Devuelve (filas, token_anterior, token_siguiente).
+    """
+    n = len(claves)
+    campos = [c.split('.')[-1] for c in claves]
+    clave_despues = decodificar_cursor(despues, n)
+    clave_antes = decodificar_cursor(antes, n) if clave_despues is None else None
+    condiciones = list(condiciones)
+    params = list(params)
+
+    hacia_atras = clave_antes is not None
+    asc = descendente == hacia_atras       # orden real de la consulta
+    clave = clave_antes if hacia_atras else clave_despues
+    if clave is not None:
+        condicion, usos = _mayor_que(claves, '>' if asc else '<')
+        condiciones.append(condicion)
+        for k in usos:
+            params += clave[:k]
+    orden = "ORDER BY " + ", ".join(c if asc else f"{c} DESC" for c in claves)
+
+    sql = select_sql + " "
+    if condiciones:
+        sql += "WHERE " + " AND ".join(condiciones) + " "
+    sql += orden + " LIMIT %s"
+    cursor.execute(sql, params + [per_page + 1])
+
+    filas = list(cursor.fetchall() or [])
+    hay_mas = len(filas) > per_page
+    filas = filas[:per_page]
+
+    if hacia_atras:
+        filas.reverse()
+        hay_anterior, hay_siguiente = hay_mas, True
+    else:
+        hay_anterior, hay_siguiente = clave_despues is not None, hay_mas
+
+    token_anterior = token_siguiente = None
+    if filas and hay_anterior:
+        token_anterior = codificar_cursor(*(filas[0][c] for c in campos))
+    if filas and hay_siguiente:
+        token_siguiente = codificar_cursor(*(filas[-1][c] for c in campos))
+    return filas, token_anterior, token_siguiente
+
+
+def pagina_productos(cursor, q='', per_page=3, despues=None, antes=None):
+    """
+    Página de productos ordenada por (nombre, id_producto) usando búsqueda por clave:
+    cuesta lo mismo la página 1 que la N.
+    `despues`/`antes` son tokens de codificar_cursor(nombre, id_producto).
+    Devuelve (filas, token_anterior, token_siguiente).
+    """
+    where, params = _filtro_nombre(q)
+    return _pagina_por_clave(
+        cursor, f"SELECT {PRODUCTO_COLUMNAS} FROM productos",
+        [where] if where else [], params, ('nombre', 'id_producto'),
+        per_page, despues=despues, antes=antes
+    )
+
+
+def pagina_productos_offset(cursor, q='', per_page=3, offset=0):
+    """Paginación clásica por número de página (se mantiene para enlaces antiguos)."""
+    where, params = _filtro_nombre(q)
+    sql = f"SELECT {PRODUCTO_COLUMNAS} FROM productos "
+    if where:
+        sql += f"WHERE {where} "
+    sql += "ORDER BY nombre, id_producto LIMIT %s OFFSET %s"
+    cursor.execute(sql, params + [per_page, offset])
+    return cursor.fetchall() or []
+
+
+def _por_ids(cursor, select_sql, columna_id, ids):
+    """Filas cuyo `columna_id` está en `ids`, en una consulta (IN por clave primaria)."""
+    if not ids:
+        return []
+    marcas = ", ".join(["%s"] * len(ids))
+    cursor.execute(f"{select_sql} WHERE {columna_id} IN ({marcas})", list(ids))
+    return cursor.fetchall() or []
+
+
+def productos_por_ids(cursor, ids):
+    return _por_ids(cursor, f"SELECT {PRODUCTO_COLUMNAS} FROM productos", "id_producto", ids)
+
+
+# --- Clientes ---
+CLIENTE_COLUMNAS = "id_cliente, nombre, cedula, telefono, email, direccion"
+
+conteo_clientes = CacheConteos(ttl=60)
+
+_RE_EMAIL = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+_RE_CEDULA = re.compile(r'^\d[\d-]*$')
+LARGOS_CEDULA = (10, 13)   # cédula / RUC
+
+
+def invalidar_clientes():
+    """Llamar después de crear, editar o eliminar clientes."""
+    conteo_clientes.invalidar()
+    invalidar_fragmentos('clientes')
+
+
+def plan_busqueda_cliente(q):
+    """
+    Traduce `q` a una condición que pueda usar un índice:
+    - correo completo  -> email = q
+    - algo con '@'     -> email LIKE 'q%'
+    - cédula/RUC       -> cedula = q
+    - solo dígitos     -> cedula LIKE 'q%'
+    - resto            -> nombre por subcadena, como productos: FULLTEXT ngram
+                          (busqueda.filtro_sql), así 'perez' encuentra 'Juan Perez'
+    Devuelve (tipo, condición, params).
+    """
+    q = (q or '').strip()
+    if not q:
+        return 'todos', "", []
+    if '@' in q:
+        if _RE_EMAIL.match(q):
+            return 'email', "email = %s", [q]
+        prefijo = q.replace('\\', '\\\\').replace('%', r'\%').replace('_', r'\_') + '%'
+        return 'email', "email LIKE %s ESCAPE '\\\\'", [prefijo]
+    if _RE_CEDULA.match(q):
+        digitos = q.replace('-', '')
+        if len(digitos) in LARGOS_CEDULA:
+            return 'cedula', "cedula = %s", [digitos]
+        return 'cedula', "cedula LIKE %s", [digitos + '%']
+    where, params = filtro_sql(q)
+    if not where:   # solo signos: nada que buscar por nombre
+        return 'todos', "", []
+    return 'nombre', where, params
+
+
+def contar_clientes(cursor, q=''):
+    def calcular():
+        _, where, params = plan_busqueda_cliente(q)
+        sql = "SELECT COUNT(*) AS c FROM clientes" + (f" WHERE {where}" if where else "")
+        cursor.execute(sql, params)
+        return int(cursor.fetchone()['c'])
+
+    return conteo_clientes.obtener(q.strip().lower(), calcular)
+
+
+def pagina_clientes(cursor, q='', per_page=20, despues=None, antes=None):
+    """Página de clientes ordenada por (nombre, id_cliente). Devuelve (filas, anterior, siguiente)."""
+    _, where, params = plan_busqueda_cliente(q)
+    return _pagina_por_clave(
+        cursor, f"SELECT {CLIENTE_COLUMNAS} FROM clientes",
+        [where] if where else [], params, ('nombre', 'id_cliente'),
+        per_page, despues=despues, antes=antes
+    )
+
+
+def clientes_por_ids(cursor, ids):
+    return _por_ids(cursor, f"SELECT {CLIENTE_COLUMNAS} FROM clientes", "id_cliente", ids)
+
+
+# --- Ventas ---
+ESTADOS_VENTA = ('PENDIENTE', 'COMPLETADA')
+
+
+def filtros_ventas(desde=None, hasta=None, id_cliente=None, estado=None):
+    """Condiciones WHERE para el historial de ventas. `hasta` es inclusivo (día completo)."""
+    condiciones, params = [], []
+    if desde:
+        condiciones.append("v.fecha >= %s")
+        params.append(desde)
+    if hasta:
+        condiciones.append("v.fecha < %s")
+        params.append(hasta + timedelta(days=1))
+    if id_cliente:
+        condiciones.append("v.id_cliente = %s")
+        params.append(id_cliente)
+    if estado in ESTADOS_VENTA:
+        condiciones.append("v.estado = %s")
+        params.append(estado)
+    return condiciones, params
+
+
+_VENTA_SELECT = (
+    "SELECT v.id_venta, v.fecha, v.total, v.estado, v.id_cliente, c.nombre AS cliente "
+    "FROM ventas v JOIN clientes c ON c.id_cliente = v.id_cliente"
+)
+
+
+def pagina_ventas(cursor, per_page=20, despues=None, antes=None, **filtros):
+    """
+    Ventas más recientes primero, paginadas por clave sobre id_venta (sin COUNT(*)).
+    Cada venta trae `lineas` y `unidades` de detalle_venta en una sola consulta agrupada.
+    Devuelve (filas, token_anterior, token_siguiente).
+    """
+    condiciones, params = filtros_ventas(**filtros)
+    ventas, token_anterior, token_siguiente = _pagina_por_clave(
+        cursor, _VENTA_SELECT, condiciones, params, ('v.id_venta',), per_page,
+        despues=despues, antes=antes, descendente=True
+    )
+    _con_resumen(cursor, ventas)
+    return ventas, token_anterior, token_siguiente
+
+
+def ventas_por_ids(cursor, ids):
+    """Las ventas dadas con `lineas` y `unidades`, igual que pagina_ventas."""
+    ventas = _por_ids(cursor, _VENTA_SELECT, "v.id_venta", ids)
+    _con_resumen(cursor, ventas)
+    return ventas
+
+
+def _con_resumen(cursor, ventas):
+    resumen = resumen_detalle(cursor, [v['id_venta'] for v in ventas])
+    for v in ventas:
+        lineas, unidades = resumen.get(v['id_venta'], (0, 0))
+        v['lineas'] = lineas
+        v['unidades'] = unidades
+
+
+def resumen_detalle(cursor, ids_venta):
+    """{id_venta: (líneas, unidades)} para las ventas dadas, en una sola consulta."""
+    if not ids_venta:
+        return {}
+    marcas = ", ".join(["%s"] * len(ids_venta))
+    cursor.execute(
+        "SELECT id_venta, COUNT(*) AS lineas, SUM(cantidad) AS unidades "
+        f"FROM detalle_venta WHERE id_venta IN ({marcas}) GROUP BY id_venta",
+        list(ids_venta)
+    )
+    return {r['id_venta']: (int(r['lineas']), int(r['unidades'] or 0))
+            for r in cursor.fetchall() or []}
+
+
+def registrar_venta(cursor, id_cliente, lineas):
+    """
+    Registra una venta completa dentro de la transacción abierta del llamador.
+    `lineas` es {id_producto: cantidad}. Las sentencias no crecen con el carrito:
+    1) bloquea todos los productos a la vez, en orden de id (evita deadlocks);
+    2) valida stock en Python; 3) inserta la cabecera ya COMPLETADA con su total;
+    4) descuenta todo el stock en un UPDATE; 5) inserta el detalle con executemany;
+    6) suma la venta a los resúmenes diarios del panel.
+    Lanza ValueError si un producto no existe o no alcanza el stock.
+    Devuelve (id_venta, total).
+    """
+    ids = sorted(lineas)
+    marcas = ", ".join(["%s"] * len(ids))
+
+    # 1) Bloqueo de todas las filas en orden determinista
+    cursor.execute(
+        "SELECT id_producto, nombre, cantidad, precio FROM productos "
+        f"WHERE id_producto IN ({marcas}) ORDER BY id_producto FOR UPDATE",
+        ids
+    )
+    filas = {r['id_producto']: r for r in cursor.fetchall() or []}
+
+    # 2) Validación y cálculo de subtotales
+    detalle = []
+    total = Decimal('0.00')
+    for pid in ids:
+        row = filas.get(pid)
+        if not row:
+            raise ValueError(f"Producto {pid} no existe")
+        qty = lineas[pid]
+        if qty > int(row['cantidad']):
+            raise ValueError(f"Stock insuficiente para {row['nombre']}")
+        precio = Decimal(str(row['precio']))
+        subtotal = (precio * Decimal(qty)).quantize(Decimal('0.01'))
+        detalle.append((pid, qty, str(precio), str(subtotal)))
+        total += subtotal
+    total = total.quantize(Decimal('0.01'))
+
+    # 3) Cabecera
+    cursor.execute(
+        "INSERT INTO ventas (id_cliente, fecha, total, estado) "
+        "VALUES (%s, NOW(), %s, 'COMPLETADA')",
+        (id_cliente, str(total))
+    )
+    id_venta = cursor.lastrowid
+
+    # 4) Descuento de stock en una sola sentencia
+    casos = " ".join(["WHEN %s THEN %s"] * len(ids))
+    params = [v for pid in ids for v in (pid, lineas[pid])]
+    cursor.execute(
+        f"UPDATE productos SET cantidad = cantidad - CASE id_producto {casos} END "
+        f"WHERE id_producto IN ({marcas})",
+        params + ids
+    )
+
+    # 5) Detalle en lote
+    cursor.executemany(
+        "INSERT INTO detalle_venta (id_venta, id_producto, cantidad, precio_unit, subtotal) "
+        "VALUES (%s, %s, %s, %s, %s)",
+        [(id_venta, *d) for d in detalle]
+    )
+
+    # 6) Resúmenes diarios, en la misma transacción
+    acumular_ventas(cursor, [id_venta])
+    return id_venta, total
+
+
+# --- Categorías y marcas ---
+# Listas "fijas" que se ofrecen siempre en los formularios
+CATS_FIJAS = ['escritorio', 'laptop', 'accesorio']
+MARCAS_FIJAS = ['HP', 'Dell', 'Lenovo', 'Acer', 'Asus', 'Apple', 'MSI', 'Genérica']
+
+
+class CatalogoCategorias:
+    """
+    Cache por proceso de `categorias`:
+    - (nombre, marca) -> id_categoria en O(1), sin distinguir mayúsculas;
+    - listas ya ordenadas para los selects (unidas con CATS_FIJAS y MARCAS_FIJAS).
+    Se recarga tras invalidar() o al vencer `ttl` (cambios hechos por otros workers).
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._cargado_en = None
+        self._por_clave = {}
+        self._ids = frozenset()
+        self.categorias_ui = []
+        self.marcas_ui = []
+
+    def _vigente(self):
+        return self._cargado_en is not None and time.monotonic() - self._cargado_en < self.ttl
+
+    def _asegurar(self, cursor):
+        if self._vigente():
+            return
+        cursor.execute("SELECT id_categoria, nombre, marca FROM categorias")
+        filas = cursor.fetchall() or []
+
+        por_clave = {}
+        for r in filas:
+            if r['nombre'] and r['marca']:
+                por_clave.setdefault((r['nombre'].strip().lower(), r['marca'].strip().lower()),
+                                     r['id_categoria'])
+        db_cats = {r['nombre'].strip().lower() for r in filas if r['nombre']}
+        db_marcas = {r['marca'].strip() for r in filas if r['marca']}
+
+        with self._lock:
+            self._por_clave = por_clave
+            self._ids = frozenset(r['id_categoria'] for r in filas)
+            self.categorias_ui = sorted({*(c.strip().lower() for c in CATS_FIJAS), *db_cats})
+            self.marcas_ui = sorted({*(m.strip() for m in MARCAS_FIJAS), *db_marcas},
+                                    key=lambda s: s.lower())
+            self._cargado_en = time.monotonic()
+
+    def opciones(self, cursor):
+        """(categorias_ui, marcas_ui) para los selects del formulario."""
+        self._asegurar(cursor)
+        return self.categorias_ui, self.marcas_ui
+
+    def existe(self, cursor, id_categoria):
+        """Igual que id_para(): un fallo confirma en BD antes de responder."""
+        self._asegurar(cursor)
+        if id_categoria in self._ids:
+            return True
+
+        # Puede haberla creado otro worker después de la última carga
+        cursor.execute("SELECT 1 FROM categorias WHERE id_categoria=%s LIMIT 1", (id_categoria,))
+        if cursor.fetchone():
+            self.invalidar()
+            return True
+        return False
+
+    def id_para(self, cursor, nombre, marca):
+        """id_categoria de (nombre, marca) o None. Un fallo confirma en BD antes de responder."""
+        self._asegurar(cursor)
+        clave = (nombre.strip().lower(), marca.strip().lower())
+        id_categoria = self._por_clave.get(clave)
+        if id_categoria is not None:
+            return id_categoria
+
+        # Puede haberla creado otro worker después de la última carga.
+        # Sin LOWER(): la collation ya ignora mayúsculas y así se usa el índice único
+        cursor.execute(
+            "SELECT id_categoria FROM categorias "
+            "WHERE nombre=%s AND marca=%s LIMIT 1",
+            clave
+        )
+        row = cursor.fetchone()
+        if row:
+            self.invalidar()
+            return row['id_categoria']
+        return None
+
+    def invalidar(self):
+        with self._lock:
+            self._cargado_en = None
+        invalidar_fragmentos('categorias')
+
+
+catalogo_categorias = CatalogoCategorias()
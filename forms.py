@@ -1,11 +1,10 @@
-from operator import length_hint
 from flask_wtf import FlaskForm
 from wtforms import StringField, IntegerField, DecimalField, SubmitField
-from wtforms.validators import DataRequired, NumberRange
+from wtforms.validators import DataRequired, Length, NumberRange
 
 class ProductoForm(FlaskForm):
     nombre = StringField('Nombre', validators=[DataRequired()])
-    descripcion = StringField('Descripción', validators=[DataRequired(), length_hint(max=255)])
+    descripcion = StringField('Descripción', validators=[DataRequired(), Length(max=255)])
     cantidad = IntegerField('Cantidad', validators=[DataRequired(), NumberRange(min=1)])
     precio = DecimalField('Precio', validators=[DataRequired(), NumberRange(min=0)])
 
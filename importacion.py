@@ -0,0 +1,338 @@
+# importacion.py
+# Carga y descarga masiva en CSV para productos, clientes y ventas.
+# - Importar: el CSV se lee fila a fila (nunca entero en memoria), se valida y se inserta
+#   en lotes de IMPORT_LOTE filas, un executemany y un commit por lote.
+# - Exportar: cursor sin buffer + fetchmany; cada bloque se escribe y se entrega enseguida.
+# Se usa desde las rutas /importar/<entidad> y /exportar/<entidad>.csv de app.py
+# y desde la consola:
+#   flask --app app importar productos productos.csv
+#   flask --app app exportar ventas ventas.csv
+import csv
+import io
+import os
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import groupby, islice
+
+import click
+from mysql.connector import Error
+
+from conexion.conexion import obtener_pool
+from resumenes import acumular_ventas
+from consultas import (ESTADOS_VENTA, catalogo_categorias,
+                       invalidar_clientes, invalidar_productos)
+
+IMPORT_CONFIG = {
+    'IMPORT_LOTE': int(os.environ.get('IMPORT_LOTE', 1000)),     # filas por transacción
+    'EXPORT_BLOQUE': int(os.environ.get('EXPORT_BLOQUE', 1000)),  # filas por fetchmany
+}
+
+MAX_ERRORES = 50   # errores que se reportan; el resto solo se cuentan
+
+ENTIDADES = ('productos', 'clientes', 'ventas')
+
+# Columnas de cada CSV: lo que se exporta se puede volver a importar tal cual
+COLUMNAS = {
+    'productos': ['id_producto', 'nombre', 'cantidad', 'precio', 'descripcion', 'categoria', 'marca'],
+    'clientes': ['id_cliente', 'nombre', 'cedula', 'telefono', 'email', 'direccion'],
+    'ventas': ['id_venta', 'fecha', 'id_cliente', 'estado', 'id_producto', 'cantidad',
+               'precio_unit', 'subtotal'],
+}
+
+# Columnas que el CSV debe traer para importar (los ids del archivo no se conservan)
+REQUERIDAS = {
+    'productos': {'nombre', 'cantidad', 'precio', 'categoria', 'marca'},
+    'clientes': {'nombre'},
+    'ventas': {'id_venta', 'fecha', 'id_cliente', 'id_producto', 'cantidad', 'precio_unit'},
+}
+
+EXPORT_SQL = {
+    'productos': (
+        "SELECT p.id_producto, p.nombre, p.cantidad, p.precio, p.descripcion, c.nombre, c.marca "
+        "FROM productos p LEFT JOIN categorias c ON c.id_categoria = p.id_categoria "
+        "ORDER BY p.id_producto"
+    ),
+    'clientes': (
+        "SELECT id_cliente, nombre, cedula, telefono, email, direccion "
+        "FROM clientes ORDER BY id_cliente"
+    ),
+    'ventas': (
+        "SELECT v.id_venta, v.fecha, v.id_cliente, v.estado, d.id_producto, d.cantidad, "
+        "d.precio_unit, d.subtotal "
+        "FROM ventas v JOIN detalle_venta d ON d.id_venta = v.id_venta "
+        "ORDER BY v.id_venta, d.id_producto"
+    ),
+}
+
+
+def init_app(app):
+    for clave, valor in IMPORT_CONFIG.items():
+        IMPORT_CONFIG[clave] = app.config.setdefault(clave, valor)
+    app.cli.add_command(importar_cmd)
+    app.cli.add_command(exportar_cmd)
+
+
+# ---------------- Validación de filas ----------------
+
+def _texto(fila, campo):
+    return (fila.get(campo) or '').strip()
+
+
+def _entero(fila, campo, minimo=0):
+    try:
+        valor = int(_texto(fila, campo))
+    except ValueError:
+        raise ValueError(f"{campo} debe ser un entero")
+    if valor < minimo:
+        raise ValueError(f"{campo} debe ser >= {minimo}")
+    return valor
+
+
+def _decimal(fila, campo):
+    try:
+        valor = Decimal(_texto(fila, campo))
+    except InvalidOperation:
+        raise ValueError(f"{campo} debe ser un número")
+    if valor < 0:
+        raise ValueError(f"{campo} no puede ser negativo")
+    return valor.quantize(Decimal('0.01'))
+
+
+def _fila_producto(fila):
+    nombre = _texto(fila, 'nombre')
+    categoria = _texto(fila, 'categoria').lower()
+    marca = _texto(fila, 'marca')
+    if not nombre:
+        raise ValueError("nombre es obligatorio")
+    if not categoria or not marca:
+        raise ValueError("categoria y marca son obligatorias")
+    return (nombre, _entero(fila, 'cantidad'), str(_decimal(fila, 'precio')),
+            _texto(fila, 'descripcion'), categoria, marca)
+
+
+def _fila_cliente(fila):
+    nombre = _texto(fila, 'nombre')
+    email = _texto(fila, 'email')
+    if not nombre:
+        raise ValueError("nombre es obligatorio")
+    if email and '@' not in email:
+        raise ValueError("email inválido")
+    return (nombre, _texto(fila, 'cedula'), _texto(fila, 'telefono'), email,
+            _texto(fila, 'direccion'))
+
+
+def _leer_fecha_hora(texto):
+    for formato in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(texto, formato)
+        except ValueError:
+            pass
+    raise ValueError("fecha debe ser AAAA-MM-DD [HH:MM:SS]")
+
+
+def _fila_venta(fila):
+    estado = _texto(fila, 'estado').upper() or 'COMPLETADA'
+    if estado not in ESTADOS_VENTA:
+        raise ValueError(f"estado debe ser uno de {', '.join(ESTADOS_VENTA)}")
+    cantidad = _entero(fila, 'cantidad', minimo=1)
+    precio = _decimal(fila, 'precio_unit')
+    subtotal = (precio * cantidad).quantize(Decimal('0.01'))
+    return (_entero(fila, 'id_venta', minimo=1), _leer_fecha_hora(_texto(fila, 'fecha')),
+            _entero(fila, 'id_cliente', minimo=1), estado, _entero(fila, 'id_producto', minimo=1),
+            cantidad, precio, subtotal)
+
+
+# ---------------- Inserción por lotes ----------------
+
+def _insertar_productos(conn, lote):
+    # Categorías: una resolución por par (categoria, marca) distinto del lote
+    cur = conn.cursor(dictionary=True)
+    ids, nuevas = {}, False
+    for par in {(f[4], f[5]) for f in lote}:
+        ids[par] = catalogo_categorias.id_para(cur, *par)
+        if ids[par] is None:
+            cur.execute("INSERT INTO categorias (nombre, marca) VALUES (%s, %s)", par)
+            ids[par] = cur.lastrowid
+            nuevas = True
+    if nuevas:
+        catalogo_categorias.invalidar()
+
+    conn.cursor().executemany(
+        "INSERT INTO productos (nombre, cantidad, precio, descripcion, id_categoria) "
+        "VALUES (%s, %s, %s, %s, %s)",
+        [(*f[:4], ids[(f[4], f[5])]) for f in lote]
+    )
+
+
+def _insertar_clientes(conn, lote):
+    conn.cursor().executemany(
+        "INSERT INTO clientes (nombre, cedula, telefono, email, direccion) "
+        "VALUES (%s, %s, %s, %s, %s)",
+        lote
+    )
+
+
+def _insertar_ventas(conn, lote):
+    """
+    Ventas históricas: las filas con el mismo id_venta del archivo forman una venta
+    (el id real lo asigna la BD). No descuenta stock, a diferencia de registrar_venta,
+    pero sí se suman a los resúmenes diarios del panel.
+    """
+    cur = conn.cursor()
+    detalle, ids = [], []
+    for _, lineas in groupby(lote, key=lambda f: f[0]):
+        lineas = list(lineas)
+        _, fecha, id_cliente, estado = lineas[0][:4]
+        total = sum((f[7] for f in lineas), Decimal('0.00'))
+        cur.execute(
+            "INSERT INTO ventas (id_cliente, fecha, total, estado) VALUES (%s, %s, %s, %s)",
+            (id_cliente, fecha, str(total), estado)
+        )
+        id_venta = cur.lastrowid
+        ids.append(id_venta)
+        detalle += [(id_venta, f[4], f[5], str(f[6]), str(f[7])) for f in lineas]
+    cur.executemany(
+        "INSERT INTO detalle_venta (id_venta, id_producto, cantidad, precio_unit, subtotal) "
+        "VALUES (%s, %s, %s, %s, %s)",
+        detalle
+    )
+    acumular_ventas(cur, ids)
+
+
+_IMPORTADORES = {
+    'productos': (_fila_producto, _insertar_productos, invalidar_productos),
+    'clientes': (_fila_cliente, _insertar_clientes, invalidar_clientes),
+    'ventas': (_fila_venta, _insertar_ventas, lambda: None),
+}
+
+
+def _lotes(filas, tamano, agrupar=None):
+    """Lotes de ~`tamano` filas; con `agrupar`, un grupo (una venta) nunca se parte."""
+    if agrupar is None:
+        while True:
+            lote = list(islice(filas, tamano))
+            if not lote:
+                return
+            yield lote
+    lote = []
+    for _, grupo in groupby(filas, key=agrupar):
+        lote.extend(grupo)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def importar_csv(conn, entidad, flujo):
+    """
+    Importa `flujo` (archivo de texto abierto) en `entidad`.
+    Las filas inválidas se saltan; si un lote falla en la BD se revierte solo ese lote.
+    Devuelve {'leidas', 'insertadas', 'errores': [(línea, mensaje)], 'omitidos'}.
+    """
+    validar, insertar, invalidar = _IMPORTADORES[entidad]
+    resultado = {'leidas': 0, 'insertadas': 0, 'errores': [], 'omitidos': 0}
+
+    def error(linea, mensaje):
+        if len(resultado['errores']) < MAX_ERRORES:
+            resultado['errores'].append((linea, mensaje))
+        else:
+            resultado['omitidos'] += 1
+
+    def validas():
+        lector = csv.DictReader(flujo)
+        faltan = REQUERIDAS[entidad] - set(lector.fieldnames or [])
+        if faltan:
+            error(1, f"faltan columnas: {', '.join(sorted(faltan))}")
+            return
+        for fila in lector:
+            resultado['leidas'] += 1
+            try:
+                yield lector.line_num, validar(fila)
+            except ValueError as e:
+                error(lector.line_num, str(e))
+
+    agrupar = (lambda item: item[1][0]) if entidad == 'ventas' else None
+    for lote in _lotes(validas(), IMPORT_CONFIG['IMPORT_LOTE'], agrupar):
+        try:
+            insertar(conn, [f for _, f in lote])
+            conn.commit()
+            resultado['insertadas'] += len(lote)
+        except Error as e:
+            conn.rollback()
+            error(lote[0][0], f"lote de {len(lote)} filas hasta la línea {lote[-1][0]} revertido: {e.msg}")
+    if resultado['insertadas']:
+        invalidar()
+    return resultado
+
+
+def texto_subido(archivo):
+    """Envuelve el archivo subido (FileStorage) para leerlo como texto sin cargarlo entero."""
+    return io.TextIOWrapper(archivo.stream, encoding='utf-8-sig', newline='')
+
+
+# ---------------- Exportación ----------------
+
+class _Linea:
+    """Destino de csv.writer que guarda la última línea escrita."""
+    valor = ''
+
+    def write(self, texto):
+        self.valor = texto
+
+
+def iterar_csv(entidad):
+    """
+    Genera el CSV de `entidad` línea a línea.
+    Usa su propia conexión del pool (la respuesta sigue después de que termina la vista)
+    y un cursor sin buffer: en memoria solo hay EXPORT_BLOQUE filas a la vez.
+    """
+    conn = obtener_pool().obtener()
+    try:
+        cur = conn.cursor(buffered=False)
+        cur.execute(EXPORT_SQL[entidad])
+        salida = _Linea()
+        escritor = csv.writer(salida)
+        escritor.writerow(COLUMNAS[entidad])
+        yield salida.valor
+        while True:
+            filas = cur.fetchmany(IMPORT_CONFIG['EXPORT_BLOQUE'])
+            if not filas:
+                break
+            partes = []
+            for fila in filas:
+                escritor.writerow(fila)
+                partes.append(salida.valor)
+            yield ''.join(partes)
+    finally:
+        obtener_pool().devolver(conn)
+
+
+# ---------------- Consola ----------------
+
+@click.command('importar')
+@click.argument('entidad', type=click.Choice(ENTIDADES))
+@click.argument('archivo', type=click.Path(exists=True, dir_okay=False))
+def importar_cmd(entidad, archivo):
+    """Importa ARCHIVO (CSV) en productos, clientes o ventas."""
+    conn = obtener_pool().obtener()
+    try:
+        with open(archivo, encoding='utf-8-sig', newline='') as f:
+            r = importar_csv(conn, entidad, f)
+    finally:
+        obtener_pool().devolver(conn)
+    click.echo(f"{r['insertadas']} de {r['leidas']} filas importadas en {entidad}.")
+    for linea, mensaje in r['errores']:
+        click.echo(f"  línea {linea}: {mensaje}", err=True)
+    if r['omitidos']:
+        click.echo(f"  ... y {r['omitidos']} errores más", err=True)
+
+
+@click.command('exportar')
+@click.argument('entidad', type=click.Choice(ENTIDADES))
+@click.argument('archivo', type=click.Path(dir_okay=False, writable=True))
+def exportar_cmd(entidad, archivo):
+    """Exporta productos, clientes o ventas a ARCHIVO (CSV)."""
+    with open(archivo, 'w', encoding='utf-8', newline='') as f:
+        f.writelines(iterar_csv(entidad))
+    click.echo(f"{entidad} exportado a {archivo}.")
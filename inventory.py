@@ -1,90 +1,324 @@
 # inventory.py
-from models import db, Producto
-from utils import guardar_productos_multi
- 
+import bisect
+import logging
+import os
+import threading
+import time
+
+from models.model_productos import db, Producto, ProductoCambio
+from busqueda import IndiceNombres
+from sincronizacion import SincronizadorArchivos
+from sqlalchemy.exc import OperationalError
+
+log = logging.getLogger('inventario')
+
+class ProductoRegistro:
+    """Copia compacta de una fila de productos, sin sesión ni identity map de SQLAlchemy."""
+    __slots__ = ('id', 'nombre', 'cantidad', 'precio')
+
+    def __init__(self, id, nombre, cantidad, precio):
+        self.id = id
+        self.nombre = nombre
+        self.cantidad = cantidad
+        self.precio = precio
+
+    def __repr__(self):
+        return f'<Producto {self.id} {self.nombre}>'
+
+    def to_tuple(self):
+        return (self.id, self.nombre, self.cantidad, self.precio)
+
+    def to_dict(self):
+        return {"id": self.id, "nombre": self.nombre, "cantidad": self.cantidad, "precio": self.precio}
+
 class Inventario:
     """
     Inventario híbrido:
     - Se guarda siempre en BD.
-    - Se sincroniza en JSON, CSV y TXT.
+    - En memoria: registros compactos + índice por nombre ya ordenado (se mantiene al vuelo).
+    - Se sincroniza en JSON, CSV y TXT en segundo plano (ver sincronizacion.py).
+    - Coherencia entre workers: cada cambio deja una fila en productos_cambios y
+      sincronizar_cambios() aplica solo las filas nuevas de otros procesos.
+    Los registros no se modifican: cada cambio los reemplaza, así el hilo de
+    sincronización siempre lee filas completas.
     """
- 
-    def __init__(self, productos_dict=None):
-        self.productos = productos_dict or {}
-        self.nombres = set(p.nombre.lower() for p in self.productos.values())
-        self._guardar_archivos()
- 
+
+    # Ids de productos_cambios que se vuelven a leer por debajo de ultimo_cambio: con MySQL un
+    # id menor puede confirmarse después que uno mayor (dos transacciones a la vez)
+    VENTANA_CAMBIOS = 100
+    # Filas que purgar_cambios() deja en la bitácora; se purga sola al doblar esa cantidad
+    CAMBIOS_MANTENER = 10000
+
+    def __init__(self, productos_dict=None, sincronizador=None, ultimo_cambio=0):
+        self.ultimo_cambio = ultimo_cambio   # id de productos_cambios ya aplicado
+        self._aplicados = set()              # ids ya aplicados dentro de la ventana
+        self._revisado_en = 0.0
+        self.productos, self._orden, self.nombres, self.indice = self._estructuras(productos_dict or {})
+        # Cargar no escribe datos/: la copia completa se hace con el primer lote de cambios,
+        # al salir o con `flask --app app_alchemy volcar-archivos`
+        self.sync = sincronizador or SincronizadorArchivos(
+            lambda: [r.to_dict() for r in list(self.productos.values())]
+        )
+
     @classmethod
     def cargar_desde_bd(cls):
-        productos = Producto.query.all()
-        productos_dict = {p.id: p for p in productos}
-        return cls(productos_dict)
- 
-    def _guardar_archivos(self):
-        productos_lista = [
-            {"id": p.id, "nombre": p.nombre, "cantidad": p.cantidad, "precio": p.precio}
-            for p in self.productos.values()
-        ]
-        guardar_productos_multi(productos_lista)
- 
+        # La versión se lee antes que los productos: un cambio intermedio se vuelve a aplicar
+        ultimo = cls._ultimo_cambio_bd()
+        # Solo columnas: no se crean objetos ORM ni se llena el identity map
+        return cls(cls._leer_productos(), ultimo_cambio=ultimo)
+
+    @staticmethod
+    def _leer_productos():
+        return {f.id: f for f in db.session.query(
+            Producto.id, Producto.nombre, Producto.cantidad, Producto.precio)}
+
+    @staticmethod
+    def _ultimo_cambio_bd():
+        try:
+            return db.session.query(db.func.max(ProductoCambio.id)).scalar() or 0
+        except OperationalError as e:
+            # Base anterior a la bitácora: sin ella no hay coherencia entre workers
+            db.session.rollback()
+            log.warning("Falta la tabla productos_cambios (flask --app app_alchemy crear-tablas): %s",
+                        e.orig)
+            return 0
+
+    @staticmethod
+    def _estructuras(productos_dict):
+        """
+        (productos, _orden, nombres, indice) en bloque: un solo sorted() y el índice de una
+        pasada (_poner es para altas sueltas).
+        """
+        productos = {              # id -> ProductoRegistro
+            p.id: ProductoRegistro(p.id, p.nombre, p.cantidad, p.precio)
+            for p in productos_dict.values()
+        }
+        orden = sorted((r.nombre, r.id) for r in productos.values())   # [(nombre, id)]
+        nombres = {r.nombre.lower() for r in productos.values()}
+        indice = IndiceNombres()
+        indice.cargar((r.id, r.nombre) for r in productos.values())
+        return productos, orden, nombres, indice
+
+    def recargar(self):
+        """Vuelve a leer todo de la BD (worker más atrasado que la bitácora)."""
+        ultimo = self._ultimo_cambio_bd()
+        productos = self._leer_productos()
+        db.session.rollback()
+        # Se arma aparte y se reemplaza al final, sin dejar el inventario vacío mientras tanto
+        self.productos, self._orden, self.nombres, self.indice = self._estructuras(productos)
+        self.ultimo_cambio = ultimo
+        self._aplicados = set()
+        self.sync.pedir_snapshot()
+
+    # --- Coherencia entre workers ---
+    def sincronizar_cambios(self, intervalo=1.0):
+        """
+        Aplica los cambios hechos por otros procesos desde la última revisión.
+        Se revisa como mucho una vez cada `intervalo` segundos (0: en cada llamada); si no hay
+        nada nuevo cuesta dos consultas por clave primaria.
+        - Si la bitácora ya no tiene el id siguiente a ultimo_cambio (se purgó antes de que
+          este worker lo aplicara), se recarga todo.
+        - Se relee una ventana de VENTANA_CAMBIOS ids por debajo de ultimo_cambio, para no
+          perder un id menor que se confirmó tarde.
+        """
+        ahora = time.monotonic()
+        if intervalo and ahora - self._revisado_en < intervalo:
+            return 0
+        self._revisado_en = ahora
+
+        primero = db.session.query(db.func.min(ProductoCambio.id)).scalar()
+        if primero is not None and primero > self.ultimo_cambio + 1:
+            self.recargar()
+            return len(self.productos)
+
+        desde = self.ultimo_cambio - self.VENTANA_CAMBIOS
+        cambios = [c for c in (db.session.query(ProductoCambio.id, ProductoCambio.producto_id)
+                               .filter(ProductoCambio.id > desde)
+                               .order_by(ProductoCambio.id))
+                   if c.id not in self._aplicados]
+        if not cambios:
+            db.session.rollback()
+            return 0
+
+        ids = {c.producto_id for c in cambios}
+        filas = {f.id: ProductoRegistro(*f) for f in db.session.query(
+            Producto.id, Producto.nombre, Producto.cantidad, Producto.precio
+        ).filter(Producto.id.in_(ids))}
+        db.session.rollback()   # no retener la transacción de lectura
+
+        for pid in ids:
+            actual = self.productos.get(pid)
+            if actual:
+                self._quitar(actual)
+            if pid in filas:
+                self._poner(filas[pid])
+        self.ultimo_cambio = max(self.ultimo_cambio, cambios[-1].id)
+        desde = self.ultimo_cambio - self.VENTANA_CAMBIOS
+        self._aplicados = {i for i in self._aplicados if i > desde}
+        self._aplicados.update(c.id for c in cambios if c.id > desde)
+
+        if primero is not None and self.ultimo_cambio - primero > 2 * self.CAMBIOS_MANTENER:
+            self.purgar_cambios()
+        return len(ids)
+
+    @classmethod
+    def purgar_cambios(cls, mantener=None):
+        """
+        Borra la bitácora antigua; los workers más atrasados que lo que queda se
+        recargan enteros en su próximo sincronizar_cambios().
+        """
+        if mantener is None:
+            mantener = cls.CAMBIOS_MANTENER
+        limite = cls._ultimo_cambio_bd() - mantener
+        borrados = 0
+        if limite > 0:
+            borrados = ProductoCambio.query.filter(ProductoCambio.id <= limite).delete()
+        db.session.commit()
+        return borrados
+
+    # --- Estructuras en memoria ---
+    def _poner(self, r):
+        self.productos[r.id] = r
+        bisect.insort(self._orden, (r.nombre, r.id))
+        self.nombres.add(r.nombre.lower())
+        self.indice.agregar(r.id, r.nombre)
+
+    def _quitar(self, r):
+        i = bisect.bisect_left(self._orden, (r.nombre, r.id))
+        if i < len(self._orden) and self._orden[i] == (r.nombre, r.id):
+            del self._orden[i]
+        self.productos.pop(r.id, None)
+        self.nombres.discard(r.nombre.lower())
+        self.indice.quitar(r.id)
+
+    def _guardar_archivos(self, op, r=None, id=None):
+        # Solo encola el cambio; la escritura a disco ocurre fuera de la petición
+        if op == 'eliminar':
+            self.sync.registrar(op, id=id)
+        else:
+            self.sync.registrar(op, r.to_dict())
+
     # --- CRUD ---
-    def agregar(self, nombre: str, cantidad: int, precio: float) -> Producto:
+    def agregar(self, nombre: str, cantidad: int, precio: float) -> ProductoRegistro:
         if nombre.lower() in self.nombres:
             raise ValueError('Ya existe un producto con ese nombre.')
- 
+
         p = Producto(nombre=nombre.strip(), cantidad=int(cantidad), precio=float(precio))
         db.session.add(p)
+        db.session.flush()          # asigna el id sin recargar el objeto tras el commit
+        r = ProductoRegistro(p.id, p.nombre, p.cantidad, p.precio)
+        db.session.add(ProductoCambio(producto_id=r.id, op='agregar'))
         db.session.commit()
- 
-        self.productos[p.id] = p
-        self.nombres.add(p.nombre.lower())
- 
-        self._guardar_archivos()
-        return p
- 
+
+        self._poner(r)
+        self._guardar_archivos('agregar', r)
+        return r
+
     def eliminar(self, id: int) -> bool:
-        p = self.productos.get(id) or Producto.query.get(id)
-        if not p:
-            return False
- 
-        db.session.delete(p)
+        r = self.productos.get(id)
+        borrados = Producto.query.filter_by(id=id).delete()
+        if borrados:
+            db.session.add(ProductoCambio(producto_id=id, op='eliminar'))
         db.session.commit()
- 
-        self.productos.pop(id, None)
-        self.nombres.discard(p.nombre.lower())
- 
-        self._guardar_archivos()
+        if not r and not borrados:
+            return False
+
+        if r:
+            self._quitar(r)
+        self._guardar_archivos('eliminar', id=id)
         return True
- 
-    def actualizar(self, id: int, nombre=None, cantidad=None, precio=None) -> Producto | None:
-        p = self.productos.get(id) or Producto.query.get(id)
-        if not p:
-            return None
- 
+
+    def actualizar(self, id: int, nombre=None, cantidad=None, precio=None) -> ProductoRegistro | None:
+        r = self.productos.get(id)
+        if not r:
+            fila = db.session.query(Producto.id, Producto.nombre, Producto.cantidad,
+                                    Producto.precio).filter_by(id=id).first()
+            if not fila:
+                return None
+            r = ProductoRegistro(*fila)
+
+        nuevo = ProductoRegistro(r.id, r.nombre, r.cantidad, r.precio)
         if nombre is not None:
-            nuevo = nombre.strip()
-            if nuevo.lower() != p.nombre.lower() and nuevo.lower() in self.nombres:
+            nuevo.nombre = nombre.strip()
+            if nuevo.nombre.lower() != r.nombre.lower() and nuevo.nombre.lower() in self.nombres:
                 raise ValueError('Ya existe otro producto con ese nombre.')
-            self.nombres.discard(p.nombre.lower())
-            p.nombre = nuevo
-            self.nombres.add(p.nombre.lower())
- 
         if cantidad is not None:
-            p.cantidad = int(cantidad)
+            nuevo.cantidad = int(cantidad)
         if precio is not None:
-            p.precio = float(precio)
- 
+            nuevo.precio = float(precio)
+
+        Producto.query.filter_by(id=id).update(
+            {'nombre': nuevo.nombre, 'cantidad': nuevo.cantidad, 'precio': nuevo.precio}
+        )
+        db.session.add(ProductoCambio(producto_id=id, op='actualizar'))
         db.session.commit()
-        self.productos[p.id] = p
- 
-        self._guardar_archivos()
-        return p
- 
+
+        if id in self.productos:
+            self._quitar(r)
+        self._poner(nuevo)
+        self._guardar_archivos('actualizar', nuevo)
+        return nuevo
+
     # --- Consultas ---
-    def buscar_por_nombre(self, q: str):
-        q = q.lower()
-        return sorted([p for p in self.productos.values() if q in p.nombre.lower()],
-                      key=lambda x: x.nombre)
- 
+    def buscar_por_nombre(self, q: str, limite=None):
+        # Índice de trigramas: ordenado por relevancia, sin tildes ni mayúsculas
+        return [self.productos[i] for i in self.indice.buscar(q, limite)]
+
     def listar_todos(self):
-        return sorted(self.productos.values(), key=lambda x: x.nombre)
\ No newline at end of file
+        return [self.productos[i] for _, i in self._orden]
+
+    def listar_pagina(self, offset=0, limite=20):
+        """Página por nombre en O(k): el índice ya está ordenado."""
+        return [self.productos[i] for _, i in self._orden[offset:offset + limite]]
+
+    def listar_desde(self, nombre, id, limite=20):
+        """Página que empieza después de (nombre, id), para paginación por clave."""
+        i = bisect.bisect_right(self._orden, (nombre, id))
+        return [self.productos[j] for _, j in self._orden[i:i + limite]]
+
+
+class CargaDiferida:
+    """
+    Inventario que se lee de la BD recién al usarlo (o en un hilo al arrancar):
+    el worker arranca en tiempo constante, sin importar el tamaño del catálogo.
+    - obtener() lo carga una sola vez aunque lleguen varias peticiones a la vez.
+    - Si un fork (gunicorn --preload) ocurre a mitad de la carga, el hijo vuelve a cargar.
+    """
+
+    def __init__(self, app):
+        self._app = app
+        self._lock = threading.Lock()
+        self._inventario = None
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reiniciar_tras_fork)
+
+    @property
+    def cargado(self):
+        return self._inventario
+
+    def obtener(self):
+        inventario = self._inventario
+        if inventario is None:
+            with self._lock:
+                if self._inventario is None:
+                    self._inventario = self._cargar()
+                inventario = self._inventario
+        return inventario
+
+    def _cargar(self):
+        inicio = time.perf_counter()
+        with self._app.app_context():
+            # Bases creadas antes de la bitácora: crea productos_cambios si falta (no toca las demás)
+            db.create_all()
+            inventario = Inventario.cargar_desde_bd()
+        self._app.logger.info("Inventario cargado: %d productos en %.2f s",
+                              len(inventario.productos), time.perf_counter() - inicio)
+        return inventario
+
+    def precargar_en_fondo(self):
+        """Carga en un hilo; si antes llega una petición, esta espera la misma carga."""
+        threading.Thread(target=self.obtener, name='carga-inventario', daemon=True).start()
+
+    def _reiniciar_tras_fork(self):
+        # El hilo de carga no existe en el hijo: un lock tomado por él quedaría bloqueado
+        self._lock = threading.Lock()
@@ -0,0 +1,355 @@
+# migraciones.py
+# Esquema e índices de la base MySQL, versionados:
+#   flask --app app migrar               # aplica las migraciones pendientes, en orden
+#   flask --app app migrar --estado      # solo muestra cuáles faltan
+#   flask --app app revisar-consultas    # EXPLAIN de las consultas de las rutas; falla si alguna
+#                                        # recorre una tabla completa
+# Cada migración se aplica una vez y queda anotada en `schema_migraciones`.
+# Para una base creada a mano, los índices o columnas que ya existan se dan por aplicados.
+# Las migraciones solo se agregan al final: nunca se edita una ya publicada.
+from datetime import date, timedelta
+
+import click
+from mysql.connector import Error
+
+from busqueda import INDICE_FULLTEXT_CLIENTES_SQL, INDICE_FULLTEXT_SQL, filtro_sql
+from conexion.conexion import POOL_CONFIG, conexion, cerrar_conexion
+from consultas import (CatalogoCategorias, pagina_clientes, pagina_productos, pagina_ventas,
+                       plan_busqueda_cliente, registrar_venta, resumen_detalle)
+from models.model_login import VERSION_COLUMNA_SQL
+from paginacion import codificar_cursor
+from resumenes import TABLAS_SQL as TABLAS_RESUMEN_SQL, acumular_ventas, reconstruir, reporte
+
+TABLA_VERSIONES_SQL = (
+    "CREATE TABLE IF NOT EXISTS schema_migraciones ("
+    " version INT PRIMARY KEY,"
+    " descripcion VARCHAR(200) NOT NULL,"
+    " aplicada_en DATETIME NOT NULL)"
+)
+
+# Errores que significan "ya estaba así" en una base hecha a mano
+_YA_EXISTE = {
+    1050,   # ER_TABLE_EXISTS_ERROR
+    1060,   # ER_DUP_FIELDNAME
+    1061,   # ER_DUP_KEYNAME
+}
+
+_TABLAS_BASE_SQL = (
+    "CREATE TABLE IF NOT EXISTS categorias ("
+    " id_categoria INT AUTO_INCREMENT PRIMARY KEY,"
+    " nombre VARCHAR(60) NOT NULL,"
+    " marca VARCHAR(60) NOT NULL"
+    ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4",
+    "CREATE TABLE IF NOT EXISTS productos ("
+    " id_producto INT AUTO_INCREMENT PRIMARY KEY,"
+    " nombre VARCHAR(150) NOT NULL,"
+    " cantidad INT NOT NULL DEFAULT 0,"
+    " precio DECIMAL(10,2) NOT NULL DEFAULT 0,"
+    " descripcion TEXT,"
+    " id_categoria INT,"
+    " CONSTRAINT fk_productos_categoria FOREIGN KEY (id_categoria) REFERENCES categorias (id_categoria)"
+    ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4",
+    "CREATE TABLE IF NOT EXISTS clientes ("
+    " id_cliente INT AUTO_INCREMENT PRIMARY KEY,"
+    " nombre VARCHAR(120) NOT NULL,"
+    " cedula VARCHAR(13),"
+    " telefono VARCHAR(20),"
+    " email VARCHAR(120),"
+    " direccion VARCHAR(200)"
+    ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4",
+    "CREATE TABLE IF NOT EXISTS usuarios ("
+    " id_usuario INT AUTO_INCREMENT PRIMARY KEY,"
+    " nombre VARCHAR(120) NOT NULL,"
+    " email VARCHAR(120) NOT NULL UNIQUE,"
+    " password VARCHAR(255) NOT NULL"
+    ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4",
+    "CREATE TABLE IF NOT EXISTS ventas ("
+    " id_venta INT AUTO_INCREMENT PRIMARY KEY,"
+    " id_cliente INT NOT NULL,"
+    " fecha DATETIME NOT NULL,"
+    " total DECIMAL(12,2) NOT NULL DEFAULT 0,"
+    " estado VARCHAR(20) NOT NULL DEFAULT 'PENDIENTE',"
+    " CONSTRAINT fk_ventas_cliente FOREIGN KEY (id_cliente) REFERENCES clientes (id_cliente)"
+    ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4",
+    "CREATE TABLE IF NOT EXISTS detalle_venta ("
+    " id_detalle INT AUTO_INCREMENT PRIMARY KEY,"
+    " id_venta INT NOT NULL,"
+    " id_producto INT NOT NULL,"
+    " cantidad INT NOT NULL,"
+    " precio_unit DECIMAL(10,2) NOT NULL,"
+    " subtotal DECIMAL(12,2) NOT NULL,"
+    " CONSTRAINT fk_detalle_venta FOREIGN KEY (id_venta) REFERENCES ventas (id_venta),"
+    " CONSTRAINT fk_detalle_producto FOREIGN KEY (id_producto) REFERENCES productos (id_producto)"
+    ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4",
+)
+
+# Antes del índice único: une las categorías repetidas en la de menor id
+_PRIMERA_CATEGORIA = (
+    "(SELECT nombre, marca, MIN(id_categoria) AS id FROM categorias GROUP BY nombre, marca)"
+)
+_UNIR_CATEGORIAS_SQL = (
+    "UPDATE productos p JOIN categorias c ON c.id_categoria = p.id_categoria "
+    f"JOIN {_PRIMERA_CATEGORIA} k ON k.nombre = c.nombre AND k.marca = c.marca "
+    "SET p.id_categoria = k.id WHERE p.id_categoria <> k.id",
+    "DELETE c FROM categorias c "
+    f"JOIN {_PRIMERA_CATEGORIA} k ON k.nombre = c.nombre AND k.marca = c.marca "
+    "WHERE c.id_categoria <> k.id",
+)
+
+_INDICES_SQL = (
+    # Listado y paginación por clave (nombre, id); también LIKE 'q%'
+    "ALTER TABLE productos ADD INDEX idx_productos_nombre (nombre, id_producto)",
+    # CatalogoCategorias.id_para y el alta de categorías: una sola por (nombre, marca)
+    "ALTER TABLE categorias ADD UNIQUE INDEX uq_categorias_nombre_marca (nombre, marca)",
+    # plan_busqueda_cliente: cedula/email = q o LIKE 'q%'; nombre para el orden de las páginas
+    "ALTER TABLE clientes ADD INDEX idx_clientes_nombre (nombre, id_cliente)",
+    "ALTER TABLE clientes ADD INDEX idx_clientes_cedula (cedula)",
+    "ALTER TABLE clientes ADD INDEX idx_clientes_email (email)",
+    # Historial por cliente (más recientes primero) y por rango de fechas
+    "ALTER TABLE ventas ADD INDEX idx_ventas_cliente (id_cliente, id_venta)",
+    "ALTER TABLE ventas ADD INDEX idx_ventas_fecha (fecha)",
+    # resumen_detalle y acumular_ventas
+    "ALTER TABLE detalle_venta ADD INDEX idx_detalle_venta (id_venta)",
+)
+
+# (versión, descripción, pasos); un paso es SQL o una función que recibe el cursor
+MIGRACIONES = (
+    (1, "Tablas base", _TABLAS_BASE_SQL),
+    (2, "Índices de las consultas de las rutas", _UNIR_CATEGORIAS_SQL + _INDICES_SQL),
+    (3, "Índice FULLTEXT ngram de productos.nombre", (INDICE_FULLTEXT_SQL,)),
+    (4, "usuarios.version para la cache de usuarios", (VERSION_COLUMNA_SQL,)),
+    (5, "Resúmenes diarios de ventas", TABLAS_RESUMEN_SQL + (reconstruir,)),
+    (6, "Índice FULLTEXT ngram de clientes.nombre", (INDICE_FULLTEXT_CLIENTES_SQL,)),
+)
+
+
+def aplicadas(cursor):
+    """Versiones ya aplicadas."""
+    cursor.execute(TABLA_VERSIONES_SQL)
+    cursor.execute("SELECT version FROM schema_migraciones")
+    return {fila[0] for fila in cursor.fetchall()}
+
+
+def pendientes(cursor):
+    hechas = aplicadas(cursor)
+    return [m for m in MIGRACIONES if m[0] not in hechas]
+
+
+def _ejecutar(cursor, paso):
+    if callable(paso):
+        paso(cursor)
+        return
+    try:
+        cursor.execute(paso)
+    except Error as e:
+        if e.errno not in _YA_EXISTE:
+            raise
+
+
+def migrar(conn, avisar=print):
+    """
+    Aplica las migraciones pendientes en orden. Devuelve las versiones aplicadas.
+    En MySQL cada ALTER/CREATE confirma solo: la versión se anota al terminar todos sus
+    pasos, y al repetirla tras un fallo los pasos ya hechos se saltan (_YA_EXISTE).
+    """
+    cursor = conn.cursor()
+    hechas = []
+    for version, descripcion, pasos in pendientes(cursor):
+        avisar(f"Aplicando {version}: {descripcion}...")
+        for paso in pasos:
+            _ejecutar(cursor, paso)
+        cursor.execute(
+            "INSERT INTO schema_migraciones (version, descripcion, aplicada_en) VALUES (%s, %s, NOW())",
+            (version, descripcion)
+        )
+        conn.commit()
+        hechas.append(version)
+    return hechas
+
+
+# ---------------- Revisión de planes ----------------
+
+class _Registro:
+    """Cursor que solo anota (sql, params): así se obtiene el SQL exacto que arma cada función."""
+
+    def __init__(self):
+        self.consultas = []
+        self.lastrowid = 0
+
+    def execute(self, sql, params=()):
+        self.consultas.append((sql, tuple(params or ())))
+
+    def executemany(self, sql, filas):
+        pass
+
+    def fetchone(self):
+        return None
+
+    def fetchall(self):
+        return []
+
+
+def _capturar(funcion):
+    registro = _Registro()
+    try:
+        funcion(registro)
+    except (ValueError, TypeError):
+        pass   # sin filas algunas funciones se detienen tras la primera consulta, que es la que importa
+    return registro.consultas
+
+
+def consultas_calientes():
+    """
+    [(nombre, sql, params, recorre_a_proposito)] de las consultas que hacen las rutas,
+    armadas por las mismas funciones que usan (consultas.py, resumenes.py) o copiadas
+    de app.py y models/model_login.py cuando viven allí.
+    """
+    hoy = date.today()
+    siguiente = codificar_cursor('m', 1)
+    casos = [
+        ('productos', lambda c: pagina_productos(c, per_page=3)),
+        ('productos, página siguiente', lambda c: pagina_productos(c, per_page=3, despues=siguiente)),
+        ('productos, q corta (prefijo)', lambda c: pagina_productos(c, q='h')),
+        ('productos, q FULLTEXT', lambda c: pagina_productos(c, q='lapto')),
+        ('clientes', lambda c: pagina_clientes(c)),
+        ('clientes por nombre', lambda c: pagina_clientes(c, q='ana')),
+        ('clientes por email', lambda c: pagina_clientes(c, q='ana@correo.com')),
+        ('clientes por prefijo de email', lambda c: pagina_clientes(c, q='ana@')),
+        ('clientes por cédula', lambda c: pagina_clientes(c, q='0102030405')),
+        ('clientes por prefijo de cédula', lambda c: pagina_clientes(c, q='0102')),
+        ('ventas', lambda c: pagina_ventas(c)),
+        ('ventas de un cliente', lambda c: pagina_ventas(c, id_cliente=1)),
+        ('ventas por fechas', lambda c: pagina_ventas(c, desde=hoy - timedelta(days=30), hasta=hoy)),
+        ('detalle de ventas', lambda c: resumen_detalle(c, [1, 2, 3])),
+        ('venta nueva: bloqueo de productos', lambda c: registrar_venta(c, 1, {1: 1, 2: 1})),
+        ('venta nueva: resúmenes', lambda c: acumular_ventas(c, [1])),
+        ('panel', lambda c: reporte(c, hoy - timedelta(days=30), hoy)),
+    ]
+    calientes = []
+    for nombre, funcion in casos:
+        for i, (sql, params) in enumerate(_capturar(funcion)):
+            calientes.append((f"{nombre} #{i + 1}" if i else nombre, sql, params, False))
+
+    # La primera consulta de id_para es la carga del catálogo (listada abajo)
+    sql, params = _capturar(lambda c: CatalogoCategorias(ttl=0).id_para(c, 'laptop', 'HP'))[-1]
+    calientes.append(('categoría por (nombre, marca)', sql, params, False))
+
+    where, params = filtro_sql('lapto')
+    calientes.append(('contar productos, q FULLTEXT',
+                      f"SELECT COUNT(*) AS c FROM productos WHERE {where}", tuple(params), False))
+    _, where, params = plan_busqueda_cliente('ana')
+    calientes.append(('contar clientes por nombre',
+                      f"SELECT COUNT(*) AS c FROM clientes WHERE {where}", tuple(params), False))
+    calientes += [
+        ('editar producto',
+         "SELECT p.id_producto, p.nombre, p.cantidad, p.precio, p.descripcion, "
+         "c.nombre AS categoria_nombre, c.marca AS marca "
+         "FROM productos p JOIN categorias c ON p.id_categoria = c.id_categoria "
+         "WHERE p.id_producto = %s", (1,), False),
+        ('usuario por email',
+         "SELECT id_usuario, nombre, email, password, version FROM usuarios WHERE email = %s",
+         ('ana@correo.com',), False),
+        ('versión de usuario', "SELECT version FROM usuarios WHERE id_usuario = %s", (1,), False),
+        # Listas completas de los selects de /ventas/nueva: leen toda la tabla por diseño
+        ('venta nueva: clientes', "SELECT id_cliente, nombre FROM clientes ORDER BY nombre", (), True),
+        ('venta nueva: productos',
+         "SELECT id_producto, nombre, precio, cantidad FROM productos ORDER BY nombre", (), True),
+        ('catálogo de categorías', "SELECT id_categoria, nombre, marca FROM categorias", (), True),
+    ]
+    return calientes
+
+
+def _recorridos(sql, plan):
+    """Tablas que el plan recorre completas (EXPLAIN de MySQL o EXPLAIN QUERY PLAN de SQLite)."""
+    tablas = []
+    detalles = [fila['detail'] for fila in plan if 'detail' in fila]
+    # SQLite: subconsultas materializadas (como <derivedN> en MySQL) no son tablas
+    intermedias = {d.split()[1] for d in detalles if d.startswith(('MATERIALIZE ', 'CO-ROUTINE '))}
+    # ... y "SCAN t" en orden de rowid con LIMIT y sin ordenar aparte se detiene pronto
+    en_orden = sql.rstrip().upper().endswith('LIMIT %S') and not any('TEMP B-TREE' in d for d in detalles)
+    for fila in plan:
+        if 'type' in fila:
+            tabla = fila.get('table') or ''
+            # <derivedN>/<subqueryN> son resultados intermedios ya acotados, no tablas
+            if fila['type'] == 'ALL' and not tabla.startswith('<'):
+                tablas.append(tabla)
+        elif 'detail' in fila:
+            partes = [p for p in fila['detail'].split() if p != 'TABLE']   # SQLite < 3.36: SCAN TABLE t
+            if (partes[0] == 'SCAN' and len(partes) == 2 and partes[1] not in intermedias
+                    and not en_orden):
+                tablas.append(partes[1])
+    return tablas
+
+
+def revisar(conn):
+    """[(nombre, tablas recorridas, plan, recorre_a_proposito)] de cada consulta caliente."""
+    resultado = []
+    cursor = conn.cursor(dictionary=True, buffered=True)
+    for nombre, sql, params, a_proposito in consultas_calientes():
+        cursor.execute("EXPLAIN " + sql, params)
+        plan = cursor.fetchall()
+        resultado.append((nombre, _recorridos(sql, plan), plan, a_proposito))
+    conn.rollback()
+    return resultado
+
+
+# ---------------- Consola ----------------
+
+@click.command('migrar')
+@click.option('--estado', is_flag=True, help='Solo lista las migraciones pendientes.')
+def migrar_cmd(estado):
+    """Aplica las migraciones de esquema e índices pendientes."""
+    if POOL_CONFIG['DB_MOTOR'] != 'mysql':
+        raise click.ClickException(
+            f"Las migraciones son para MySQL; el motor {POOL_CONFIG['DB_MOTOR']} crea su esquema al conectar.")
+    conn = conexion()
+    try:
+        if estado:
+            faltan = pendientes(conn.cursor())
+            for version, descripcion, _ in faltan:
+                click.echo(f"Pendiente {version}: {descripcion}")
+            if not faltan:
+                click.echo("Esquema al día.")
+            return
+        hechas = migrar(conn, avisar=click.echo)
+    finally:
+        cerrar_conexion(conn)
+    click.echo(f"{len(hechas)} migraciones aplicadas." if hechas else "Esquema al día.")
+
+
+@click.command('revisar-consultas')
+@click.option('--plan', 'mostrar_plan', is_flag=True, help='Muestra el EXPLAIN completo de cada consulta.')
+def revisar_cmd(mostrar_plan):
+    """
+    EXPLAIN de las consultas de las rutas; termina con error si alguna recorre una tabla completa.
+    Con tablas casi vacías MySQL puede preferir recorrerlas: conviene correrlo sobre una base
+    con volumen real (p. ej. la de `python -m benchmark datos`).
+    """
+    conn = conexion()
+    try:
+        resultado = revisar(conn)
+    finally:
+        cerrar_conexion(conn)
+
+    fallos = 0
+    for nombre, tablas, plan, a_proposito in resultado:
+        if not tablas:
+            marca = 'ok '
+        elif a_proposito:
+            marca = 'ok*'
+        else:
+            marca = 'MAL'
+            fallos += 1
+        detalle = f"  recorre: {', '.join(tablas)}" if tablas else ""
+        click.echo(f"{marca} {nombre}{detalle}")
+        if mostrar_plan or marca == 'MAL':
+            for fila in plan:
+                click.echo(f"      {fila}")
+    click.echo("(ok* = lista completa a propósito)")
+    if fallos:
+        raise click.ClickException(f"{fallos} consultas recorren tablas completas.")
+
+
+def init_app(app):
+    app.cli.add_command(migrar_cmd)
+    app.cli.add_command(revisar_cmd)
@@ -1,30 +1,187 @@
 # models/model_login.py
-from werkzeug.security import generate_password_hash, check_password_hash
+from seguridad import generar_hash, verificar_hash, necesita_rehash
 from flask_login import UserMixin
-from conexion.conexion import conexion, cerrar_conexion
+from conexion.conexion import conexion, cerrar_conexion, soltar_conexion
 from mysql.connector import Error
+from collections import OrderedDict
+import logging
+import threading
+import time
+
+log = logging.getLogger('usuarios')
+
+# Columna que se incrementa en cada cambio de contraseña o perfil (también desde reset.py)
+VERSION_COLUMNA_SQL = "ALTER TABLE usuarios ADD COLUMN version INT NOT NULL DEFAULT 0"
+
+# Sin esa columna (migración 4 sin aplicar) se sigue funcionando, pero sin cache de usuarios
+_hay_version = True
+
+
+def _sin_version(sql):
+    return (sql.replace(", version FROM", ", 0 AS version FROM")
+               .replace(", version=version+1", ""))
+
+
+def _ejecutar(cur, sql, params):
+    """Ejecuta `sql`; si falta usuarios.version lo reintenta sin ella y apaga la cache."""
+    global _hay_version
+    if _hay_version:
+        try:
+            cur.execute(sql, params)
+            return
+        except Error as e:
+            if e.errno != 1054:   # ER_BAD_FIELD_ERROR
+                raise
+            _hay_version = False
+            cache_usuarios.invalidar()
+            log.warning("Falta usuarios.version (flask --app app migrar): "
+                        "los usuarios se leen de la BD en cada petición")
+    cur.execute(_sin_version(sql), params)
+
+
+class CacheUsuarios:
+    """
+    Cache LRU + TTL de objetos Usuario por id, por proceso:
+    - Dentro del TTL se sirve sin tocar la BD.
+    - Al vencer solo se lee `version` (por clave primaria); si no cambió se renueva,
+      si cambió se recarga la fila completa.
+    """
+
+    def __init__(self, ttl=60, max_entradas=1024):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._datos = OrderedDict()     # id -> (Usuario, instante de validación)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidaciones = 0
+
+    def obtener(self, user_id, cargar, leer_version):
+        ahora = time.monotonic()
+        with self._lock:
+            item = self._datos.get(user_id)
+            if item:
+                self._datos.move_to_end(user_id)
+                if ahora - item[1] < self.ttl:
+                    self.hits += 1
+                    return item[0]
+
+        if item and leer_version(user_id) == item[0].version:
+            with self._lock:
+                self.revalidaciones += 1
+            usuario = item[0]
+        else:
+            with self._lock:
+                self.misses += 1
+            usuario = cargar(user_id)
+            if usuario is None:
+                self.invalidar(user_id)
+                return None
+
+        with self._lock:
+            self._datos[user_id] = (usuario, ahora)
+            self._datos.move_to_end(user_id)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+        return usuario
+
+    def invalidar(self, user_id=None):
+        with self._lock:
+            if user_id is None:
+                self._datos.clear()
+            else:
+                self._datos.pop(user_id, None)
+
+    def estadisticas(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'revalidaciones': self.revalidaciones, 'entradas': len(self._datos)}
+
+
+cache_usuarios = CacheUsuarios()
+
 
 class Usuario(UserMixin):
-    def __init__(self, id_usuario, nombre, email, password):
+    def __init__(self, id_usuario, nombre, email, password, version=0):
         # Flask-Login usa .id (string)
         self.id = str(id_usuario)  # id_usuario en la tabla
         self.user_id = id_usuario    # opcional, si quieres el int
         self.nombre = nombre
         self.email = email
         self.password_hash = password  # columna 'password' de la tabla
+        self.version = version         # columna 'version': cambia con la contraseña/perfil
 
     def verificar_password(self, password_plano: str) -> bool:
-        return check_password_hash(self.password_hash, password_plano)
+        # Se calcula en el pool de procesos (seguridad.py); puede lanzar HashOcupado.
+        # La conexión de la petición (la usó obtener_por_mail) vuelve al pool mientras tanto
+        soltar_conexion()
+        ok = verificar_hash(self.password_hash, password_plano)
+        if ok and necesita_rehash(self.password_hash):
+            self.actualizar_password(password_plano)
+        return ok
+
+    def actualizar_password(self, password_plano: str) -> bool:
+        """Guarda un hash nuevo con los parámetros actuales e incrementa `version`."""
+        soltar_conexion()   # no retener la conexión de la petición mientras se calcula
+        nuevo_hash = generar_hash(password_plano)
+        conn = conexion()
+        cur = conn.cursor()
+        try:
+            _ejecutar(
+                cur, "UPDATE usuarios SET password=%s, version=version+1 WHERE id_usuario=%s",
+                (nuevo_hash, self.user_id)
+            )
+            conn.commit()
+            self.password_hash = nuevo_hash
+            self.version += 1
+            Usuario.invalidar_cache(self.user_id)
+            return True
+        except Error as e:
+            print(f"Error al actualizar contraseña: {e}")
+            return False
+        finally:
+            try: cur.close()
+            finally: cerrar_conexion(conn)
+
+    @staticmethod
+    def obtener_cacheado(user_id):
+        """Para el user_loader: evita la consulta a `usuarios` en cada petición."""
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return None
+        if not _hay_version:
+            return Usuario.obtener_por_id(user_id)
+        return cache_usuarios.obtener(user_id, Usuario.obtener_por_id, Usuario.obtener_version)
+
+    @staticmethod
+    def invalidar_cache(user_id=None):
+        cache_usuarios.invalidar(int(user_id) if user_id is not None else None)
+
+    @staticmethod
+    def obtener_version(user_id: int):
+        conn = conexion()
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT version FROM usuarios WHERE id_usuario = %s", (user_id,))
+            row = cur.fetchone()
+            return row[0] if row else None
+        except Error as e:
+            print(f"Error al obtener versión de usuario: {e}")
+            return None
+        finally:
+            try: cur.close()
+            finally: cerrar_conexion(conn)
 
     @staticmethod
     def obtener_por_id(user_id: int):
         conn = conexion()
         cur = conn.cursor(dictionary=True)
         try:
-            cur.execute("SELECT id_usuario, nombre, email, password FROM usuarios WHERE id_usuario = %s", (user_id,))
+            _ejecutar(cur, "SELECT id_usuario, nombre, email, password, version FROM usuarios WHERE id_usuario = %s", (user_id,))
             row = cur.fetchone()
             if row:
-                return Usuario(row['id_usuario'], row['nombre'], row['email'], row['password'])
+                return Usuario(row['id_usuario'], row['nombre'], row['email'], row['password'], row['version'])
             return None
         except Error as e:
             print(f"Error al obtener usuario por ID: {e}")
@@ -38,10 +195,10 @@ class Usuario(UserMixin):
         conn = conexion()
         cur = conn.cursor(dictionary=True)
         try:
-            cur.execute("SELECT id_usuario, nombre, email, password FROM usuarios WHERE email = %s", (email,))
+            _ejecutar(cur, "SELECT id_usuario, nombre, email, password, version FROM usuarios WHERE email = %s", (email,))
             row = cur.fetchone()
             if row:
-                return Usuario(row['id_usuario'], row['nombre'], row['email'], row['password'])
+                return Usuario(row['id_usuario'], row['nombre'], row['email'], row['password'], row['version'])
             return None
         except Error as e:
             print(f"Error al obtener usuario por email: {e}")
@@ -53,14 +210,13 @@ class Usuario(UserMixin):
     @staticmethod
     def crear_usuario(email: str, password_plano: str, nombre: str):
         """Crea usuario usando PBKDF2-SHA256 (600k)."""
+        # El hash va antes de pedir la conexión, y la de la petición (p. ej. la que buscó si el
+        # correo ya existía) vuelve al pool: ninguna queda retenida mientras se calcula
+        soltar_conexion()
+        password_hash = generar_hash(password_plano)
         conn = conexion()
         cur = conn.cursor()
         try:
-            password_hash = generate_password_hash(
-                password_plano,
-                method='pbkdf2:sha256:600000',
-                salt_length=16
-            )
             cur.execute(
                 "INSERT INTO usuarios (nombre, email, password) VALUES (%s, %s, %s)",
                 (nombre, email, password_hash)
@@ -69,10 +225,10 @@ class Usuario(UserMixin):
             cur.close()
             # Nuevo cursor para obtener el usuario recién creado
             cur2 = conn.cursor(dictionary=True)
-            cur2.execute("SELECT id_usuario, nombre, email, password FROM usuarios WHERE email=%s", (email,))
+            _ejecutar(cur2, "SELECT id_usuario, nombre, email, password, version FROM usuarios WHERE email=%s", (email,))
             row = cur2.fetchone()
             cur2.close()
-            return Usuario(row['id_usuario'], row['nombre'], row['email'], row['password']) if row else None
+            return Usuario(row['id_usuario'], row['nombre'], row['email'], row['password'], row['version']) if row else None
         except Error as e:
             print(f"Error al crear usuario: {e}")
             return None
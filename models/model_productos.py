@@ -1,3 +1,4 @@
+# models/model_productos.py
 from flask_sqlalchemy import SQLAlchemy
 
 db = SQLAlchemy()
@@ -14,4 +15,14 @@ class Producto(db.Model):
 
     def to_tuple(self):
         # ejemplo de tupla: (id, nombre, cantidad, precio)
-        return (self.id, self.nombre, self.cantidad, self.precio)
\ No newline at end of file
+        return (self.id, self.nombre, self.cantidad, self.precio)
+
+class ProductoCambio(db.Model):
+    """Bitácora de cambios de productos: cada worker aplica solo lo nuevo desde su último id."""
+    __tablename__ = 'productos_cambios'
+    id = db.Column(db.Integer, primary_key=True)          # hace de número de versión
+    producto_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)         # agregar | actualizar | eliminar
+
+    def __repr__(self):
+        return f'<ProductoCambio {self.id} {self.op} {self.producto_id}>'
@@ -0,0 +1,69 @@
+# paginacion.py
+import base64
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+# --- Cursores (paginación por clave / keyset) ---
+def codificar_cursor(*valores) -> str:
+    """Convierte la clave de una fila (p. ej. nombre, id) en un token opaco para la URL."""
+    crudo = json.dumps(valores, ensure_ascii=False, separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(crudo.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(token, n=2):
+    """Devuelve la lista de valores del token, o None si falta o no es válido."""
+    if not token:
+        return None
+    try:
+        relleno = '=' * (-len(token) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(token + relleno).decode('utf-8'))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(valores, list) or len(valores) != n:
+        return None
+    # Solo escalares: una lista u objeto anidado (o NaN) haría fallar la consulta con un 500
+    for v in valores:
+        if isinstance(v, bool) or not isinstance(v, (str, int, float)):
+            return None
+        if isinstance(v, float) and not math.isfinite(v):
+            return None
+    return valores
+
+
+# --- Conteos cacheados ---
+class CacheConteos:
+    """
+    Cache en memoria de COUNT(*) por filtro:
+    - Cada entrada vive `ttl` segundos (acota lo desactualizado entre workers).
+    - invalidar() la vacía; se llama al crear/editar/eliminar.
+    """
+
+    def __init__(self, ttl=60, max_entradas=256):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave, calcular):
+        ahora = time.monotonic()
+        with self._lock:
+            item = self._datos.get(clave)
+            if item and ahora - item[1] < self.ttl:
+                self._datos.move_to_end(clave)
+                return item[0]
+
+        valor = calcular()
+        with self._lock:
+            self._datos[clave] = (valor, ahora)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+        return valor
+
+    def invalidar(self):
+        with self._lock:
+            self._datos.clear()
@@ -0,0 +1,205 @@
+# plantillas.py
+# Menos trabajo de Jinja por petición:
+# - Bytecode en disco (JINJA_CACHE_DIR, por defecto instance/jinja): un worker nuevo carga las
+#   plantillas ya compiladas en vez de volver a compilarlas. Se precalienta con
+#   flask --app app compilar-plantillas (p. ej. en el despliegue, antes de arrancar gunicorn).
+# - Fragmentos cacheados dentro de las plantillas:
+#       {% cache 'productos-tabla', q, per_page, depende='productos' %} ... {% endcache %}
+#   La clave es el nombre más los valores que cambian el HTML; `ttl` (segundos) es opcional.
+#   invalidar('productos') descarta los fragmentos que dependen de esos datos; se llama desde
+#   consultas.py al escribir productos, clientes o categorías. El HTML se guarda por proceso,
+#   pero la invalidación se comparte: se marca en un archivo por dato (FRAGMENTOS_MARCAS_DIR,
+#   por defecto instance/fragmentos) cuya fecha los demás workers comparan antes de servir.
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import click
+from flask import current_app
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+PLANTILLAS_CONFIG = {
+    'JINJA_CACHE_DIR': os.environ.get('JINJA_CACHE_DIR'),           # None: <instance>/jinja
+    'FRAGMENTOS_ACTIVOS': os.environ.get('FRAGMENTOS_ACTIVOS', '1') == '1',
+    'FRAGMENTOS_TTL': float(os.environ.get('FRAGMENTOS_TTL', 60)),
+    'FRAGMENTOS_MAX_BYTES': int(os.environ.get('FRAGMENTOS_MAX_BYTES', 16 * 1024 * 1024)),
+    'FRAGMENTOS_MARCAS_DIR': os.environ.get('FRAGMENTOS_MARCAS_DIR'),  # None: <instance>/fragmentos
+}
+
+
+class CacheFragmentos:
+    """
+    HTML ya renderizado por clave, LRU acotado por tamaño total:
+    - cada entrada vive su `ttl` y recuerda de qué datos depende;
+    - invalidar(*datos) descarta las que dependen de alguno, en este proceso y, con
+      `directorio`, en los demás (por la fecha del archivo de marca de cada dato).
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024, directorio=None):
+        self.max_bytes = max_bytes
+        self.directorio = directorio
+        self._datos = OrderedDict()   # clave -> (html, vence, depende, marca)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _marca(self, depende):
+        """Última invalidación compartida de los datos de `depende` (ns; 0 si no hay)."""
+        if not self.directorio or not depende:
+            return 0
+        marca = 0
+        for dato in depende:
+            try:
+                marca = max(marca, os.stat(os.path.join(self.directorio, dato)).st_mtime_ns)
+            except FileNotFoundError:
+                pass
+        return marca
+
+    def _marcar(self, dato):
+        ruta = os.path.join(self.directorio, dato)
+        with open(ruta, 'a'):
+            pass
+        ahora = time.time_ns()
+        os.utime(ruta, ns=(ahora, ahora))
+
+    def obtener(self, clave, ttl, depende, renderizar):
+        ahora = time.monotonic()
+        marca = self._marca(depende)   # antes de renderizar: un cambio a mitad lo deja vencido
+        with self._lock:
+            item = self._datos.get(clave)
+            if item and ahora < item[1] and item[3] == marca:
+                self._datos.move_to_end(clave)
+                self.hits += 1
+                return item[0]
+            self.misses += 1
+
+        html = renderizar()
+        with self._lock:
+            self._quitar(clave)
+            self._datos[clave] = (html, ahora + ttl, depende, marca)
+            self._bytes += len(html)
+            while self._bytes > self.max_bytes and self._datos:
+                self._quitar(next(iter(self._datos)))
+        return html
+
+    def _quitar(self, clave):
+        item = self._datos.pop(clave, None)
+        if item:
+            self._bytes -= len(item[0])
+
+    def invalidar(self, *datos):
+        """Sin argumentos vacía todo (solo en este proceso)."""
+        if self.directorio:
+            for dato in datos:
+                try:
+                    self._marcar(dato)
+                except OSError:
+                    pass   # sin marca los demás workers lo ven al vencer el TTL
+        with self._lock:
+            if not datos:
+                self._datos.clear()
+                self._bytes = 0
+                return
+            for clave in [c for c, item in self._datos.items() if set(datos) & set(item[2])]:
+                self._quitar(clave)
+
+
+cache_fragmentos = CacheFragmentos()
+
+
+def invalidar(*datos):
+    """Llamar después de escribir 'productos', 'clientes' o 'categorias'."""
+    cache_fragmentos.invalidar(*datos)
+
+
+class FragmentoCache(Extension):
+    """Etiqueta {% cache nombre, valor, ..., ttl=60, depende='productos' %} ... {% endcache %}."""
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        partes, opciones = [], {}
+        while parser.stream.current.type != 'block_end':
+            if partes or opciones:
+                parser.stream.expect('comma')
+            if parser.stream.current.type == 'name' and parser.stream.look().type == 'assign':
+                nombre = next(parser.stream).value
+                next(parser.stream)
+                opciones[nombre] = parser.parse_expression()
+            else:
+                partes.append(parser.parse_expression())
+        cuerpo = parser.parse_statements(('name:endcache',), drop_needle=True)
+        llamada = self.call_method('_renderizar', [
+            nodes.List(partes),
+            opciones.get('ttl', nodes.Const(None)),
+            opciones.get('depende', nodes.Const(())),
+        ])
+        return nodes.CallBlock(llamada, [], [], cuerpo).set_lineno(lineno)
+
+    def _renderizar(self, partes, ttl, depende, caller):
+        if not PLANTILLAS_CONFIG['FRAGMENTOS_ACTIVOS']:
+            return caller()
+        if isinstance(depende, str):
+            depende = (depende,)
+        if ttl is None:
+            ttl = PLANTILLAS_CONFIG['FRAGMENTOS_TTL']
+        clave = tuple(str(p) for p in partes)
+        return Markup(cache_fragmentos.obtener(clave, ttl, tuple(depende), lambda: str(caller())))
+
+
+class Diferido:
+    """
+    Lista que se consulta recién al recorrerla en la plantilla: si el fragmento que la usa
+    está en cache, la consulta no se hace.
+    """
+
+    def __init__(self, funcion, *args):
+        self._funcion = funcion
+        self._args = args
+        self._filas = None
+
+    def _valor(self):
+        if self._filas is None:
+            self._filas = list(self._funcion(*self._args) or [])
+        return self._filas
+
+    def __iter__(self):
+        return iter(self._valor())
+
+    def __len__(self):
+        return len(self._valor())
+
+    def __bool__(self):
+        return bool(self._valor())
+
+
+# ---------------- Integración con Flask ----------------
+
+def init_app(app):
+    for clave, valor in PLANTILLAS_CONFIG.items():
+        PLANTILLAS_CONFIG[clave] = app.config.setdefault(clave, valor)
+    cache_fragmentos.max_bytes = PLANTILLAS_CONFIG['FRAGMENTOS_MAX_BYTES']
+    marcas = PLANTILLAS_CONFIG['FRAGMENTOS_MARCAS_DIR'] or os.path.join(app.instance_path, 'fragmentos')
+    os.makedirs(marcas, exist_ok=True)
+    cache_fragmentos.directorio = marcas
+
+    directorio = PLANTILLAS_CONFIG['JINJA_CACHE_DIR'] or os.path.join(app.instance_path, 'jinja')
+    os.makedirs(directorio, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directorio)
+    app.jinja_env.add_extension(FragmentoCache)
+    app.cli.add_command(compilar_cmd)
+
+
+@click.command('compilar-plantillas')
+def compilar_cmd():
+    """Compila todas las plantillas y deja su bytecode en JINJA_CACHE_DIR."""
+    entorno = current_app.jinja_env
+    nombres = entorno.list_templates(extensions=('html',))
+    for nombre in nombres:
+        entorno.get_template(nombre)
+    click.echo(f"{len(nombres)} plantillas compiladas en {entorno.bytecode_cache.directory}")
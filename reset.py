@@ -1,6 +1,7 @@
 # reset_password.py
 from conexion.conexion import conexion, cerrar_conexion
 from werkzeug.security import generate_password_hash
+from seguridad import METODO_HASH, SALT_LENGTH
 
 UID = 8
 NUEVA_CLAVE = "12345"  # <-- cámbiala a la que quieras
@@ -8,15 +9,19 @@ NUEVA_CLAVE = "12345"  # <-- cámbiala a la que quieras
 def main():
     nuevo_hash = generate_password_hash(
         NUEVA_CLAVE,
-        method='pbkdf2:sha256:600000',
-        salt_length=16
+        method=METODO_HASH,
+        salt_length=SALT_LENGTH
     )
     print("Nuevo hash:", nuevo_hash)
 
     conn = conexion()
     cur = conn.cursor()
     try:
-        cur.execute("UPDATE usuarios SET password=%s WHERE id_usuario=%s", (nuevo_hash, UID))
+        # version+1: los workers descartan su copia cacheada del usuario al revalidar
+        cur.execute(
+            "UPDATE usuarios SET password=%s, version=version+1 WHERE id_usuario=%s",
+            (nuevo_hash, UID)
+        )
         conn.commit()
         print(f"Contraseña actualizada para id_usuario={UID}")
     finally:
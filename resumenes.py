@@ -0,0 +1,193 @@
+# resumenes.py
+# Resúmenes diarios de ventas para el panel (solo ventas COMPLETADA):
+# - resumen_ventas_producto: (fecha, id_producto) -> unidades, ingresos, ventas
+# - resumen_ventas_cliente:  (fecha, id_cliente)  -> ventas, unidades, total
+# registrar_venta los actualiza en su misma transacción; el panel solo lee estas tablas,
+# así un reporte cuesta lo mismo con un mes de historial que con diez años.
+# Si se desalinean (carga manual, ventas anuladas a mano):
+#   flask --app app reconstruir-resumenes [--desde AAAA-MM-DD] [--hasta AAAA-MM-DD]
+import logging
+from datetime import date, datetime, timedelta
+
+import click
+from mysql.connector import Error
+
+from conexion.conexion import conexion, cerrar_conexion
+
+log = logging.getLogger('resumenes')
+
+TABLAS_SQL = (
+    "CREATE TABLE IF NOT EXISTS resumen_ventas_producto ("
+    " fecha DATE NOT NULL,"
+    " id_producto INT NOT NULL,"
+    " ventas INT NOT NULL DEFAULT 0,"
+    " unidades INT NOT NULL DEFAULT 0,"
+    " ingresos DECIMAL(14,2) NOT NULL DEFAULT 0,"
+    " PRIMARY KEY (fecha, id_producto))",
+    "CREATE TABLE IF NOT EXISTS resumen_ventas_cliente ("
+    " fecha DATE NOT NULL,"
+    " id_cliente INT NOT NULL,"
+    " ventas INT NOT NULL DEFAULT 0,"
+    " unidades INT NOT NULL DEFAULT 0,"
+    " total DECIMAL(14,2) NOT NULL DEFAULT 0,"
+    " PRIMARY KEY (fecha, id_cliente))",
+)
+
+# Cuerpo común: agrega detalle_venta por día a partir de las ventas que cumplen {where}
+_POR_PRODUCTO = (
+    "INSERT INTO resumen_ventas_producto (fecha, id_producto, ventas, unidades, ingresos) "
+    "SELECT DATE(v.fecha), d.id_producto, COUNT(DISTINCT v.id_venta), SUM(d.cantidad), SUM(d.subtotal) "
+    "FROM ventas v JOIN detalle_venta d ON d.id_venta = v.id_venta "
+    "WHERE v.estado = 'COMPLETADA' AND {where} "
+    "GROUP BY DATE(v.fecha), d.id_producto "
+    "ON DUPLICATE KEY UPDATE ventas = ventas + VALUES(ventas), "
+    "unidades = unidades + VALUES(unidades), ingresos = ingresos + VALUES(ingresos)"
+)
+_POR_CLIENTE = (
+    "INSERT INTO resumen_ventas_cliente (fecha, id_cliente, ventas, unidades, total) "
+    "SELECT DATE(v.fecha), v.id_cliente, COUNT(*), SUM(u.unidades), SUM(v.total) "
+    "FROM ventas v JOIN (SELECT id_venta, SUM(cantidad) AS unidades FROM detalle_venta "
+    "{where_detalle} GROUP BY id_venta) u ON u.id_venta = v.id_venta "
+    "WHERE v.estado = 'COMPLETADA' AND {where} "
+    "GROUP BY DATE(v.fecha), v.id_cliente "
+    "ON DUPLICATE KEY UPDATE ventas = ventas + VALUES(ventas), "
+    "unidades = unidades + VALUES(unidades), total = total + VALUES(total)"
+)
+
+
+def init_app(app):
+    app.cli.add_command(reconstruir_cmd)
+
+
+def acumular_ventas(cursor, ids_venta):
+    """
+    Suma las ventas dadas (recién insertadas, con su detalle) a los resúmenes.
+    Debe llamarse dentro de la transacción que las insertó: si se revierte, también esto.
+    Si las tablas de resúmenes aún no existen (migración 5 sin aplicar) la venta sigue
+    adelante sin acumular: la migración los reconstruye desde el historial.
+    """
+    if not ids_venta:
+        return
+    marcas = ", ".join(["%s"] * len(ids_venta))
+    ids = list(ids_venta)
+    try:
+        cursor.execute(_POR_PRODUCTO.format(where=f"v.id_venta IN ({marcas})"), ids)
+        # La subconsulta de unidades también se limita a estas ventas
+        cursor.execute(
+            _POR_CLIENTE.format(where_detalle=f"WHERE id_venta IN ({marcas})",
+                                where=f"v.id_venta IN ({marcas})"),
+            ids + ids
+        )
+    except Error as e:
+        if e.errno != 1146:   # ER_NO_SUCH_TABLE; en InnoDB solo se revierte esta sentencia
+            raise
+        log.warning("Faltan las tablas de resúmenes (flask --app app migrar); "
+                    "ventas %s sin acumular: %s", ids, e)
+
+
+def _rango(desde, hasta):
+    """WHERE por día para ventas.fecha (hasta inclusivo) y sus parámetros."""
+    condiciones, params = [], []
+    if desde:
+        condiciones.append("v.fecha >= %s")
+        params.append(desde)
+    if hasta:
+        condiciones.append("v.fecha < %s")
+        params.append(hasta + timedelta(days=1))
+    return " AND ".join(condiciones) or "1 = 1", params
+
+
+def reconstruir(cursor, desde=None, hasta=None):
+    """Recalcula los resúmenes del rango (o de todo el historial) desde ventas/detalle_venta."""
+    for sql in TABLAS_SQL:
+        cursor.execute(sql)
+    borrar, params_borrar = [], []
+    if desde:
+        borrar.append("fecha >= %s")
+        params_borrar.append(desde)
+    if hasta:
+        borrar.append("fecha <= %s")
+        params_borrar.append(hasta)
+    where_borrar = (" WHERE " + " AND ".join(borrar)) if borrar else ""
+    for tabla in ('resumen_ventas_producto', 'resumen_ventas_cliente'):
+        cursor.execute(f"DELETE FROM {tabla}{where_borrar}", params_borrar)
+
+    where, params = _rango(desde, hasta)
+    cursor.execute(_POR_PRODUCTO.format(where=where), params)
+    cursor.execute(_POR_CLIENTE.format(where_detalle="", where=where), params)
+
+
+def reporte(cursor, desde, hasta, top=10):
+    """
+    Totales, serie diaria y más vendidos entre `desde` y `hasta` (fechas, inclusivas).
+    Solo lee los resúmenes: nunca recorre ventas ni detalle_venta.
+    """
+    rango = (desde, hasta)
+    cursor.execute(
+        "SELECT COALESCE(SUM(ventas), 0) AS ventas, COALESCE(SUM(unidades), 0) AS unidades, "
+        "COALESCE(SUM(total), 0) AS ingresos, COUNT(DISTINCT id_cliente) AS clientes "
+        "FROM resumen_ventas_cliente WHERE fecha BETWEEN %s AND %s",
+        rango
+    )
+    totales = cursor.fetchone()
+
+    cursor.execute(
+        "SELECT fecha, SUM(ventas) AS ventas, SUM(unidades) AS unidades, SUM(total) AS ingresos "
+        "FROM resumen_ventas_cliente WHERE fecha BETWEEN %s AND %s "
+        "GROUP BY fecha ORDER BY fecha",
+        rango
+    )
+    por_dia = cursor.fetchall()
+
+    cursor.execute(
+        "SELECT r.id_producto, p.nombre, SUM(r.unidades) AS unidades, SUM(r.ingresos) AS ingresos "
+        "FROM resumen_ventas_producto r LEFT JOIN productos p ON p.id_producto = r.id_producto "
+        "WHERE r.fecha BETWEEN %s AND %s "
+        "GROUP BY r.id_producto, p.nombre ORDER BY ingresos DESC LIMIT %s",
+        rango + (top,)
+    )
+    productos = cursor.fetchall()
+
+    cursor.execute(
+        "SELECT r.id_cliente, c.nombre, SUM(r.ventas) AS ventas, SUM(r.total) AS total "
+        "FROM resumen_ventas_cliente r LEFT JOIN clientes c ON c.id_cliente = r.id_cliente "
+        "WHERE r.fecha BETWEEN %s AND %s "
+        "GROUP BY r.id_cliente, c.nombre ORDER BY total DESC LIMIT %s",
+        rango + (top,)
+    )
+    clientes = cursor.fetchall()
+
+    return {'totales': totales, 'por_dia': por_dia, 'productos': productos, 'clientes': clientes}
+
+
+def rango_por_defecto(dias=30):
+    hasta = date.today()
+    return hasta - timedelta(days=dias - 1), hasta
+
+
+# ---------------- Consola ----------------
+
+def _fecha(ctx, param, valor):
+    if valor is None:
+        return None
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d').date()
+    except ValueError:
+        raise click.BadParameter('usa el formato AAAA-MM-DD')
+
+
+@click.command('reconstruir-resumenes')
+@click.option('--desde', callback=_fecha, help='Primer día (AAAA-MM-DD).')
+@click.option('--hasta', callback=_fecha, help='Último día, inclusivo (AAAA-MM-DD).')
+def reconstruir_cmd(desde, hasta):
+    """Recalcula los resúmenes diarios de ventas (todo el historial si no se indica rango)."""
+    conn = conexion()
+    try:
+        reconstruir(conn.cursor(), desde, hasta)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cerrar_conexion(conn)
+    click.echo("Resúmenes de ventas reconstruidos.")
@@ -0,0 +1,95 @@
+# seguridad.py
+# Hash de contraseñas fuera del hilo de la petición.
+# PBKDF2 con 600k iteraciones son cientos de ms de CPU: se calcula en un pool de procesos
+# acotado para que una ráfaga de logins no bloquee al resto de la app.
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+METODO_HASH = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+SALT_LENGTH = 16
+
+HASH_CONFIG = {
+    'HASH_PROCESOS': int(os.environ.get('HASH_PROCESOS', 2)),            # 0 = calcular en el mismo hilo
+    'HASH_MAX_PENDIENTES': int(os.environ.get('HASH_MAX_PENDIENTES', 8)),  # en curso + en cola
+    'HASH_TIMEOUT': float(os.environ.get('HASH_TIMEOUT', 5)),            # segundos esperando turno
+}
+
+
+class HashOcupado(RuntimeError):
+    """No hubo turno en el pool de hash dentro de HASH_TIMEOUT."""
+
+
+def _generar(password, metodo):
+    return generate_password_hash(password, method=metodo, salt_length=SALT_LENGTH)
+
+
+def _verificar(password_hash, password):
+    return check_password_hash(password_hash, password)
+
+
+_executor = None
+_cupos = None
+_lock = threading.Lock()
+
+
+def init_app(app):
+    for clave, valor in HASH_CONFIG.items():
+        HASH_CONFIG[clave] = app.config.setdefault(clave, valor)
+
+
+def _obtener_executor():
+    global _executor, _cupos
+    if _cupos is None:
+        with _lock:
+            if _cupos is None:
+                if HASH_CONFIG['HASH_PROCESOS'] > 0:
+                    # spawn: no hereda hilos ni sockets del worker
+                    _executor = ProcessPoolExecutor(
+                        max_workers=HASH_CONFIG['HASH_PROCESOS'],
+                        mp_context=multiprocessing.get_context('spawn'),
+                    )
+                _cupos = threading.BoundedSemaphore(HASH_CONFIG['HASH_MAX_PENDIENTES'])
+    return _executor, _cupos
+
+
+def _ejecutar(funcion, *args):
+    executor, cupos = _obtener_executor()
+    if not cupos.acquire(timeout=HASH_CONFIG['HASH_TIMEOUT']):
+        raise HashOcupado("Demasiadas operaciones de contraseña en curso")
+    try:
+        if executor is None:
+            return funcion(*args)
+        return executor.submit(funcion, *args).result()
+    finally:
+        cupos.release()
+
+
+def _reiniciar_tras_fork():
+    # El pool del padre no sirve en el hijo (gunicorn): se crea otro al primer uso
+    global _executor, _cupos, _lock
+    _executor = None
+    _cupos = None
+    _lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reiniciar_tras_fork)
+
+
+# --- API ---
+def generar_hash(password: str) -> str:
+    return _ejecutar(_generar, password, METODO_HASH)
+
+
+def verificar_hash(password_hash: str, password: str) -> bool:
+    return _ejecutar(_verificar, password_hash, password)
+
+
+def necesita_rehash(password_hash: str) -> bool:
+    """True si el hash se generó con otros parámetros (p. ej. menos iteraciones)."""
+    metodo = (password_hash or '').split('$', 1)[0]
+    return metodo != METODO_HASH
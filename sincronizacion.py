@@ -0,0 +1,167 @@
+# sincronizacion.py
+# Sincroniza datos/ en segundo plano para que las escrituras no esperen al disco:
+# - Los cambios se acumulan y se escriben juntos tras `ventana` segundos.
+# - Entre copias completas (JSON/CSV/TXT) solo se añade al log de cambios.
+# - Al cerrar el proceso se espera la escritura en curso, se vacía lo pendiente y se hace
+#   una copia completa.
+# - Con varios workers (gunicorn) cada proceso añade a su propio log (cambios.<pid>.log) y
+#   solo vacía el suyo; las escrituras a datos/ se turnan con un lock de archivo.
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:   # Windows: solo se serializa dentro del proceso
+    fcntl = None
+
+from utils import BASE_DIR, guardar_productos_multi
+
+log = logging.getLogger('sincronizacion')
+
+LOG_PATH = os.path.join(BASE_DIR, 'datos', 'cambios.log')   # base: cambios.<pid>.log
+
+SYNC_CONFIG = {
+    'SYNC_VENTANA': float(os.environ.get('SYNC_VENTANA', 2.0)),             # segundos agrupando cambios
+    'SYNC_SNAPSHOT_CADA': int(os.environ.get('SYNC_SNAPSHOT_CADA', 200)),   # cambios entre copias completas
+    'SYNC_BINARIO': os.environ.get('SYNC_BINARIO', '0') == '1',             # además datos.bin (mmap)
+}
+
+
+class SincronizadorArchivos:
+    """
+    `obtener_productos()` devuelve la lista de dicts {id, nombre, cantidad, precio}
+    para la copia completa; se llama desde el hilo de fondo, así que debe ser segura.
+    """
+
+    def __init__(self, obtener_productos, ventana=None, snapshot_cada=None, log_path=LOG_PATH):
+        self._obtener_productos = obtener_productos
+        self.ventana = SYNC_CONFIG['SYNC_VENTANA'] if ventana is None else ventana
+        self.snapshot_cada = SYNC_CONFIG['SYNC_SNAPSHOT_CADA'] if snapshot_cada is None else snapshot_cada
+        self.log_path = log_path
+        self._lock_path = os.path.join(os.path.dirname(log_path), '.sync.lock')
+
+        self._cond = threading.Condition()
+        self._escritura = threading.Lock()   # una sola escritura a disco a la vez
+        self._pendientes = []
+        self._snapshot_pedido = False
+        self._cambios_en_log = 0
+        self._hilo = None
+        self._pid = None
+        self._pid_log = os.getpid()
+        self._cerrando = False
+        atexit.register(self.cerrar)
+
+    # --- API ---
+    def registrar(self, op, producto=None, id=None):
+        """op: 'agregar' | 'actualizar' | 'eliminar'. Vuelve enseguida."""
+        cambio = {'op': op, 'ts': time.time()}
+        if producto is not None:
+            cambio['producto'] = producto
+            cambio['id'] = producto['id']
+        if id is not None:
+            cambio['id'] = id
+        with self._cond:
+            self._pendientes.append(cambio)
+            self._asegurar_hilo()
+            self._cond.notify()
+
+    def pedir_snapshot(self):
+        """Programa una copia completa (p. ej. tras cargar desde la BD)."""
+        with self._cond:
+            self._snapshot_pedido = True
+            self._asegurar_hilo()
+            self._cond.notify()
+
+    def vaciar(self):
+        """Escribe ya lo pendiente y deja una copia completa (se llama al salir)."""
+        with self._cond:
+            cambios, self._pendientes = self._pendientes, []
+            hacer_snapshot = self._snapshot_pedido or bool(cambios) or self._cambios_en_log > 0
+            self._snapshot_pedido = False
+        if hacer_snapshot:
+            self._escribir(cambios, snapshot=True)
+
+    def cerrar(self, espera=10.0):
+        """
+        Al salir: detiene el hilo, esperando (hasta `espera` segundos) el lote que ya esté
+        escribiendo, y después vacía lo pendiente con una copia completa.
+        """
+        with self._cond:
+            self._cerrando = True
+            self._cond.notify_all()
+        hilo = self._hilo
+        if hilo is not None and self._pid == os.getpid() and hilo.is_alive():
+            hilo.join(espera)
+        self.vaciar()
+
+    # --- Hilo de fondo ---
+    def _asegurar_hilo(self):
+        # Tras un fork (gunicorn) el hilo del padre no existe en el hijo
+        if self._cerrando:
+            return   # cerrar() ya corrió o está corriendo: lo pendiente lo escribe vaciar()
+        if self._hilo is None or self._pid != os.getpid() or not self._hilo.is_alive():
+            self._pid = os.getpid()
+            self._hilo = threading.Thread(target=self._bucle, name='sync-datos', daemon=True)
+            self._hilo.start()
+
+    def _bucle(self):
+        while True:
+            with self._cond:
+                while not self._pendientes and not self._snapshot_pedido and not self._cerrando:
+                    self._cond.wait()
+                # Junta la ráfaga de cambios en una sola escritura; cerrar() corta la espera
+                self._cond.wait_for(lambda: self._cerrando, timeout=self.ventana)
+                if self._cerrando:
+                    return   # lo pendiente lo escribe vaciar(), ya sin este hilo
+                cambios, self._pendientes = self._pendientes, []
+                snapshot = self._snapshot_pedido
+                self._snapshot_pedido = False
+            try:
+                self._escribir(cambios, snapshot)
+            except Exception:
+                # El hilo sigue vivo: el próximo lote o la copia al salir lo reintentan
+                log.exception("Error al sincronizar archivos")
+
+    def ruta_log(self):
+        """Log de este proceso: datos/cambios.<pid>.log."""
+        base, ext = os.path.splitext(self.log_path)
+        return f"{base}.{os.getpid()}{ext}"
+
+    def _escribir(self, cambios, snapshot):
+        with self._escritura, self._turno_archivos():
+            if self._pid_log != os.getpid():
+                # Proceso hijo: el log del padre no es suyo
+                self._pid_log = os.getpid()
+                self._cambios_en_log = 0
+            if not snapshot and self._cambios_en_log + len(cambios) < self.snapshot_cada:
+                with open(self.ruta_log(), 'a', encoding='utf-8') as f:
+                    for c in cambios:
+                        f.write(json.dumps(c, ensure_ascii=False) + '\n')
+                self._cambios_en_log += len(cambios)
+                return
+
+            # Copia completa: el log de este proceso ya no hace falta (los de otros workers sí)
+            guardar_productos_multi(self._obtener_productos(), binario=SYNC_CONFIG['SYNC_BINARIO'])
+            try:
+                os.remove(self.ruta_log())
+            except FileNotFoundError:
+                pass
+            self._cambios_en_log = 0
+
+    @contextmanager
+    def _turno_archivos(self):
+        """Lock exclusivo entre procesos mientras se escribe en datos/."""
+        if fcntl is None:
+            yield
+            return
+        with open(self._lock_path, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
@@ -2,41 +2,195 @@
 import json
 import os
 import csv
- 
+import mmap
+import stat
+import struct
+import tempfile
+from contextlib import contextmanager
+
 # Rutas a los archivos
 BASE_DIR = os.path.dirname(__file__)
 JSON_PATH = os.path.join(BASE_DIR, 'datos', 'datos.json')
 CSV_PATH = os.path.join(BASE_DIR, 'datos', 'datos.csv')
 TXT_PATH = os.path.join(BASE_DIR, 'datos', 'datos.txt')
- 
+BIN_PATH = os.path.join(BASE_DIR, 'datos', 'datos.bin')
+
+# --- Escritura atómica ---
+@contextmanager
+def escritura_atomica(filename, mode='w', **kwargs):
+    """
+    Escribe en un temporal del mismo directorio y lo renombra al final:
+    un lector (o un corte a mitad) ve el archivo anterior completo o el nuevo completo.
+    """
+    directorio = os.path.dirname(os.path.abspath(filename))
+    fd, tmp = tempfile.mkstemp(dir=directorio, prefix='.' + os.path.basename(filename) + '.')
+    try:
+        # mkstemp crea con 0600: se conservan los permisos del archivo que se reemplaza
+        modo = stat.S_IMODE(os.stat(filename).st_mode) if os.path.exists(filename) else 0o644
+        os.chmod(tmp, modo)
+        with os.fdopen(fd, mode, **kwargs) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, filename)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
 # --- JSON ---
 def guardar_productos_json(productos, filename=JSON_PATH):
-    with open(filename, 'w', encoding='utf-8') as f:
+    with escritura_atomica(filename, 'w', encoding='utf-8') as f:
         json.dump(productos, f, ensure_ascii=False, indent=4)
- 
+
 def cargar_productos_json(filename=JSON_PATH):
+    return list(iterar_productos_json(filename))
+
+def iterar_productos_json(filename=JSON_PATH, tam_bloque=64 * 1024):
+    """Recorre el arreglo JSON producto a producto, leyendo por bloques."""
+    decoder = json.JSONDecoder()
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        f = open(filename, 'r', encoding='utf-8')
     except FileNotFoundError:
-        return []
- 
+        return
+    with f:
+        buf = f.read(tam_bloque).lstrip()
+        if not buf.startswith('['):
+            if buf:
+                raise ValueError(f"{filename}: se esperaba un arreglo JSON")
+            return
+        buf = buf[1:]
+        fin_archivo = False
+        while True:
+            buf = buf.lstrip().lstrip(',').lstrip()
+            if buf.startswith(']'):
+                return
+            try:
+                obj, pos = decoder.raw_decode(buf)
+            except json.JSONDecodeError:
+                if fin_archivo:
+                    raise
+                bloque = f.read(tam_bloque)
+                fin_archivo = not bloque
+                buf += bloque
+                continue
+            yield obj
+            buf = buf[pos:]
+
 # --- CSV ---
 def guardar_productos_csv(productos, filename=CSV_PATH):
-    with open(filename, 'w', newline='', encoding='utf-8') as f:
+    with escritura_atomica(filename, 'w', newline='', encoding='utf-8') as f:
         writer = csv.DictWriter(f, fieldnames=["id", "nombre", "cantidad", "precio"])
         writer.writeheader()
         writer.writerows(productos)
- 
+
+def iterar_productos_csv(filename=CSV_PATH):
+    """Recorre el CSV fila a fila con los tipos de guardar_productos_csv."""
+    try:
+        f = open(filename, 'r', newline='', encoding='utf-8')
+    except FileNotFoundError:
+        return
+    with f:
+        for fila in csv.DictReader(f):
+            yield {
+                "id": int(fila["id"]),
+                "nombre": fila["nombre"],
+                "cantidad": int(fila["cantidad"]),
+                "precio": float(fila["precio"]),
+            }
+
 # --- TXT ---
 def guardar_productos_txt(productos, filename=TXT_PATH):
-    with open(filename, 'w', encoding='utf-8') as f:
+    with escritura_atomica(filename, 'w', encoding='utf-8') as f:
         for p in productos:
             f.write(f"ID: {p['id']} | Nombre: {p['nombre']} | Cantidad: {p['cantidad']} | Precio: {p['precio']}\n")
- 
+
+# --- Binario (opcional) ---
+# Formato: cabecera | índice ordenado por id | registros
+#   cabecera: b'PRD1' + n (uint32)
+#   índice:   n x (id int64, offset uint32, largo uint32)
+#   registro: cantidad int64, precio float64, nombre utf-8
+_MAGIA = b'PRD1'
+_CABECERA = struct.Struct('<4sI')
+_ENTRADA = struct.Struct('<qII')
+_REGISTRO = struct.Struct('<qd')
+
+def guardar_productos_bin(productos, filename=BIN_PATH):
+    productos = sorted(productos, key=lambda p: p['id'])
+    inicio = _CABECERA.size + _ENTRADA.size * len(productos)
+    indice, registros, offset = [], [], inicio
+    for p in productos:
+        reg = _REGISTRO.pack(int(p['cantidad']), float(p['precio'])) + p['nombre'].encode('utf-8')
+        indice.append(_ENTRADA.pack(int(p['id']), offset, len(reg)))
+        registros.append(reg)
+        offset += len(reg)
+    with escritura_atomica(filename, 'wb') as f:
+        f.write(_CABECERA.pack(_MAGIA, len(productos)))
+        f.writelines(indice)
+        f.writelines(registros)
+
+class SnapshotBinario:
+    """
+    Lee datos.bin con mmap: abrirlo no parsea nada y buscar(id) es una búsqueda
+    binaria sobre el índice (O(log n)), decodificando solo el registro encontrado.
+    """
+
+    def __init__(self, filename=BIN_PATH):
+        with open(filename, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magia, self._n = _CABECERA.unpack_from(self._mm, 0)
+        if magia != _MAGIA:
+            self._mm.close()
+            raise ValueError(f"{filename}: no es un snapshot de productos")
+
+    def __len__(self):
+        return self._n
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def cerrar(self):
+        self._mm.close()
+
+    def _entrada(self, i):
+        return _ENTRADA.unpack_from(self._mm, _CABECERA.size + i * _ENTRADA.size)
+
+    def _registro(self, id, offset, largo):
+        cantidad, precio = _REGISTRO.unpack_from(self._mm, offset)
+        nombre = self._mm[offset + _REGISTRO.size:offset + largo].decode('utf-8')
+        return {"id": id, "nombre": nombre, "cantidad": cantidad, "precio": precio}
+
+    def buscar(self, id):
+        lo, hi = 0, self._n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            actual, offset, largo = self._entrada(mid)
+            if actual < id:
+                lo = mid + 1
+            elif actual > id:
+                hi = mid
+            else:
+                return self._registro(actual, offset, largo)
+        return None
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield self._registro(*self._entrada(i))
+
 # --- Función central para sincronizar todos los formatos ---
-def guardar_productos_multi(productos):
-    """Guarda los productos en JSON, CSV y TXT."""
-    guardar_productos_json(productos)
-    guardar_productos_csv(productos)
-    guardar_productos_txt(productos)
\ No newline at end of file
+def guardar_productos_multi(productos, binario=False, directorio=None):
+    """Guarda los productos en JSON, CSV y TXT (y opcionalmente en binario).
+    Con `directorio` se escriben ahí en lugar de datos/ (p. ej. para medir)."""
+    rutas = (JSON_PATH, CSV_PATH, TXT_PATH, BIN_PATH)
+    if directorio:
+        rutas = [os.path.join(directorio, os.path.basename(r)) for r in rutas]
+    guardar_productos_json(productos, rutas[0])
+    guardar_productos_csv(productos, rutas[1])
+    guardar_productos_txt(productos, rutas[2])
+    if binario:
+        guardar_productos_bin(productos, rutas[3])